@@ -0,0 +1,200 @@
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import universe_store
+import performance
+import execution_model
+
+STARTING_CASH = 100_000
+BAR_FIELDS = {"high": "High", "low": "Low", "volume": "Volume"}
+
+# LEDGER ENGINE
+def _ledger_pass(prices, shares, cash, position, model=execution_model.DEFAULT_MODEL, bars=None):
+    buys = shares > 0
+    sells = shares < 0
+    execution_price, commission = model.costs(shares, prices, **(bars or {}))
+    buy_cost = shares * execution_price + commission
+    sell_revenue = -shares * execution_price - commission
+    cash_delta = np.where(buys, -buy_cost, np.where(sells, sell_revenue, 0.0))
+
+    # SEED THE CUMSUM WITH THE OPENING BALANCE SO IT FOLDS LEFT LIKE THE UI DOES
+    # (WORKS ON ONE ORDER ARRAY OR A 2-D STACK OF THEM, ONE LEDGER PER ROW)
+    opening = shares.shape[:-1] + (1,)
+    cash_path = np.cumsum(np.concatenate((np.full(opening, float(cash)), cash_delta), axis=-1), axis=-1)
+    position_path = np.cumsum(np.concatenate((np.full(opening, position, dtype=shares.dtype), shares), axis=-1), axis=-1)
+    rejected = (buys & (buy_cost > cash_path[..., :-1])) | (sells & (-shares > position_path[..., :-1]))
+    return execution_price, commission, np.where(buys, buy_cost, sell_revenue), cash_path[..., 1:], position_path[..., 1:], rejected
+
+def run_backtest(prices, orders, cash=STARTING_CASH, position=0, model=execution_model.DEFAULT_MODEL, high=None, low=None, volume=None, traded=0):
+    """Fill a whole array of signed share orders (+buy / -sell) against prices.
+
+    The execution model first caps each bar's fill at its share of the bar's
+    volume (carrying the rest forward) and prices the fills. Each pass then
+    fills every remaining order at once and rejects only the first fill that
+    breaks the cash or position check, then resumes from there.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    orders = np.asarray(orders, dtype=np.int64)
+    bars = {name: np.asarray(values, dtype=np.float64) for name, values in (("high", high), ("low", low), ("volume", volume)) if values is not None}
+    executed = model.participate(orders, bars.get("volume"), traded)
+    shares = executed.copy()
+    execution_price = np.zeros(len(prices))
+    commission = np.zeros(len(prices))
+    total = np.zeros(len(prices))
+    cash_path = np.full(len(prices), float(cash))
+    position_path = np.full(len(prices), position, dtype=np.int64)
+
+    start = 0
+    while start < len(prices):
+        opening_cash = cash_path[start - 1] if start else cash
+        opening_position = position_path[start - 1] if start else position
+        tail = {name: values[start:] for name, values in bars.items()}
+        price, fee, amount, cash_tail, position_tail, rejected = _ledger_pass(prices[start:], shares[start:], opening_cash, opening_position, model, tail)
+        execution_price[start:] = price
+        commission[start:] = fee
+        total[start:] = amount
+        cash_path[start:] = cash_tail
+        position_path[start:] = position_tail
+        if not rejected.any():
+            break
+        first = start + int(np.argmax(rejected))
+        shares[first] = 0
+        start = first
+
+    filled = shares != 0
+    return {
+        "orders": orders,
+        "filled": filled,
+        "rejected": (executed != 0) & ~filled,
+        "shares": shares,
+        "price": np.where(filled, execution_price, 0.0),
+        "commission": np.where(filled, commission, 0.0),
+        "total": np.where(filled, total, 0.0),
+        "cash": cash_path,
+        "position": position_path,
+        "equity": cash_path + position_path * prices,
+    }
+
+def fill_order(cash, position, action, shares, price, model=execution_model.DEFAULT_MODEL, high=None, low=None, volume=None, traded=0):
+    """Fill one UI order on one bar through the same ledger pass; returns None if rejected.
+
+    Under a participation cap the fill can be smaller than the order (even 0
+    shares once traded shares have used up the bar's volume); the caller
+    decides what happens to the rest.
+    """
+    signed = shares if action == "BUY" else -shares
+    bar = {name: [value] for name, value in (("high", high), ("low", low), ("volume", volume)) if value is not None}
+    result = run_backtest([price], [signed], cash, position, model, traded=traded, **bar)
+    if result["rejected"][0]:
+        return None
+    filled = abs(int(result["shares"][0]))
+    return {
+        "action": action,
+        "shares": filled,
+        "price": float(result["price"][0]),
+        "commission": float(result["commission"][0]),
+        "total": float(result["total"][0]),
+        "cash": float(result["cash"][0]),
+        "position": int(result["position"][0]),
+    }
+
+# STRATEGIES
+def rolling_mean(values, window):
+    sums = np.cumsum(np.concatenate(([0.0], values)))
+    means = np.full(len(values), np.nan)
+    if window <= len(values):
+        means[window - 1:] = (sums[window:] - sums[:-window]) / window
+    return means
+
+def buy_and_hold(close, shares=10, **params):
+    orders = np.zeros(len(close), dtype=np.int64)
+    if len(close):
+        orders[0] = shares
+    return orders
+
+def cross_targets(fast_ma, slow_ma, close, shares, stop_loss=0.0):
+    """Target positions for rows of moving averages: long while fast > slow.
+
+    A stop-loss closes the position once the close falls stop_loss below the
+    close on the entry day, and stays flat until the next cross up.
+    """
+    signal = fast_ma > slow_ma
+    days = np.arange(signal.shape[-1])
+    entries = signal & ~np.concatenate((np.zeros_like(signal[..., :1]), signal[..., :-1]), axis=-1)
+    entry_day = np.maximum.accumulate(np.where(entries, days, 0), axis=-1)
+    stop_loss = np.asarray(stop_loss, dtype=float)
+    hit = signal & (stop_loss > 0) & (close <= close[entry_day] * (1 - stop_loss))
+    hits = np.cumsum(hit, axis=-1)
+    stopped = hits > np.take_along_axis(hits - hit, entry_day, axis=-1)
+    return np.where(signal & ~stopped, shares, 0)
+
+def sma_cross(close, shares=10, fast=20, slow=50, stop_loss=0.0, **params):
+    target = cross_targets(rolling_mean(close, fast)[None], rolling_mean(close, slow)[None], close, shares, stop_loss)[0]
+    return np.diff(target, prepend=0).astype(np.int64)
+
+STRATEGIES = {
+    "buy_and_hold": buy_and_hold,
+    "sma_cross": sma_cross,
+}
+
+# BATCH BACKTEST
+def ticker_fields(store, ticker, model):
+    """The High/Low/Volume keyword arrays the model reads, or none for the default model."""
+    if not model.needs_bars:
+        return {}
+    return {name: store.field(ticker, field) for name, field in BAR_FIELDS.items()}
+
+def backtest_ticker(ticker, strategy, params, data_folder=universe_store.DATA_FOLDER, model=execution_model.DEFAULT_MODEL):
+    store = universe_store.open_store(data_folder)
+    close = store.field(ticker, "Close")
+    if len(close) == 0:
+        return None
+    result = run_backtest(close, STRATEGIES[strategy](close, **params), model=model, **ticker_fields(store, ticker, model))
+    final_equity = float(result["equity"][-1])
+    metrics = performance.compute_metrics(result["equity"])
+    return {
+        "ticker": ticker,
+        "days": len(close),
+        "trades": int(result["filled"].sum()),
+        "rejected": int(result["rejected"].sum()),
+        "commission": float(result["commission"].sum()),
+        "final_cash": float(result["cash"][-1]),
+        "final_position": int(result["position"][-1]),
+        "final_equity": final_equity,
+        "return_pct": (final_equity - STARTING_CASH) / STARTING_CASH * 100,
+        "max_drawdown_pct": metrics["max_drawdown"] * 100,
+        "sharpe": metrics["sharpe"],
+        "sortino": metrics["sortino"],
+    }
+
+def backtest_universe(strategy, params, data_folder=universe_store.DATA_FOLDER, workers=None, model=execution_model.DEFAULT_MODEL):
+    # BUILD THE STORE ONCE UP FRONT SO WORKERS ONLY MAP IT
+    tickers = sorted(universe_store.open_store(data_folder).tickers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        rows = pool.map(backtest_ticker, tickers, [strategy] * len(tickers), [params] * len(tickers), [data_folder] * len(tickers), [model] * len(tickers), chunksize=16)
+        rows = [row for row in rows if row is not None]
+    return pd.DataFrame(rows).sort_values("return_pct", ascending=False).reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest one strategy across every ticker in data/.")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="sma_cross")
+    parser.add_argument("--shares", type=int, default=10)
+    parser.add_argument("--fast", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=50)
+    parser.add_argument("--stop-loss", type=float, default=0.0, help="fraction below the entry close that exits, e.g. 0.05")
+    parser.add_argument("--data", default=universe_store.DATA_FOLDER)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--out", help="optional CSV path for the full results table")
+    execution_model.add_arguments(parser)
+    args = parser.parse_args()
+
+    params = {"shares": args.shares, "fast": args.fast, "slow": args.slow, "stop_loss": args.stop_loss}
+    results = backtest_universe(args.strategy, params, args.data, args.workers, execution_model.from_arguments(args))
+    if args.out:
+        results.to_csv(args.out, index=False)
+    print(results.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+
+if __name__ == "__main__":
+    main()
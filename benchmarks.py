@@ -0,0 +1,249 @@
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import platform
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+BASELINE_PATH = "benchmarks_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+NOISE_FLOOR_MS = 2.0
+SHORT_TICKER = "SOLV"
+FULL_TICKER = "AAPL"
+UPLOAD_ROWS = 1_000_000
+TRADE_COUNTS = [0, 1_000, 20_000]
+
+# HEADLESS APP
+def bench_app():
+    # RUNS INSIDE AppTest; A SYNTHETIC UPLOAD IS HANDED OVER THROUGH SESSION STATE
+    import streamlit as st
+    import trading_simulator
+
+    class Upload:
+        def __init__(self, name, content):
+            self.name = name
+            self.content = content
+
+        def getvalue(self):
+            return self.content
+
+    upload = st.session_state.pop("bench_upload", None)
+    if upload is not None:
+        key, df = trading_simulator.get_uploaded_stock(Upload(*upload))
+        trading_simulator.switch_stock(df, upload[0].replace(".csv", "").upper(), key)
+    trading_simulator.run()
+
+def new_app():
+    return AppTest.from_function(bench_app, default_timeout=600)
+
+def timed_run(at, action=None):
+    start = time.perf_counter()
+    (action(at) if action else at).run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed
+
+def button(at, label):
+    return next(b for b in at.button if b.label.startswith(label))
+
+def summarize(samples):
+    samples = np.asarray(samples)
+    return {"median_ms": float(np.median(samples)), "p95_ms": float(np.percentile(samples, 95)), "runs": len(samples)}
+
+def temporary_session_store():
+    # THE APP SAVES EVERY SESSION IT RUNS; POINT IT AT A THROWAWAY DATABASE INSTEAD OF data/.sessions.db.
+    # session_store READS THE PATH ON IMPORT, SO THIS HAS TO HAPPEN BEFORE THE FIRST APP RUN
+    if "session_store" in sys.modules:
+        raise RuntimeError("session_store was imported before the benchmark could redirect it")
+    folder = tempfile.mkdtemp(prefix="bench-sessions-")
+    os.environ["SIMULATOR_SESSIONS"] = os.path.join(folder, "sessions.db")
+    return folder
+
+def remove_session_store(folder):
+    import session_store
+    session_store.get_store().stop()
+    shutil.rmtree(folder, ignore_errors=True)
+
+# SYNTHETIC DATA
+def synthetic_csv(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0005, rows)))
+    spread = np.abs(rng.normal(0, 0.001, rows)) * close
+    frame = pd.DataFrame({
+        "Date": pd.date_range("2015-01-01", periods=rows, freq="min"),
+        "Open": close.round(4),
+        "High": (close + spread).round(4),
+        "Low": (close - spread).round(4),
+        "Close": close.round(4),
+        "Volume": rng.integers(100, 10_000, rows),
+    })
+    return frame.to_csv(index=False).encode("utf-8")
+
+def fill_ledger(ledger, dates, prices, ticker, count):
+    # ALTERNATING 1-SHARE BUYS AND SELLS SPREAD OVER THE DATES BEFORE THE CURRENT DAY
+    rows = np.linspace(0, len(dates) - 1, count).astype(int) if count else []
+    for i, row in enumerate(rows):
+        action = "BUY" if i % 2 == 0 else "SELL"
+        price = float(prices[row])
+        ledger.append(dates[row], ticker, action, 1, price, 1, price + 1 if action == "BUY" else price - 1)
+
+# APP BENCHMARKS
+def load_dataset(at, dataset, upload=None):
+    if upload is not None:
+        at.session_state["bench_upload"] = (f"{dataset}.csv", upload)
+        return timed_run(at)
+    at.text_input(key="ticker_search").set_value(dataset).run()
+    return timed_run(at, lambda at: at.button(key="load_default_btn").click())
+
+def bench_app_paths(dataset, repeats, upload=None):
+    import dataset_cache
+    results = {}
+
+    # COLD LOAD: NEW SESSION, EMPTY DATASET CACHE, THEN SWITCH TO THE DATASET
+    dataset_cache.shared_cache.clear()
+    at = new_app()
+    results["cold_load"] = summarize([timed_run(at)])
+    results["ticker_load"] = summarize([load_dataset(at, dataset, upload)])
+    results["ticker_load_cached"] = summarize([load_dataset(at, dataset, upload) for _ in range(max(repeats // 3, 1))])
+
+    results["day_step"] = summarize([timed_run(at, lambda at: button(at, "Next").click()) for _ in range(repeats)])
+    results["ten_day_step"] = summarize([timed_run(at, lambda at: button(at, "10 Days ⏭").click()) for _ in range(repeats)])
+    results["market_order"] = summarize([timed_run(at, lambda at: button(at, "🟢 BUY").click()) for _ in range(repeats)])
+
+    at.radio(key="order_type_radio").set_value("Limit").run()
+    at.number_input(key="limit_price").set_value(0.01).run()
+    results["resting_order"] = summarize([timed_run(at, lambda at: button(at, "🟢 BUY").click()) for _ in range(repeats)])
+    at.radio(key="order_type_radio").set_value("Market").run()
+
+    results["chart_line"] = summarize([timed_run(at, lambda at: at.number_input(key="chart_days").set_value(40 + 10 * (i % 2))) for i in range(repeats)])
+    at.multiselect(key="indicators").set_value(["SMA", "Bollinger", "RSI", "MACD"]).run()
+    results["chart_indicators"] = summarize([timed_run(at, lambda at: button(at, "Next").click()) for _ in range(repeats)])
+    at.radio(key="chart_type").set_value("Candlestick").run()
+    at.number_input(key="chart_days").set_value(min(len(at.session_state.data), 2_000)).run()
+    results["chart_candlestick"] = summarize([timed_run(at, lambda at: button(at, "Next").click()) for _ in range(repeats)])
+    return results
+
+def bench_trade_counts(repeats):
+    import session_store
+    results = {}
+    for count in TRADE_COUNTS:
+        at = new_app()
+        timed_run(at)
+        load_dataset(at, FULL_TICKER)
+        data = at.session_state.data
+        day = at.session_state.current_day
+        fill_ledger(at.session_state.trades, data["Date"].to_numpy()[:day], data["Close"].to_numpy()[:day], at.session_state.stock_name, count)
+        # THE FIRST RERUN HANDS THE WHOLE FILLED LEDGER TO THE SESSION WRITER; WRITE IT BEFORE TIMING THE STEADY STATE
+        timed_run(at, lambda at: button(at, "Next").click())
+        session_store.get_store().flush()
+        results[f"day_step_{count}_trades"] = summarize([timed_run(at, lambda at: button(at, "Next").click()) for _ in range(repeats)])
+    return results
+
+# CSV MICROBENCHMARKS
+def bench_csv_paths(repeats, upload):
+    import csv_ingest
+    import session_store
+    import universe_store
+    import trading_simulator
+    results = {}
+    # THE APP RUNS LEAVE THE SESSION WRITER A BACKLOG (THE 20,000-TRADE LEDGER); WRITE IT NOW SO IT ISN'T TIMED HERE
+    session_store.get_store().flush()
+    store = universe_store.open_store()
+    path = os.path.join(universe_store.DATA_FOLDER, store.tickers[FULL_TICKER]["file"])
+
+    def timed(fn, runs):
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+        return summarize(samples)
+
+    results["ticker_read_csv"] = timed(lambda: trading_simulator.load_csv(path), repeats)
+    results["ticker_store_load"] = timed(lambda: store.load(FULL_TICKER), repeats)
+    results["upload_read_csv"] = timed(lambda: trading_simulator.load_csv(io.BytesIO(upload)), 1)
+    results["upload_streaming"] = timed(lambda: csv_ingest.read_prices(io.BytesIO(upload)), 1)
+    return results
+
+# BASELINE
+def compare(results, baseline):
+    thresholds = baseline.get("thresholds", {})
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        limit = thresholds.get(name, thresholds.get("default", DEFAULT_THRESHOLD))
+        ratio = current["median_ms"] / max(previous["median_ms"], 1e-9)
+        if ratio > 1 + limit and current["median_ms"] - previous["median_ms"] > NOISE_FLOOR_MS:
+            regressions.append((name, previous["median_ms"], current["median_ms"], ratio))
+    return regressions
+
+def flatten(groups):
+    return {f"{group}.{name}": result for group, results in groups.items() for name, result in results.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Trading Simulator reruns and data loading paths.")
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--upload-rows", type=int, default=UPLOAD_ROWS)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None, help=f"allowed slowdown vs. baseline (default {DEFAULT_THRESHOLD:.0%})")
+    args = parser.parse_args()
+
+    upload = synthetic_csv(args.upload_rows)
+    sessions = temporary_session_store()
+    try:
+        groups = {
+            SHORT_TICKER: bench_app_paths(SHORT_TICKER, args.repeats),
+            FULL_TICKER: bench_app_paths(FULL_TICKER, args.repeats),
+            f"upload_{args.upload_rows}": bench_app_paths("SYNTHETIC", args.repeats, upload),
+            "trades": bench_trade_counts(args.repeats),
+            "csv": bench_csv_paths(args.repeats, upload),
+        }
+    finally:
+        remove_session_store(sessions)
+    results = flatten(groups)
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}}  {'median ms':>10}  {'p95 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<{width}}  {result['median_ms']:>10,.1f}  {result['p95_ms']:>10,.1f}")
+
+    if args.save:
+        previous = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as fh:
+                previous = json.load(fh)
+        baseline = {
+            "machine": {"python": platform.python_version(), "platform": platform.platform(), "processor": platform.processor()},
+            "thresholds": previous.get("thresholds", {"default": DEFAULT_THRESHOLD}),
+            "results": results,
+        }
+        with open(args.baseline, "w") as fh:
+            json.dump(baseline, fh, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save to create one.")
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    if args.threshold is not None:
+        baseline["thresholds"] = {"default": args.threshold}
+    regressions = compare(results, baseline)
+    for name, previous, current, ratio in regressions:
+        print(f"REGRESSION {name}: {previous:,.1f} ms -> {current:,.1f} ms ({ratio:.2f}x)")
+    if not regressions:
+        print("No regressions against the baseline.")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
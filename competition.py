@@ -0,0 +1,309 @@
+import time
+import random
+import secrets
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+import numpy as np
+import universe_store
+import backtest_engine
+
+STARTING_CASH = 100_000
+TOP_RANKS = 20
+IDLE_SECONDS = 3600
+# WHILE THE CLOCK IS PAUSED, JOINS AND TRADES REACH THE LEADERBOARD AT MOST THIS OFTEN
+RESTANDING_SECONDS = 1.0
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+
+# ONE PRICE TICK AND THE STANDINGS AT IT, PUBLISHED TOGETHER AS ONE (tick, standings) PAIR; READERS
+# TAKE THE PAIR IN ONE READ, SO THEY NEVER SEE STANDINGS FROM ONE TICK WITH THE PRICE FROM ANOTHER
+Tick = namedtuple("Tick", ["seq", "day", "date", "price", "running", "finished", "published", "compute_seconds"])
+Standings = namedtuple("Standings", ["seq", "values", "ranks", "top", "participants", "mean_value"])
+
+# COMPETITION
+class Competition:
+    """Many participants trading one ticker on one replay clock.
+
+    A single clock thread per competition advances the replay day by wall
+    time, and publishes the tick (day, date, close) and the standings
+    computed at that price. Sessions only read the published values, so the
+    per-tick work doesn't grow with the number of viewers. Participants'
+    cash and shares sit in shared arrays; a trade updates one slot and the
+    running totals under a lock. Each tick ranks everyone with one vector
+    pass over those arrays.
+    """
+
+    def __init__(self, code, ticker, dates, closes, start_day=0, days=250, speed=1.0, cash=STARTING_CASH):
+        self.code = code
+        self.ticker = ticker
+        self.dates = dates
+        self.closes = np.asarray(closes, dtype=np.float64)
+        self.start_day = start_day
+        self.end_day = min(start_day + days, len(closes) - 1)
+        self.speed = speed
+        self.starting_cash = float(cash)
+        self.names = []
+        self.cash = np.zeros(64)
+        self.shares = np.zeros(64, dtype=np.int64)
+        self.trade_counts = np.zeros(64, dtype=np.int64)
+        self._total_cash = 0.0
+        self._total_shares = 0
+        self._lock = threading.Lock()
+        self.published = None
+        self._new_tick = threading.Condition()
+        self._publishing = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._running = False
+        self._changed = False
+        self._anchor_day = start_day
+        self._anchor_time = time.monotonic()
+        self._publish(start_day)
+        self._clock = threading.Thread(target=self._run, name=f"competition-{code}", daemon=True)
+        self._clock.start()
+
+    def __len__(self):
+        return len(self.names)
+
+    # PARTICIPANTS
+    def join(self, name):
+        with self._lock:
+            participant = len(self.names)
+            if participant == len(self.cash):
+                self.cash = np.concatenate((self.cash, np.zeros(len(self.cash))))
+                self.shares = np.concatenate((self.shares, np.zeros(len(self.shares), dtype=np.int64)))
+                self.trade_counts = np.concatenate((self.trade_counts, np.zeros(len(self.trade_counts), dtype=np.int64)))
+            self.names.append(name)
+            self.cash[participant] = self.starting_cash
+            self._total_cash += self.starting_cash
+            self._changed = True
+        return participant
+
+    def trade(self, participant, action, shares):
+        """Fill a market order at the current tick's close; returns the fill, or None if rejected or closed."""
+        tick = self.tick
+        if tick.finished:
+            return None
+        with self._lock:
+            fill = backtest_engine.fill_order(self.cash[participant], int(self.shares[participant]), action, shares, tick.price)
+            if fill is None:
+                return None
+            self._total_cash += fill["cash"] - self.cash[participant]
+            self._total_shares += fill["position"] - int(self.shares[participant])
+            self.cash[participant] = fill["cash"]
+            self.shares[participant] = fill["position"]
+            self.trade_counts[participant] += 1
+            self._changed = True
+        return fill
+
+    def account(self, participant):
+        with self._lock:
+            return float(self.cash[participant]), int(self.shares[participant]), int(self.trade_counts[participant])
+
+    # CLOCK
+    def start(self):
+        with self._lock:
+            if not self._running and not self.tick.finished:
+                self._running = True
+                self._anchor_day, self._anchor_time = self.tick.day, time.monotonic()
+        self._publish(self.tick.day)
+        self._wake.set()
+
+    def pause(self):
+        with self._lock:
+            self._running = False
+        self._publish(self.tick.day)
+
+    def set_speed(self, speed):
+        # RE-ANCHOR SO THE DAY DOESN'T JUMP WHEN THE SPEED CHANGES
+        with self._lock:
+            self._anchor_day, self._anchor_time = self.tick.day, time.monotonic()
+            self.speed = speed
+        self._wake.set()
+
+    def finish(self):
+        """End trading at the current day."""
+        with self._lock:
+            self._running = False
+            self.end_day = self.tick.day
+        self._publish(self.tick.day)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        with self._new_tick:
+            self._new_tick.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._running:
+                self._wake.wait(RESTANDING_SECONDS)
+                self._wake.clear()
+                if self._changed and not self._running and not self._stop.is_set():
+                    self._publish(self.tick.day)
+                continue
+            # SLEEP TO THE NEXT DAY BOUNDARY, THEN PUBLISH (SKIPPING DAYS IF A TICK RAN LATE)
+            elapsed = (time.monotonic() - self._anchor_time) * self.speed
+            self._wake.wait(max((np.floor(elapsed) + 1 - elapsed) / self.speed, 0.0))
+            self._wake.clear()
+            if not self._running:
+                continue
+            day = min(self._anchor_day + int((time.monotonic() - self._anchor_time) * self.speed), self.end_day)
+            if day != self.tick.day:
+                self._publish(day)
+
+    def _publish(self, day):
+        with self._publishing:
+            self._publish_locked(day)
+        with self._new_tick:
+            self._new_tick.notify_all()
+
+    def _publish_locked(self, day):
+        start = time.perf_counter()
+        price = float(self.closes[day])
+        with self._lock:
+            count = len(self.names)
+            cash = self.cash[:count].copy()
+            shares = self.shares[:count].copy()
+            total_cash, total_shares = self._total_cash, self._total_shares
+            self._changed = False
+            finished = day >= self.end_day
+            if finished:
+                self._running = False
+            running = self._running
+        values = cash + shares * price
+        order = np.argsort(-values, kind="stable")
+        ranks = np.empty(count, dtype=np.int64)
+        ranks[order] = np.arange(1, count + 1)
+        top = [(int(i), self.names[i], float(values[i])) for i in order[:TOP_RANKS]]
+        seq = 0 if self.published is None else self.published[0].seq + 1
+        standings = Standings(seq, values, ranks, top, count, (total_cash + total_shares * price) / count if count else self.starting_cash)
+        tick = Tick(seq, day, self.dates[day], price, running, finished, time.perf_counter(), time.perf_counter() - start)
+        self.published = (tick, standings)
+
+    @property
+    def tick(self):
+        return self.published[0]
+
+    @property
+    def standings(self):
+        return self.published[1]
+
+    def wait_for_tick(self, seq, timeout=None):
+        """Block until a tick newer than seq is published; returns the latest tick."""
+        with self._new_tick:
+            self._new_tick.wait_for(lambda: self.tick.seq > seq or self._stop.is_set(), timeout)
+        return self.tick
+
+    def rank(self, participant):
+        """(rank, value) at the last tick; a participant who joined since then has no rank yet."""
+        tick, standings = self.published
+        if participant >= standings.participants:
+            cash, shares, _ = self.account(participant)
+            return None, cash + shares * tick.price
+        return int(standings.ranks[participant]), float(standings.values[participant])
+
+    @property
+    def idle(self):
+        tick = self.tick
+        return not tick.running and time.perf_counter() - tick.published > IDLE_SECONDS
+
+_competitions = {}
+_competitions_lock = threading.Lock()
+
+def _prune():
+    # COMPETITIONS FINISHED OR PAUSED FOR IDLE_SECONDS GIVE BACK THEIR CLOCK THREAD AND ARRAYS
+    for code in [code for code, competition in _competitions.items() if competition.idle]:
+        _competitions.pop(code).stop()
+
+def create(ticker, start=None, days=250, speed=1.0, cash=STARTING_CASH, data_folder=universe_store.DATA_FOLDER):
+    """Open a competition on one ticker from the universe store, replaying from the first day on or after start; returns it under a new join code."""
+    store = universe_store.open_store(data_folder)
+    if ticker not in store:
+        raise ValueError(f"unknown ticker {ticker}")
+    dates, closes = store.row_dates(ticker), store.field(ticker, "Close")
+    if len(closes) < 2:
+        raise ValueError(f"{ticker} has too little data")
+    start_day = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "ns")))
+    with _competitions_lock:
+        _prune()
+        code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(6))
+        while code in _competitions:
+            code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(6))
+        competition = _competitions[code] = Competition(code, ticker, dates, closes, min(start_day, len(closes) - 2), days, speed, cash)
+    return competition
+
+def get_competition(code):
+    with _competitions_lock:
+        return _competitions.get(code.strip().upper())
+
+# LOAD TEST
+def run_participants(competition, participants, rngs, tick, trade_probability, observed, orders):
+    # SCRIPTED PLAYERS: READ THE STANDINGS, SOMETIMES TRADE
+    for participant in participants:
+        observed.append(time.perf_counter() - tick.published)
+        competition.rank(participant)
+        rng = rngs[participant]
+        if rng.random() < trade_probability:
+            start = time.perf_counter()
+            action = "BUY" if rng.random() < 0.6 else "SELL"
+            competition.trade(participant, action, rng.randint(1, 50))
+            orders.append(time.perf_counter() - start)
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    if len(samples) == 0:
+        return "n/a"
+    return f"p50 {np.percentile(samples, 50):7.2f}   p95 {np.percentile(samples, 95):7.2f}   p99 {np.percentile(samples, 99):7.2f}   max {samples.max():7.2f}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test competition mode with scripted participants on one shared clock.")
+    parser.add_argument("--participants", type=int, default=1000)
+    parser.add_argument("--ticker", default="AAPL")
+    parser.add_argument("--start", help="first replay date (YYYY-MM-DD); default: the ticker's first day")
+    parser.add_argument("--days", type=int, default=100, help="trading days to replay")
+    parser.add_argument("--speed", type=float, default=10.0, help="trading days per second")
+    parser.add_argument("--trade-probability", type=float, default=0.1, help="chance a participant trades on a tick")
+    parser.add_argument("--workers", type=int, default=4, help="threads driving the scripted participants, like a server's session threads")
+    parser.add_argument("--data", default=universe_store.DATA_FOLDER)
+    args = parser.parse_args()
+
+    competition = create(args.ticker, args.start, args.days, args.speed, data_folder=args.data)
+    participants = [competition.join(f"player-{i}") for i in range(args.participants)]
+    rngs = [random.Random(i) for i in participants]
+    chunks = np.array_split(np.array(participants), args.workers)
+    observed, orders, ticks = [], [], []
+    missed = 0
+
+    # ONE DISPATCHER WAKES ON EACH TICK AND HANDS EVERY PARTICIPANT TO THE POOL; A TICK PUBLISHED
+    # WHILE THE POOL IS STILL ON THE LAST ONE IS MISSED BY EVERYONE
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        competition.start()
+        seq = competition.tick.seq
+        while True:
+            tick = competition.wait_for_tick(seq, timeout=5.0)
+            if tick.seq == seq:
+                break
+            missed += (tick.seq - seq - 1) * args.participants
+            ticks.append(tick)
+            seq = tick.seq
+            for future in [pool.submit(run_participants, competition, chunk.tolist(), rngs, tick, args.trade_probability, observed, orders) for chunk in chunks]:
+                future.result()
+            if tick.finished:
+                break
+    elapsed = time.perf_counter() - start
+    competition.stop()
+
+    standings = competition.standings
+    print(f"{args.participants:,} participants on {args.workers} workers, {args.ticker}, {len(ticks)} ticks in {elapsed:,.1f} s (target {args.days / args.speed:,.1f} s at {args.speed:g} days/s)")
+    print(f"{'':<28}{'latency (ms)'}")
+    print(f"{'tick + standings compute':<28}{percentiles([tick.compute_seconds for tick in ticks])}")
+    print(f"{'tick to participant':<28}{percentiles(observed)}")
+    print(f"{'order fill':<28}{percentiles(orders)}")
+    print(f"{len(orders):,} orders; {missed:,} participant-ticks missed because the workers were still on the previous tick")
+    print("Top 5:", ", ".join(f"{name} ${value:,.0f}" for _, name, value in standings.top[:5]))
+
+if __name__ == "__main__":
+    main()
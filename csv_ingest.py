@@ -0,0 +1,121 @@
+import io
+import numpy as np
+import pandas as pd
+
+REQUIRED_COLUMNS = ["Date", "Open", "High", "Low", "Close"]
+OPTIONAL_COLUMNS = ["Adj Close", "Volume"]
+CHUNK_ROWS = 200_000
+INT32_MAX = np.iinfo(np.int32).max
+
+class SchemaError(ValueError):
+    pass
+
+# HELPER FUNCTIONS
+def check_header(columns):
+    """Raise SchemaError unless every required column is present; return the columns to read."""
+    columns = [col.strip() for col in columns]
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise SchemaError(f"missing column(s): {', '.join(missing)}. Expected at least {', '.join(REQUIRED_COLUMNS)}.")
+    return [col for col in REQUIRED_COLUMNS + OPTIONAL_COLUMNS if col in columns]
+
+def source_size(source):
+    position = source.tell()
+    size = source.seek(0, io.SEEK_END)
+    source.seek(position)
+    return size
+
+class ColumnBuffer:
+    """Growable typed columns sized from an estimate of the final row count."""
+
+    def __init__(self, dtypes, capacity):
+        self.columns = {col: np.empty(capacity, dtype=dtype) for col, dtype in dtypes.items()}
+        self.size = 0
+
+    def reserve(self, rows):
+        capacity = len(self.columns["Date"])
+        if self.size + rows <= capacity:
+            return
+        # ESTIMATES ARE CLOSE, SO GROW BY A QUARTER RATHER THAN DOUBLING
+        capacity = max(self.size + rows, capacity + capacity // 4)
+        for col, values in self.columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self.columns[col] = grown
+
+    def upgrade(self, col, dtype):
+        self.columns[col] = self.columns[col].astype(dtype)
+
+    def append(self, chunk):
+        rows = len(chunk["Date"])
+        self.reserve(rows)
+        for col, values in chunk.items():
+            self.columns[col][self.size:self.size + rows] = values
+        self.size += rows
+
+    def finish(self):
+        return {col: values[:self.size] for col, values in self.columns.items()}
+
+# STREAMING READER
+def read_prices(source, chunk_rows=CHUNK_ROWS, progress=None):
+    """Parse an OHLC CSV in chunks into compact float32/int32 columns.
+
+    Volume is optional. It is stored as int32, widened to int64 past the
+    int32 range, or to float64 if any value is fractional.
+
+    The header and first chunk are validated before the rest of the file is
+    read. Rows are sorted by date only if they are not already in order.
+    progress, if given, is called with the fraction of bytes consumed.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    total_bytes = source_size(source)
+    start = source.tell()
+
+    columns = check_header(pd.read_csv(source, nrows=0).columns)
+    source.seek(start)
+    dtypes = {col: np.float32 for col in columns if col not in ("Date", "Volume")}
+    reader = pd.read_csv(source, usecols=lambda col: col.strip() in columns, dtype=dtypes | {"Volume": np.float64}, chunksize=chunk_rows)
+
+    buffer = None
+    monotonic = True
+    last_date = None
+    for chunk in reader:
+        chunk.columns = [col.strip() for col in chunk.columns]
+        dates = pd.to_datetime(chunk["Date"]).to_numpy(dtype="datetime64[ns]")
+        if np.isnat(dates).any():
+            raise SchemaError(f"unreadable Date near row {(buffer.size if buffer else 0) + int(np.argmax(np.isnat(dates))) + 2}")
+        parsed = {"Date": dates}
+        for col in dtypes:
+            parsed[col] = chunk[col].to_numpy()
+        if "Volume" in columns:
+            parsed["Volume"] = np.nan_to_num(chunk["Volume"].to_numpy(), nan=0.0)
+
+        if buffer is None:
+            # SIZE THE BUFFER FROM THE FIRST CHUNK'S BYTES PER ROW
+            consumed = max(source.tell() - start, 1)
+            estimate = int(len(dates) * (total_bytes - start) / consumed * 1.02) + 1
+            volume_dtype = {"Volume": np.int32} if "Volume" in columns else {}
+            buffer = ColumnBuffer({"Date": "datetime64[ns]"} | dtypes | volume_dtype, max(estimate, len(dates)))
+        if "Volume" in columns and buffer.columns["Volume"].dtype != np.float64 and len(parsed["Volume"]):
+            volume = parsed["Volume"]
+            # FRACTIONAL VOLUMES (SPLIT-ADJUSTED, CRYPTO) ARE KEPT AS FLOATS RATHER THAN TRUNCATED; ROWS SO FAR WERE WHOLE
+            if (volume != np.floor(volume)).any():
+                buffer.upgrade("Volume", np.float64)
+            elif buffer.columns["Volume"].dtype == np.int32 and volume.max() > INT32_MAX:
+                buffer.upgrade("Volume", np.int64)
+
+        if len(dates):
+            monotonic = monotonic and (last_date is None or dates[0] >= last_date) and bool((dates[1:] >= dates[:-1]).all())
+            last_date = dates[-1]
+        buffer.append(parsed)
+        if progress is not None:
+            progress(min((source.tell() - start) / max(total_bytes - start, 1), 1.0))
+
+    if buffer is None or buffer.size == 0:
+        raise SchemaError("the file has a header but no rows")
+    data = buffer.finish()
+    if not monotonic:
+        order = np.argsort(data["Date"], kind="stable")
+        data = {col: values[order] for col, values in data.items()}
+    return pd.DataFrame(data, copy=False)
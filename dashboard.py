@@ -1,30 +1,67 @@
+import time
 import streamlit as st
-import start_here
-import beginners_guide
-import trading_simulator
-import support_center
+import startup_timing
 
 st.set_page_config(layout="wide")
 
+if "session_started" not in st.session_state:
+    st.session_state.session_started = time.perf_counter()
+    # A RECONNECT BRINGS ITS SESSION TOKEN IN THE URL; THE TRADING SIMULATOR RESTORES IT ON FIRST USE
+    st.session_state.session_token = st.query_params.get("session")
+
+# KEEP THE TOKEN IN THE URL ON EVERY PAGE SO A REFRESH FINDS THE SAME SESSION
+if st.session_state.session_token and st.query_params.get("session") != st.session_state.session_token:
+    st.query_params["session"] = st.session_state.session_token
+
 # WRAP PAGES
+# PAGE MODULES ARE IMPORTED ON FIRST NAVIGATION, SO START HERE PAINTS WITHOUT PANDAS OR PLOTLY
+def lazy_page(module_name):
+    def page():
+        module = startup_timing.import_page(module_name)
+        start = time.perf_counter()
+        module.run()
+        startup_timing.record(module_name, "render", time.perf_counter() - start)
+    page.__name__ = module_name
+    return page
+
 pages = [
     st.Page(
-        page=lambda: start_here.run(),
+        page=lazy_page("start_here"),
         url_path="start_here",
         title="Start Here"
     ),
     st.Page(
-        page=lambda: beginners_guide.run(),
+        page=lazy_page("beginners_guide"),
         url_path="beginners_guide",
         title="Beginner's Guide"
     ),
     st.Page(
-        page=lambda: trading_simulator.run(),
+        page=lazy_page("trading_simulator"),
         url_path="trading_simulator",
         title="Trading Simulator"
     ),
     st.Page(
-        page=lambda: support_center.run(),
+        page=lazy_page("market_screener"),
+        url_path="market_screener",
+        title="Market Screener"
+    ),
+    st.Page(
+        page=lazy_page("risk_simulator"),
+        url_path="risk_simulator",
+        title="Risk Simulator"
+    ),
+    st.Page(
+        page=lazy_page("strategy_optimizer"),
+        url_path="strategy_optimizer",
+        title="Strategy Optimizer"
+    ),
+    st.Page(
+        page=lazy_page("trading_competition"),
+        url_path="trading_competition",
+        title="Trading Competition"
+    ),
+    st.Page(
+        page=lazy_page("support_center"),
         url_path="support_center",
         title="Support Center"
     ),
@@ -33,3 +70,12 @@ pages = [
 # RUN THE MULTI-PAGE APPLICATION
 pg = st.navigation(pages)
 pg.run()
+
+# TIME TO FIRST PAINT FOR THIS SESSION
+if "first_paint" not in st.session_state:
+    st.session_state.first_paint = time.perf_counter() - st.session_state.session_started
+    st.session_state.first_page = pg.url_path
+    startup_timing.record("session", "render", st.session_state.first_paint)
+# A VISITOR WHO MOVES ON TO A SECOND PAGE IS BROWSING: ONLY THEN WARM THE REST IN THE BACKGROUND
+elif pg.url_path != st.session_state.first_page:
+    startup_timing.prefetch_pages()
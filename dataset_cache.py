@@ -0,0 +1,107 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+DEFAULT_CACHE_MB = 512
+
+# HELPER FUNCTIONS
+def upload_key(content):
+    return ("upload", hashlib.sha256(content).hexdigest())
+
+def ticker_key(data_folder, filename):
+    # MTIME IS PART OF THE KEY SO AN EDITED CSV NEVER SERVES A STALE COPY
+    mtime = os.stat(os.path.join(data_folder, filename)).st_mtime_ns
+    return ("ticker", filename.replace(".csv", "").upper(), mtime)
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def freeze(df):
+    """Return a copy of df whose column arrays are marked read-only."""
+    data = {}
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if values.flags.writeable:
+            values = values.copy()
+        values.flags.writeable = False
+        data[col] = values
+    return pd.DataFrame(data, index=df.index, copy=False)
+
+# SHARED CACHE
+class DatasetCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _insert(self, key, df, size):
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (df, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def get(self, key, loader):
+        """Return a read-only view of the dataset for key, calling loader() on a miss."""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0].copy(deep=False)
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # ONE LOADER PER KEY, SO A BURST OF SESSIONS ON THE SAME TICKER PARSES IT ONCE
+        with key_lock:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry[0].copy(deep=False)
+            df = freeze(loader())
+            with self._lock:
+                self.misses += 1
+                self._insert(key, df, frame_bytes(df))
+                self._key_locks.pop(key, None)
+        return df.copy(deep=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+shared_cache = DatasetCache(int(os.environ.get("SIMULATOR_CACHE_MB", DEFAULT_CACHE_MB)) * 1024 * 1024)
@@ -0,0 +1,260 @@
+import os
+import sys
+import time
+import sqlite3
+import smtplib
+import threading
+import socketserver
+from email.mime.text import MIMEText
+
+OUTBOX_PATH = os.environ.get("SIMULATOR_OUTBOX", os.path.join("data", ".outbox.db"))
+BATCH_SIZE = 20
+MAX_PER_MINUTE = 30
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 5.0
+BACKOFF_MAX = 3600.0
+LEASE_SECONDS = 120.0
+POLL_INTERVAL = 30.0
+IDLE_TIMEOUT = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    body TEXT NOT NULL,
+    created REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    sent REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_due ON messages (sent, next_attempt);
+"""
+
+_outboxes = {}
+_outboxes_lock = threading.Lock()
+
+# HELPER FUNCTIONS
+def build_message(config, user_name, user_email, subject, message_text):
+    msg = MIMEText(
+        f"New Support Request Received!\n\n"
+        f"From: {user_name}\n"
+        f"Email: {user_email}\n\n"
+        f"Subject: {subject}\n\n"
+        f"Message:\n{message_text}"
+    )
+    msg["Subject"] = f"Interactive Trading Simulator Support Request: {subject}"
+    msg["From"] = config["address"]
+    msg["To"] = config["address"]
+    return msg
+
+def smtp_connect(config):
+    """Open and log in to the SMTP server described by config (the [email] secrets section)."""
+    host = config.get("host", "smtp.gmail.com")
+    if config.get("ssl", True):
+        server = smtplib.SMTP_SSL(host, int(config.get("port", 465)), timeout=30)
+    else:
+        server = smtplib.SMTP(host, int(config.get("port", 25)), timeout=30)
+    if config.get("password"):
+        server.login(config["address"], config["password"])
+    return server
+
+def backoff(attempts):
+    return min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+
+# OUTBOX
+class Outbox:
+    """SQLite-backed message queue drained by one background worker per process.
+
+    enqueue() only writes a row, so the caller never waits on the network.
+    The worker keeps a single SMTP connection open while there is work,
+    sends due messages in batches, spaces sends to MAX_PER_MINUTE and
+    reschedules failures with exponential backoff.
+    """
+
+    def __init__(self, config, path=OUTBOX_PATH, connect=smtp_connect):
+        self.config = dict(config)
+        self.path = path
+        self.connect = connect
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._server = None
+        self._last_used = 0.0
+        self._last_send = 0.0
+        self._worker = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._worker.start()
+
+    def enqueue(self, msg):
+        now = time.time()
+        with self._db_lock:
+            cursor = self._db.execute(
+                "INSERT INTO messages (sender, recipient, body, created, next_attempt) VALUES (?, ?, ?, ?, ?)",
+                (msg["From"], msg["To"], msg.as_string(), now, now),
+            )
+        self._wake.set()
+        return cursor.lastrowid
+
+    def stats(self):
+        with self._db_lock:
+            pending, failed, sent = self._db.execute(
+                "SELECT SUM(sent IS NULL AND attempts < ?), SUM(sent IS NULL AND attempts >= ?), SUM(sent IS NOT NULL) FROM messages",
+                (MAX_ATTEMPTS, MAX_ATTEMPTS),
+            ).fetchone()
+        return {"pending": pending or 0, "failed": failed or 0, "sent": sent or 0}
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        self._worker.join(timeout)
+
+    # WORKER
+    def _claim_batch(self):
+        # LEASE DUE ROWS SO A SECOND PROCESS ON THE SAME FILE DOESN'T SEND THEM TOO
+        now = time.time()
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._db.execute(
+                    "SELECT id, sender, recipient, body, attempts FROM messages WHERE sent IS NULL AND attempts < ? AND next_attempt <= ? ORDER BY id LIMIT ?",
+                    (MAX_ATTEMPTS, now, BATCH_SIZE),
+                ).fetchall()
+                self._db.executemany("UPDATE messages SET next_attempt = ? WHERE id = ?", [(now + LEASE_SECONDS, row[0]) for row in rows])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _next_due(self):
+        with self._db_lock:
+            (due,) = self._db.execute("SELECT MIN(next_attempt) FROM messages WHERE sent IS NULL AND attempts < ?", (MAX_ATTEMPTS,)).fetchone()
+        return due
+
+    def _finish(self, message_id, attempts, error=None):
+        with self._db_lock:
+            if error is None:
+                self._db.execute("UPDATE messages SET sent = ?, attempts = ?, last_error = NULL WHERE id = ?", (time.time(), attempts, message_id))
+            else:
+                self._db.execute("UPDATE messages SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?", (attempts, time.time() + backoff(attempts), error, message_id))
+
+    def _connection(self):
+        if self._server is not None and time.monotonic() - self._last_used > IDLE_TIMEOUT / 2:
+            # A LONG-IDLE CONNECTION MAY HAVE BEEN DROPPED BY THE SERVER
+            try:
+                self._server.noop()
+            except smtplib.SMTPException:
+                self._close()
+        if self._server is None:
+            self._server = self.connect(self.config)
+        self._last_used = time.monotonic()
+        return self._server
+
+    def _close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+    def _throttle(self):
+        wait = self._last_send + 60.0 / MAX_PER_MINUTE - time.monotonic()
+        if wait > 0:
+            self._stop.wait(wait)
+        self._last_send = time.monotonic()
+
+    def _send_batch(self, rows):
+        for position, (message_id, sender, recipient, body, attempts) in enumerate(rows):
+            if self._stop.is_set():
+                # RELEASE THE REST OF THE LEASE SO THEY GO OUT ON THE NEXT START
+                for row in rows[position:]:
+                    self._finish(row[0], row[4], "stopped before sending")
+                return
+            self._throttle()
+            try:
+                self._connection().sendmail(sender, [recipient], body)
+            except (smtplib.SMTPException, OSError) as e:
+                # CONNECTION-LEVEL FAILURES DROP THE CONNECTION; THE NEXT MESSAGE RECONNECTS
+                self._close()
+                self._finish(message_id, attempts + 1, f"{type(e).__name__}: {e}")
+            else:
+                self._finish(message_id, attempts + 1)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                rows = self._claim_batch()
+                if rows:
+                    self._send_batch(rows)
+                    continue
+                due = self._next_due()
+            except sqlite3.Error:
+                due = None
+            timeout = POLL_INTERVAL if due is None else min(max(due - time.time(), 0.05), POLL_INTERVAL)
+            if self._server is not None:
+                timeout = min(timeout, IDLE_TIMEOUT)
+            self._wake.clear()
+            if not self._wake.wait(timeout) and self._server is not None and time.monotonic() - self._last_used >= IDLE_TIMEOUT:
+                self._close()
+        self._close()
+
+def get_outbox(config, path=OUTBOX_PATH):
+    """Process-wide outbox for path, started on first use."""
+    with _outboxes_lock:
+        outbox = _outboxes.get(path)
+        if outbox is None:
+            outbox = Outbox(config, path)
+            _outboxes[path] = outbox
+        return outbox
+
+# LOCAL STAND-IN SMTP SERVER
+class _StandInHandler(socketserver.StreamRequestHandler):
+    # JUST ENOUGH SMTP FOR smtplib: EHLO/HELO, MAIL, RCPT, DATA, NOOP, RSET, QUIT
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.reply("220 stand-in SMTP ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self.reply("250 stand-in")
+            elif command.startswith("DATA"):
+                self.reply("354 end data with <CR><LF>.<CR><LF>")
+                lines = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b".\n", b""):
+                    lines.append(data.decode(errors="replace").rstrip("\r\n"))
+                self.server.received.append("\n".join(lines))
+                print(f"--- message {len(self.server.received)} ---\n" + "\n".join(lines), flush=True)
+                self.reply("250 queued")
+            elif command.startswith("QUIT"):
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    """Local SMTP sink for development; use [email] host/port with ssl = false."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=8025, host="localhost"):
+        super().__init__((host, port), _StandInHandler)
+        self.received = []
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8025
+    with StandInSMTPServer(port) as server:
+        print(f"Stand-in SMTP server listening on localhost:{port}")
+        server.serve_forever()
@@ -0,0 +1,198 @@
+import math
+import numpy as np
+
+SLIPPAGE = 0.001
+COMMISSION = 1.0
+
+# SPREAD MODELS: HALF-SPREAD PAID ON EVERY FILL, AS A FRACTION OF THE PRICE
+def fixed_spread(close, high, low, rate):
+    return np.full(np.shape(close), rate)
+
+def range_spread(close, high, low, rate):
+    # A SHARE OF THE BAR'S HIGH-LOW RANGE: WIDE ON VOLATILE DAYS, TIGHT ON QUIET ONES
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.nan_to_num(rate * (high - low) / close, nan=0.0, posinf=0.0)
+
+# IMPACT MODELS: EXTRA PRICE MOVE FROM TAKING participation = SHARES / VOLUME OF THE BAR
+def no_impact(participation, close, high, low, rate):
+    return np.zeros(np.shape(participation))
+
+def linear_impact(participation, close, high, low, rate):
+    return rate * participation
+
+def square_root_impact(participation, close, high, low, rate):
+    # rate x DAILY VOLATILITY x sqrt(PARTICIPATION), WITH THE PARKINSON HIGH/LOW ESTIMATE OF VOLATILITY
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volatility = np.nan_to_num(np.log(high / low) / math.sqrt(4 * math.log(2)), nan=0.0, posinf=0.0, neginf=0.0)
+    return rate * volatility * np.sqrt(participation)
+
+# COMMISSION SCHEDULES: DOLLARS PER FILL
+def flat_commission(shares, notional, rate):
+    return np.full(np.shape(shares), float(rate))
+
+def per_share_commission(shares, notional, rate):
+    return rate * shares
+
+def percent_commission(shares, notional, rate):
+    return rate * notional
+
+SPREAD_MODELS = {"fixed": fixed_spread, "range": range_spread}
+IMPACT_MODELS = {"none": no_impact, "linear": linear_impact, "square_root": square_root_impact}
+COMMISSION_SCHEDULES = {"flat": flat_commission, "per_share": per_share_commission, "percent": percent_commission}
+DEFAULT_RATES = {
+    "fixed": SLIPPAGE,
+    "range": 0.1,
+    "none": 0.0,
+    "linear": 0.1,
+    "square_root": 1.0,
+    "flat": COMMISSION,
+    "per_share": 0.005,
+    "percent": 0.001,
+}
+LABELS = {
+    "fixed": "Fixed",
+    "range": "Share of High-Low range",
+    "none": "None",
+    "linear": "Linear in participation",
+    "square_root": "Square root of participation",
+    "flat": "Flat per trade",
+    "per_share": "Per share",
+    "percent": "Percent of notional",
+}
+
+# EXECUTION MODEL
+class ExecutionModel:
+    """How orders fill: a spread, a market impact, a commission schedule and a participation cap.
+
+    Orders fill at the bar's close moved against the trader by the half-spread
+    plus impact. With a participation cap, a bar fills at most that fraction of
+    its Volume; the rest carries to the next bars. Every method is an array
+    kernel over one order array or a (rows x days) stack of them, so the same
+    model prices one click in the simulator and millions of orders in a sweep.
+    The defaults are the simulator's original 0.1% slippage and $1 commission.
+    """
+
+    def __init__(self, spread="fixed", spread_rate=None, impact="none", impact_rate=None,
+                 commission="flat", commission_rate=None, commission_minimum=0.0, participation=None):
+        for name, models in ((spread, SPREAD_MODELS), (impact, IMPACT_MODELS), (commission, COMMISSION_SCHEDULES)):
+            if name not in models:
+                raise ValueError(f"unknown model {name!r}; expected one of {', '.join(models)}")
+        if participation is not None and not 0 < participation <= 1:
+            raise ValueError("participation must be in (0, 1]")
+        self.spread = spread
+        self.spread_rate = DEFAULT_RATES[spread] if spread_rate is None else spread_rate
+        self.impact = impact
+        self.impact_rate = DEFAULT_RATES[impact] if impact_rate is None else impact_rate
+        self.commission = commission
+        self.commission_rate = DEFAULT_RATES[commission] if commission_rate is None else commission_rate
+        self.commission_minimum = commission_minimum
+        self.participation = participation
+
+    def __repr__(self):
+        return f"ExecutionModel({', '.join(f'{name}={value!r}' for name, value in vars(self).items())})"
+
+    def __eq__(self, other):
+        return isinstance(other, ExecutionModel) and vars(self) == vars(other)
+
+    @property
+    def needs_bars(self):
+        """Whether fills read High/Low/Volume, not just the close."""
+        return self.spread != "fixed" or self.impact != "none" or self.participation is not None
+
+    def describe(self):
+        spread = f"{self.spread_rate:.2%} slippage" if self.spread == "fixed" else f"a spread of {self.spread_rate:.0%} of the day's range"
+        if self.commission == "flat":
+            commission = f"${self.commission_rate:,.2f} commission per trade"
+        elif self.commission == "per_share":
+            commission = f"${self.commission_rate:,.4f} commission per share"
+        else:
+            commission = f"{self.commission_rate:.2%} commission"
+        if self.commission_minimum and self.commission != "flat":
+            commission += f" (min ${self.commission_minimum:,.2f})"
+        parts = [spread, commission]
+        if self.impact != "none":
+            parts.append(f"{LABELS[self.impact].lower()} impact")
+        if self.participation is not None:
+            parts.append(f"fills capped at {self.participation:.0%} of each day's volume")
+        return ", ".join(parts)
+
+    # PARTICIPATION
+    def capacity(self, volume, traded=0):
+        """Shares a bar can still fill; bars without a recorded volume (missing or 0) are not capped."""
+        volume = np.asarray(volume, dtype=np.float64)
+        if self.participation is None:
+            return np.full(volume.shape, np.inf)
+        known = volume > 0
+        cap = np.floor(self.participation * np.where(known, volume, 0.0)) - traded
+        return np.where(known, np.maximum(cap, 0.0), np.inf)
+
+    def participate(self, orders, volume=None, traded=0):
+        """Shares executed per bar under the participation cap.
+
+        What a bar can't fill keeps working on the next bars; an order the other
+        way nets against what is still working. Stretches where nothing carries
+        over are copied as placed, so only congested days are stepped through.
+        """
+        orders = np.asarray(orders, dtype=np.int64)
+        if self.participation is None or volume is None or orders.size == 0:
+            return orders
+        cap = np.broadcast_to(self.capacity(volume, traded), orders.shape[-1:])
+        rows = orders.reshape(-1, orders.shape[-1])
+        binding = np.flatnonzero((np.abs(rows) > cap).any(axis=0))
+        if len(binding) == 0:
+            return orders
+        filled = rows.copy()
+        working = np.zeros(len(rows), dtype=np.int64)
+        day = binding[0]
+        while day < rows.shape[1]:
+            working += rows[:, day]
+            filled[:, day] = np.clip(working, -cap[day], cap[day])
+            working -= filled[:, day]
+            day += 1
+            if not working.any():
+                # NOTHING CARRIED: SKIP TO THE NEXT ORDER TOO BIG FOR ITS BAR
+                following = np.searchsorted(binding, day)
+                if following == len(binding):
+                    break
+                day = binding[following]
+        return filled.reshape(orders.shape)
+
+    # COSTS
+    def costs(self, shares, close, high=None, low=None, volume=None):
+        """(execution price, commission) for signed fills (+buy / -sell) at each bar's close."""
+        shares = np.asarray(shares)
+        close = np.asarray(close, dtype=np.float64)
+        high = close if high is None else np.asarray(high, dtype=np.float64)
+        low = close if low is None else np.asarray(low, dtype=np.float64)
+        slippage = SPREAD_MODELS[self.spread](close, high, low, self.spread_rate)
+        if self.impact != "none" and volume is not None:
+            volume = np.asarray(volume, dtype=np.float64)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                participation = np.where(volume > 0, np.abs(shares) / volume, 0.0)
+            slippage = slippage + IMPACT_MODELS[self.impact](participation, close, high, low, self.impact_rate)
+        price = np.where(shares > 0, close * (1 + slippage), np.where(shares < 0, close * (1 - slippage), 0.0))
+        size = np.abs(shares)
+        commission = COMMISSION_SCHEDULES[self.commission](size, size * price, self.commission_rate)
+        if self.commission_minimum:
+            commission = np.maximum(commission, self.commission_minimum)
+        return price, commission
+
+DEFAULT_MODEL = ExecutionModel()
+
+# COMMAND-LINE OPTIONS SHARED BY THE BATCH TOOLS
+def add_arguments(parser):
+    group = parser.add_argument_group("execution costs")
+    group.add_argument("--spread", choices=sorted(SPREAD_MODELS), default="fixed")
+    group.add_argument("--spread-rate", type=float, help="fixed: fraction of the price; range: share of the High-Low range")
+    group.add_argument("--impact", choices=sorted(IMPACT_MODELS), default="none")
+    group.add_argument("--impact-rate", type=float)
+    group.add_argument("--commission", choices=sorted(COMMISSION_SCHEDULES), default="flat")
+    group.add_argument("--commission-rate", type=float, help="flat: $ per trade; per_share: $ per share; percent: fraction of notional")
+    group.add_argument("--commission-min", type=float, default=0.0)
+    group.add_argument("--participation", type=float, help="cap fills at this fraction of each day's volume, e.g. 0.1")
+
+def from_arguments(args):
+    return ExecutionModel(
+        args.spread, args.spread_rate, args.impact, args.impact_rate,
+        args.commission, args.commission_rate, args.commission_min, args.participation,
+    )
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+import universe_store
+
+HOST = "127.0.0.1"
+PORT = 8765
+BACKFILL = 250
+# A CLIENT THAT LETS THIS MUCH PILE UP UNREAD IS DISCONNECTED RATHER THAN SLOWING EVERYONE DOWN
+MAX_CLIENT_BUFFER = 8 * 1024 * 1024
+# AT HIGH SPEEDS, DAYS DUE TOGETHER GO OUT IN ONE WRITE PER CLIENT
+MIN_STEP_SECONDS = 0.01
+
+# HELPER FUNCTIONS
+def encode_bars(symbol, dates, opens, highs, lows, closes, volumes):
+    # ONE JSON LINE PER BAR, ENCODED ONCE AND REUSED FOR EVERY CLIENT; %-FORMATTING PYTHON FLOATS IS ~2.5 US A BAR
+    template = '{"type":"bar","symbol":"%s","time":"%%s","open":%%.4f,"high":%%.4f,"low":%%.4f,"close":%%.4f,"volume":%%.0f}\n' % symbol
+    times = np.datetime_as_string(dates.astype("datetime64[s]")).tolist()
+    columns = (np.asarray(values, dtype=np.float64).tolist() for values in (opens, highs, lows, closes, volumes))
+    # MISSING VALUES FORMAT AS nan, WHICH ISN'T JSON
+    return [(template % row).replace("nan", "null").encode() for row in zip(times, *columns)]
+
+# FEED SERVER
+class FeedServer:
+    """Replays the universe store as a live bar feed over TCP.
+
+    One clock walks the calendar of every trading day in data/ at `speed` days
+    per second. Each day, every connected client gets that day's bar for each
+    symbol it subscribed to, followed by a clock message stamped with the send
+    time so clients can measure their lag. The protocol is newline-delimited
+    JSON:
+
+        -> {"subscribe": ["AAPL", "MSFT"]}   ("*" for every symbol)
+        -> {"subscribe": [...], "since": "2020-01-02T00:00:00"}   (a resume: backfill only after that day)
+        -> {"unsubscribe": ["MSFT"]}
+        <- {"type": "bar", "symbol": "AAPL", "time": "2020-01-02T00:00:00", "open": ..., "volume": ...}
+        <- {"type": "clock", "time": "2020-01-02T00:00:00", "sent": 1767225600.123}
+
+    A new subscription first gets the last BACKFILL bars up to the current day,
+    or, when it resumes with since, only the days after since.
+    """
+
+    def __init__(self, data_folder=universe_store.DATA_FOLDER, start=None, speed=1.0, loop=False):
+        self.store = universe_store.open_store(data_folder)
+        self.symbols = [ticker for ticker, entry in self.store.tickers.items() if entry["length"]]
+        self.calendar = np.unique(np.asarray(self.store.dates)).view("datetime64[ns]")
+        self.day = 0 if start is None else min(int(np.searchsorted(self.calendar, np.datetime64(start, "ns"))), len(self.calendar) - 1)
+        self.speed = speed
+        self.loop = loop
+        self.clients = {}
+        self._symbols = {}
+        self.sent = 0
+        self.dropped_clients = 0
+
+    def symbol(self, ticker):
+        """(calendar day -> row, encoded lines) for one symbol, built on first subscription."""
+        cached = self._symbols.get(ticker)
+        if cached is None:
+            dates = self.store.row_dates(ticker)
+            rows = np.full(len(self.calendar), -1, dtype=np.int64)
+            rows[np.searchsorted(self.calendar, dates)] = np.arange(len(dates))
+            fields = (self.store.field(ticker, field) for field in ("Open", "High", "Low", "Close", "Volume"))
+            cached = self._symbols[ticker] = (rows, encode_bars(ticker, dates, *fields))
+        return cached
+
+    def clock_line(self, day):
+        return json.dumps({"type": "clock", "time": str(self.calendar[day].astype("datetime64[s]")), "sent": time.time()}).encode() + b"\n"
+
+    # CLIENTS
+    async def handle(self, reader, writer):
+        symbols = self.clients[writer] = set()
+        try:
+            async for line in reader:
+                try:
+                    request = json.loads(line)
+                    wanted = list(request.get("subscribe") or [])
+                    since = None if request.get("since") is None else np.datetime64(request["since"], "ns")
+                except (ValueError, TypeError, AttributeError):
+                    # NOT A REQUEST OBJECT (OR A BAD since): IGNORED
+                    continue
+                added = [ticker for ticker in (self.symbols if "*" in wanted else wanted) if ticker in self.store and ticker not in symbols]
+                # A BIG FIRST SUBSCRIPTION ("*" IS ~2 S OF ENCODING) IS ENCODED OFF THE EVENT LOOP
+                await asyncio.to_thread(lambda: [self.symbol(ticker) for ticker in added])
+                symbols.update(added)
+                symbols.difference_update(request.get("unsubscribe") or [])
+                if added:
+                    writer.write(b"".join(self.backfill(added, since)))
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    def backfill(self, tickers, since=None):
+        first = max(self.day - BACKFILL + 1, 0)
+        if since is not None:
+            first = max(first, int(np.searchsorted(self.calendar, since, side="right")))
+        for ticker in tickers:
+            rows, lines = self.symbol(ticker)
+            known = rows[first:self.day + 1]
+            yield from (lines[row] for row in known[known >= 0])
+        yield self.clock_line(self.day)
+
+    def publish(self, first, last):
+        # DAYS first..last, ONE WRITE PER CLIENT; EACH DAY ENDS WITH ITS CLOCK, SO A DROPPED CLIENT KNOWS THE LAST WHOLE DAY IT GOT
+        clocks = [self.clock_line(day) for day in range(first, last + 1)]
+        for writer, symbols in list(self.clients.items()):
+            columns = [self.symbol(ticker) for ticker in symbols]
+            chunks = []
+            for day, clock in zip(range(first, last + 1), clocks):
+                for rows, lines in columns:
+                    if rows[day] >= 0:
+                        chunks.append(lines[rows[day]])
+                chunks.append(clock)
+            writer.write(b"".join(chunks))
+            self.sent += len(chunks) - len(clocks)
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.clients.pop(writer, None)
+                writer.transport.abort()
+                self.dropped_clients += 1
+
+    # CLOCK
+    async def run_clock(self):
+        # DAYS ARE DUE BY WALL TIME FROM AN ANCHOR, SO A SLOW WRITE DOESN'T ADD UP TO DRIFT
+        anchor_day, anchor = self.day, time.monotonic()
+        while True:
+            await asyncio.sleep(max(1 / self.speed, MIN_STEP_SECONDS))
+            due = min(anchor_day + int((time.monotonic() - anchor) * self.speed), len(self.calendar) - 1)
+            if due > self.day:
+                self.publish(self.day + 1, due)
+                self.day = due
+            if self.day == len(self.calendar) - 1:
+                if not self.loop:
+                    return
+                # START OVER; CLIENTS SEE THE CLOCK GO BACK AND TREAT THE OLD DAYS AS DUPLICATES UNTIL IT PASSES THEM
+                self.day, anchor_day, anchor = 0, 0, time.monotonic()
+
+    async def serve(self, host=HOST, port=PORT, ready=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        if ready is not None:
+            ready(server)
+        async with server:
+            await self.run_clock()
+            # THE REPLAY HAS ENDED: KEEP SERVING BACKFILL AND THE FINAL CLOCK
+            await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve data/ as a live bar feed for the Trading Simulator's live paper trading mode.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--speed", type=float, default=1.0, help="trading days per second")
+    parser.add_argument("--start", help="first replay date (YYYY-MM-DD); default: the first day in the data")
+    parser.add_argument("--loop", action="store_true", help="start over after the last day")
+    parser.add_argument("--data", default=universe_store.DATA_FOLDER)
+    args = parser.parse_args()
+
+    server = FeedServer(args.data, args.start, args.speed, args.loop)
+    start = str(server.calendar[server.day].astype("datetime64[D]"))
+    ready = lambda _: print(f"Serving {len(server.symbols):,} symbols from {os.path.abspath(args.data)} on {args.host}:{args.port}, from {start} at {args.speed:g} days/s", flush=True)
+    try:
+        asyncio.run(server.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
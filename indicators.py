@@ -0,0 +1,234 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import portfolio
+
+MAX_CACHED_SERIES = 256
+
+# INDICATOR KERNELS
+# Every kernel keeps O(1) state per column and is fed one bar at a time.
+# A bar maps field name -> array of shape (width,), so the same update runs
+# for one ticker (width 1) or across the whole universe (width = tickers).
+# NaN inputs (a ticker that has not listed yet) leave that column untouched.
+
+class SMA:
+    outputs = ("SMA",)
+
+    def __init__(self, width=1, window=20):
+        self.window = window
+        self.buffer = np.zeros((window, width))
+        self.total = np.zeros(width)
+        self.count = np.zeros(width, dtype=np.int64)
+        self._cols = np.arange(width)
+
+    def update(self, bar):
+        x = bar["Close"]
+        valid = ~np.isnan(x)
+        slot = self.count % self.window
+        dropped = np.where(self.count >= self.window, self.buffer[slot, self._cols], 0.0)
+        self.total = np.where(valid, self.total + np.where(valid, x, 0.0) - dropped, self.total)
+        self.buffer[slot[valid], self._cols[valid]] = x[valid]
+        self.count += valid
+        ready = valid & (self.count >= self.window)
+        return (np.where(ready, self.total / self.window, np.nan),)
+
+class EMA:
+    outputs = ("EMA",)
+
+    def __init__(self, width=1, span=20, field="Close"):
+        self.span = span
+        self.field = field
+        self.alpha = 2 / (span + 1)
+        self.value = np.full(width, np.nan)
+        self.count = np.zeros(width, dtype=np.int64)
+
+    def step(self, x):
+        valid = ~np.isnan(x)
+        self.value = np.where(valid, np.where(self.count == 0, x, self.value + self.alpha * (x - self.value)), self.value)
+        self.count += valid
+        return valid
+
+    def update(self, bar):
+        valid = self.step(bar[self.field])
+        return (np.where(valid & (self.count >= self.span), self.value, np.nan),)
+
+class RSI:
+    outputs = ("RSI",)
+
+    def __init__(self, width=1, period=14):
+        self.period = period
+        self.prev = np.full(width, np.nan)
+        self.avg_gain = np.zeros(width)
+        self.avg_loss = np.zeros(width)
+        self.count = np.zeros(width, dtype=np.int64)
+
+    def update(self, bar):
+        x = bar["Close"]
+        change = x - self.prev
+        has_change = ~np.isnan(change)
+        gain = np.where(has_change, np.maximum(change, 0.0), 0.0)
+        loss = np.where(has_change, np.maximum(-change, 0.0), 0.0)
+
+        # SIMPLE MEAN OVER THE FIRST period CHANGES, THEN WILDER SMOOTHING
+        warming = self.count < self.period
+        p = self.period
+        self.avg_gain = np.where(has_change, np.where(warming, self.avg_gain + gain / p, (self.avg_gain * (p - 1) + gain) / p), self.avg_gain)
+        self.avg_loss = np.where(has_change, np.where(warming, self.avg_loss + loss / p, (self.avg_loss * (p - 1) + loss) / p), self.avg_loss)
+        self.count += has_change
+        self.prev = np.where(np.isnan(x), self.prev, x)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(self.avg_loss == 0, 100.0, 100 - 100 / (1 + self.avg_gain / self.avg_loss))
+        return (np.where(has_change & (self.count >= p), rsi, np.nan),)
+
+class MACD:
+    outputs = ("MACD", "Signal", "Histogram")
+
+    def __init__(self, width=1, fast=12, slow=26, signal=9):
+        self.fast = EMA(width, fast)
+        self.slow = EMA(width, slow)
+        self.signal = EMA(width, signal, field="MACD")
+
+    def update(self, bar):
+        self.fast.step(bar["Close"])
+        valid = self.slow.step(bar["Close"])
+        macd = np.where(valid & (self.slow.count >= self.slow.span), self.fast.value - self.slow.value, np.nan)
+        (signal,) = self.signal.update({"MACD": macd})
+        return macd, signal, macd - signal
+
+class Bollinger:
+    outputs = ("BB Middle", "BB Upper", "BB Lower")
+
+    def __init__(self, width=1, window=20, k=2.0):
+        self.window = window
+        self.k = k
+        self.buffer = np.zeros((window, width))
+        self.total = np.zeros(width)
+        self.total_sq = np.zeros(width)
+        self.count = np.zeros(width, dtype=np.int64)
+        self._cols = np.arange(width)
+
+    def update(self, bar):
+        x = bar["Close"]
+        valid = ~np.isnan(x)
+        slot = self.count % self.window
+        dropped = np.where(self.count >= self.window, self.buffer[slot, self._cols], 0.0)
+        x0 = np.where(valid, x, 0.0)
+        self.total = np.where(valid, self.total + x0 - dropped, self.total)
+        self.total_sq = np.where(valid, self.total_sq + x0 * x0 - dropped * dropped, self.total_sq)
+        self.buffer[slot[valid], self._cols[valid]] = x[valid]
+        self.count += valid
+
+        mean = self.total / self.window
+        std = np.sqrt(np.maximum(self.total_sq / self.window - mean * mean, 0.0))
+        ready = valid & (self.count >= self.window)
+        mean = np.where(ready, mean, np.nan)
+        return mean, mean + self.k * std, mean - self.k * std
+
+class ATR:
+    outputs = ("ATR",)
+
+    def __init__(self, width=1, period=14):
+        self.period = period
+        self.prev_close = np.full(width, np.nan)
+        self.value = np.zeros(width)
+        self.count = np.zeros(width, dtype=np.int64)
+
+    def update(self, bar):
+        high, low, close = bar["High"], bar["Low"], bar["Close"]
+        valid = ~np.isnan(close)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - self.prev_close), np.abs(low - self.prev_close)))
+        p = self.period
+        warming = self.count < p
+        self.value = np.where(valid, np.where(warming, self.value + true_range / p, (self.value * (p - 1) + true_range) / p), self.value)
+        self.count += valid
+        self.prev_close = np.where(valid, close, self.prev_close)
+        return (np.where(valid & (self.count >= p), self.value, np.nan),)
+
+INDICATORS = {
+    "SMA": SMA,
+    "EMA": EMA,
+    "RSI": RSI,
+    "MACD": MACD,
+    "Bollinger": Bollinger,
+    "ATR": ATR,
+}
+OVERLAYS = ["SMA", "EMA", "Bollinger"]
+
+# INCREMENTAL SERIES
+class IndicatorSeries:
+    """One indicator over one dataset, extended bar by bar as the replay advances."""
+
+    def __init__(self, name, data, **params):
+        self.kernel = INDICATORS[name](1, **params)
+        self.bars = {col: data[col].to_numpy(dtype=float) for col in ("High", "Low", "Close") if col in data}
+        self.rows = len(data)
+        self.values = {output: np.full(self.rows, np.nan) for output in self.kernel.outputs}
+        self.computed = 0
+        self.lock = threading.Lock()
+
+    def extend(self, data):
+        """Take in bars appended to a growing (live) dataset; rows already seen must not change."""
+        with self.lock:
+            if len(data) <= self.rows:
+                return
+            # float64 COLUMNS COME BACK AS VIEWS; THE OUTPUTS GROW BY DOUBLING, SO A POLL COPIES NOTHING MOST OF THE TIME
+            self.bars = {col: data[col].to_numpy(dtype=float) for col in self.bars}
+            self.rows = len(data)
+            capacity = len(next(iter(self.values.values())))
+            if self.rows > capacity:
+                self.values = {output: np.concatenate((values, np.full(max(self.rows, 2 * capacity) - capacity, np.nan))) for output, values in self.values.items()}
+
+    def upto(self, day):
+        """Values for rows 0..day; bars after day are never read."""
+        with self.lock:
+            for row in range(self.computed, day + 1):
+                bar = {col: values[row:row + 1] for col, values in self.bars.items()}
+                for output, value in zip(self.kernel.outputs, self.kernel.update(bar)):
+                    self.values[output][row] = value[0]
+            self.computed = max(self.computed, day + 1)
+        return {output: values[:day + 1] for output, values in self.values.items()}
+
+_series = OrderedDict()
+_series_lock = threading.Lock()
+
+def get_series(data_key, data, name, **params):
+    # SHARED ACROSS SESSIONS: KERNELS ARE CAUSAL, SO A PREFIX NEVER CHANGES ONCE COMPUTED
+    key = (data_key, name, tuple(sorted(params.items())))
+    with _series_lock:
+        series = _series.get(key)
+        if series is None:
+            series = IndicatorSeries(name, data, **params)
+            _series[key] = series
+            while len(_series) > MAX_CACHED_SERIES:
+                _series.popitem(last=False)
+        else:
+            _series.move_to_end(key)
+    if len(data) > series.rows:
+        series.extend(data)
+    return series
+
+# BULK MODE
+def run_bulk(name, fields, **params):
+    """Run an indicator over calendar x ticker matrices (e.g. PriceMatrix fields).
+
+    fields maps "High"/"Low"/"Close" to arrays of shape (days, tickers); the
+    result maps each output name to an array of the same shape.
+    """
+    close = fields["Close"]
+    kernel = INDICATORS[name](close.shape[1], **params)
+    results = {output: np.full(close.shape, np.nan) for output in kernel.outputs}
+    for day in range(close.shape[0]):
+        bar = {col: values[day] for col, values in fields.items()}
+        for output, value in zip(kernel.outputs, kernel.update(bar)):
+            results[output][day] = value
+    return results
+
+def screen_universe(name, day=None, data_folder="data", **params):
+    """Latest value of every output for every ticker in data/ as of calendar row day."""
+    market = portfolio.get_price_matrix(data_folder)
+    day = len(market.calendar) - 1 if day is None else day
+    fields = {col: market.field(col)[:day + 1] for col in ("High", "Low", "Close")}
+    results = run_bulk(name, fields, **params)
+    return pd.DataFrame({output: values[-1] for output, values in results.items()}, index=market.tickers)
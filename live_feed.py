@@ -0,0 +1,303 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import subprocess
+from collections import deque
+import numpy as np
+import pandas as pd
+import universe_store
+
+FEED_ADDRESS = os.environ.get("LIVE_FEED", "127.0.0.1:8765")
+RING_CAPACITY = 4096
+FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+KEYS = [field.lower() for field in FIELDS]
+RECONNECT_SECONDS = [0.5, 1, 2, 5]
+LAG_SAMPLES = 10_000
+CHUNK_BYTES = 256 * 1024
+
+# HELPER FUNCTIONS
+def parse_address(address):
+    host, _, port = address.strip().rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"expected host:port, got {address!r}")
+    return host, int(port)
+
+def number(value):
+    return np.nan if value is None else value
+
+# RING BUFFER
+class RingBuffer:
+    """The last `capacity` bars of one symbol, in preallocated NumPy columns.
+
+    The feed thread appends; any number of sessions read what arrived after
+    the sequence number they last saw. Bars must arrive in time order; a bar
+    at or before the newest one (a resend after a reconnect) is dropped. A
+    reader that falls more than `capacity` bars behind loses the oldest ones
+    and is told how many.
+    """
+
+    def __init__(self, capacity=RING_CAPACITY):
+        self.capacity = capacity
+        self.dates = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, len(FIELDS)))
+        self.seq = 0
+        self.duplicates = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.seq, self.capacity)
+
+    def append(self, date, values):
+        with self.lock:
+            if self.seq and date <= self.dates[(self.seq - 1) % self.capacity]:
+                self.duplicates += 1
+                return False
+            i = self.seq % self.capacity
+            self.dates[i] = date
+            self.values[i] = values
+            self.seq += 1
+        return True
+
+    def since(self, seq):
+        """(bars after seq as a DataFrame, the new seq, bars lost because they were overwritten)."""
+        with self.lock:
+            end = self.seq
+            start = max(seq, end - self.capacity)
+            rows = np.arange(start, end) % self.capacity
+            dates, values = self.dates[rows], self.values[rows]
+        bars = pd.DataFrame(values, columns=FIELDS)
+        bars.insert(0, "Date", dates.view("datetime64[ns]"))
+        return bars, end, start - seq
+
+# SESSION BARS
+class LiveBars:
+    """Every bar a live session has received, in columns that grow by doubling.
+
+    append() writes new bars after the last ones, so a poll costs the new bars
+    plus, now and then, one amortized copy. frame() is a DataFrame over the
+    filled rows that shares the columns' memory; later appends never change
+    the rows an earlier frame shows.
+    """
+
+    def __init__(self, bars):
+        self.size = 0
+        self.columns = {col: np.empty(max(len(bars), 64), dtype=bars[col].dtype) for col in ["Date"] + FIELDS}
+        self.append(bars)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, bars):
+        end = self.size + len(bars)
+        if end > len(self.columns["Date"]):
+            capacity = max(end, 2 * len(self.columns["Date"]))
+            for col, values in self.columns.items():
+                grown = np.empty(capacity, dtype=values.dtype)
+                grown[:self.size] = values[:self.size]
+                self.columns[col] = grown
+        for col, values in self.columns.items():
+            values[self.size:end] = bars[col].to_numpy()
+        self.size = end
+
+    def frame(self):
+        return pd.DataFrame({col: values[:self.size] for col, values in self.columns.items()}, copy=False)
+
+# FEED CLIENT
+class FeedClient:
+    """One connection to a bar feed, shared by every session in the process.
+
+    An asyncio loop on a daemon thread reads newline-delimited JSON bars (the
+    feed_server.py protocol) into one RingBuffer per subscribed symbol, and
+    reconnects with backoff if the feed goes away. Sessions never touch the
+    socket; they poll the rings.
+    """
+
+    def __init__(self, address, capacity=RING_CAPACITY):
+        self.address = address
+        self.host, self.port = parse_address(address)
+        self.capacity = capacity
+        self.rings = {}
+        self.connected = False
+        self.error = None
+        self.messages = 0
+        self.bars = 0
+        self.bad_messages = 0
+        self.reconnects = 0
+        self.clock = None
+        self._time = (None, None)
+        self.lags = deque(maxlen=LAG_SAMPLES)
+        self._writer = None
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self._run())
+        self._thread = threading.Thread(target=self._run_loop, name=f"feed-{address}", daemon=True)
+        self._thread.start()
+
+    def subscribe(self, *symbols):
+        """Rings for symbols, asking the feed for any not subscribed yet."""
+        with self._lock:
+            added = [symbol for symbol in symbols if symbol not in self.rings]
+            for symbol in added:
+                self.rings[symbol] = RingBuffer(self.capacity)
+            rings = [self.rings[symbol] for symbol in symbols]
+        if added:
+            self._loop.call_soon_threadsafe(self._send, {"subscribe": added})
+        return rings
+
+    def ring(self, symbol):
+        return self.subscribe(symbol)[0]
+
+    def wait_for_bars(self, symbol, timeout=2.0):
+        ring = self.ring(symbol)
+        deadline = time.monotonic() + timeout
+        while not ring.seq and time.monotonic() < deadline:
+            time.sleep(0.05)
+        return ring.seq > 0
+
+    def stats(self):
+        lags = np.array(self.lags) * 1000
+        return {
+            "connected": self.connected,
+            "error": self.error,
+            "messages": self.messages,
+            "bars": self.bars,
+            "bad_messages": self.bad_messages,
+            "reconnects": self.reconnects,
+            "clock": self.clock,
+            "lag_p50_ms": float(np.percentile(lags, 50)) if len(lags) else None,
+            "lag_p99_ms": float(np.percentile(lags, 99)) if len(lags) else None,
+        }
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(1.0)
+
+    # FEED THREAD
+    def _run_loop(self):
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+
+    def _send(self, request):
+        if self._writer is not None:
+            self._writer.write(json.dumps(request).encode() + b"\n")
+
+    def _handle(self, line):
+        message = json.loads(line)
+        self.messages += 1
+        if message["type"] == "bar":
+            ring = self.rings.get(message["symbol"])
+            if ring is not None:
+                # EVERY SYMBOL'S BAR FOR A DAY CARRIES THE SAME TIME, SO PARSE IT ONCE
+                if message["time"] != self._time[0]:
+                    self._time = (message["time"], int(np.datetime64(message["time"], "ns").astype(np.int64)))
+                ring.append(self._time[1], [number(message[field]) for field in KEYS])
+                self.bars += 1
+        elif message["type"] == "clock":
+            self.clock = message["time"]
+            self.lags.append(time.time() - message["sent"])
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                self.error = str(e)
+                await asyncio.sleep(RECONNECT_SECONDS[min(attempt, len(RECONNECT_SECONDS) - 1)])
+                attempt += 1
+                continue
+            # MESSAGES ALREADY RECEIVED MEANS THIS ISN'T THE FIRST CONNECTION
+            self.reconnects += self.messages > 0
+            attempt = 0
+            self._writer, self.connected, self.error = writer, True, None
+            # A RECONNECT RESUBSCRIBES EVERYTHING FROM THE LAST WHOLE DAY RECEIVED, SO THE FEED ONLY RESENDS WHAT WAS MISSED
+            with self._lock:
+                symbols = list(self.rings)
+            if symbols:
+                self._send({"subscribe": symbols} | ({"since": self.clock} if self.clock else {}))
+            try:
+                # WHOLE CHUNKS, SPLIT INTO LINES HERE, COST FAR LESS THAN ONE readline() PER BAR
+                pending = b""
+                while chunk := await reader.read(CHUNK_BYTES):
+                    lines = (pending + chunk).split(b"\n")
+                    pending = lines.pop()
+                    for line in lines:
+                        try:
+                            self._handle(line)
+                        except Exception as e:
+                            # ONE MALFORMED MESSAGE IS SKIPPED, NOT ALLOWED TO END THE CONNECTION
+                            self.bad_messages += 1
+                            self.error = f"bad message: {type(e).__name__}: {e}"
+                self.error = "feed closed the connection"
+            except Exception as e:
+                self.error = str(e) or type(e).__name__
+            finally:
+                self._writer, self.connected = None, False
+                writer.close()
+            await asyncio.sleep(RECONNECT_SECONDS[0])
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+def get_feed(address=FEED_ADDRESS):
+    address = address.strip()
+    with _feeds_lock:
+        feed = _feeds.get(address)
+        if feed is None:
+            feed = _feeds[address] = FeedClient(address)
+        return feed
+
+# THROUGHPUT BENCHMARK
+def main():
+    parser = argparse.ArgumentParser(description="Measure feed throughput and lag by subscribing to symbols and consuming the stream.")
+    parser.add_argument("--feed", default=FEED_ADDRESS, help="host:port of the feed")
+    parser.add_argument("--symbols", default="*", help="comma-separated symbols, or * for all")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--serve", action="store_true", help="start the bundled feed_server.py on --feed for the run")
+    parser.add_argument("--speed", type=float, default=20.0, help="days per second for --serve")
+    parser.add_argument("--start", help="first replay date for --serve")
+    args = parser.parse_args()
+
+    server = None
+    if args.serve:
+        host, port = parse_address(args.feed)
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feed_server.py")
+        command = [sys.executable, script, "--host", host, "--port", str(port), "--speed", str(args.speed)] + (["--start", args.start] if args.start else [])
+        server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        print(server.stdout.readline().strip())
+    feed = get_feed(args.feed)
+    try:
+        if args.symbols == "*":
+            # THE FEED SERVES EVERY TICKER WITH DATA; HEADER-ONLY FILES WOULD JUST BE EMPTY RINGS
+            symbols = universe_store.valid_tickers()
+        else:
+            symbols = args.symbols.split(",")
+        feed.subscribe(*symbols)
+        # MEASURE FROM THE FIRST BARS, I.E. ONCE THE FEED HAS ENCODED THE SUBSCRIPTION AND SENT ITS BACKFILL
+        deadline = time.monotonic() + 60
+        while not feed.bars and time.monotonic() < deadline:
+            time.sleep(0.05)
+        start_messages, start_bars = feed.messages, feed.bars
+        feed.lags.clear()
+        start = time.perf_counter()
+        time.sleep(args.seconds)
+        elapsed = time.perf_counter() - start
+        stats = feed.stats()
+        lags = np.array(feed.lags) * 1000
+    finally:
+        feed.stop()
+        if server is not None:
+            server.terminate()
+    print(f"{(stats['messages'] - start_messages) / elapsed:,.0f} messages/s, {(stats['bars'] - start_bars) / elapsed:,.0f} bars/s over {elapsed:.1f} s ({len(feed.rings):,} symbols, feed clock at {stats['clock']})")
+    if len(lags):
+        print(f"lag (ms): p50 {np.percentile(lags, 50):.2f}   p95 {np.percentile(lags, 95):.2f}   p99 {np.percentile(lags, 99):.2f}   max {lags.max():.2f}")
+    print(f"duplicates dropped: {sum(ring.duplicates for ring in feed.rings.values()):,}; reconnects: {stats['reconnects']:,}" + (" (the client fell behind and the feed dropped it)" if stats["reconnects"] else ""))
+
+if __name__ == "__main__":
+    main()
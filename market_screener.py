@@ -0,0 +1,89 @@
+import time
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+import portfolio
+import screener
+
+COLUMN_LABELS = {
+    "close": "Close",
+    "momentum_pct": "Momentum (%)",
+    "volatility_pct": "Volatility (%)",
+    "drawdown_pct": "Drawdown (%)",
+    "max_drawdown_pct": "Max Drawdown (%)",
+    "volume_surge": "Volume Surge (x)",
+}
+# LOW VOLATILITY AND SHALLOW DRAWDOWNS RANK FIRST; EVERYTHING ELSE HIGHER FIRST
+ASCENDING = {"volatility_pct", "drawdown_pct", "max_drawdown_pct"}
+
+# HELPER FUNCTIONS
+def screen_date(market):
+    """The Trading Simulator's replay date if a stock is loaded, otherwise the last day in the data."""
+    data = st.session_state.get("data")
+    if data is not None:
+        return pd.Timestamp(data["Date"].iloc[st.session_state.current_day]), True
+    return pd.Timestamp(market.calendar[-1]), False
+
+def new_correlation_heatmap(correlation):
+    fig = go.Figure(go.Heatmap(
+        z=correlation.to_numpy(),
+        x=correlation.columns,
+        y=correlation.index,
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu_r",
+        hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>",
+    ))
+    fig.update_yaxes(autorange="reversed")
+    fig.update_layout(height=max(400, 14 * len(correlation)), margin=dict(l=20, r=20, t=20, b=20))
+    return fig
+
+# MARKET SCREENER
+def run():
+    st.title("🔭 Market Screener")
+    st.markdown("Rank every stock in the database by momentum, volatility, drawdown, volume surge and beta, as of the simulator's current date.")
+
+    market = portfolio.get_market()
+    if market is None:
+        st.error("❌ No stock data found in data/.")
+        return
+    date, replaying = screen_date(market)
+    day = market.day_index(date)
+    st.caption(f"As of {date:%Y-%m-%d}" + (f" (replay date of {st.session_state.stock_name})" if replaying else " (last day in the data; load a stock in the Trading Simulator to follow its replay date)"))
+
+    benchmarks = [benchmark for benchmark in screener.BENCHMARKS if benchmark in market.columns]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        lookback = st.selectbox("Lookback (trading days)", screener.LOOKBACKS, index=1, key="screen_lookback")
+    with col2:
+        benchmark = st.selectbox("Beta vs.", benchmarks, key="screen_benchmark") if benchmarks else None
+    labels = COLUMN_LABELS | ({f"beta_{benchmark}": f"Beta vs {benchmark}"} if benchmark else {})
+    with col3:
+        rank_by = st.selectbox("Rank by", list(labels)[1:], format_func=labels.get, key="screen_rank")
+    with col4:
+        top = st.number_input("Rows", min_value=10, max_value=len(market.tickers), value=50, step=10, key="screen_top")
+
+    start = time.perf_counter()
+    stats, correlation = screener.screen(day, lookback)
+    elapsed = time.perf_counter() - start
+
+    table = stats[list(labels)].rename(columns=labels)
+    table = table.sort_values(labels[rank_by], ascending=rank_by in ASCENDING, na_position="last")
+    st.subheader("🏁 Rankings")
+    st.dataframe(table.head(top).round(2), use_container_width=True)
+    st.caption(f"{len(stats):,} stocks with at least {screener.MIN_COVERAGE:.0%} of the {lookback} days, screened in {elapsed * 1000:,.0f} ms.")
+    st.download_button("Download Screen", table.to_csv().encode("utf-8"), file_name=f"screen_{date:%Y%m%d}_{lookback}d.csv", mime="text/csv", on_click="ignore")
+
+    st.subheader("🧩 Correlation")
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        count = st.slider("Top ranked stocks", 5, 100, 30, key="screen_corr_count")
+    with col2:
+        extra = st.multiselect("Add stocks", list(stats.index), key="screen_corr_tickers")
+    tickers = list(dict.fromkeys(list(table.index[:count]) + extra))
+    st.plotly_chart(new_correlation_heatmap(correlation.loc[tickers, tickers]), use_container_width=True)
+    pairs = correlation.loc[tickers, tickers].to_numpy()
+    upper = pairs[np.triu_indices(len(tickers), k=1)]
+    if len(upper):
+        st.caption(f"Average pairwise correlation of these {len(tickers)} stocks over {lookback} days: {np.nanmean(upper):.2f}")
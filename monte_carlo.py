@@ -0,0 +1,105 @@
+import numpy as np
+
+PATH_CHOICES = [10_000, 50_000, 100_000, 250_000, 500_000]
+# (PATHS x DAYS x HOLDINGS) CELLS PER CHUNK; KEEPS A FEW FLOAT32 WORKING ARRAYS AROUND 10 MB EACH
+CELL_BUDGET = 2_500_000
+# PER-DAY EQUITY HISTOGRAMS FOR THE FAN CHART: LOG-SPACED BINS FROM 1% TO 10x OF THE STARTING EQUITY
+FAN_BINS = 2048
+FAN_RANGE = (0.01, 10.0)
+FAN_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+# SAMPLING
+def sample_days(rng, history, paths, horizon, block=1):
+    """(paths x horizon) indices into the return history.
+
+    block=1 is the plain i.i.d. bootstrap; longer blocks resample runs of
+    consecutive days (moving-block bootstrap) to keep short-term autocorrelation
+    and volatility clustering.
+    """
+    block = max(min(block, history), 1)
+    if block == 1:
+        return rng.integers(0, history, size=(paths, horizon), dtype=np.int32)
+    starts = rng.integers(0, history - block + 1, size=(paths, -(-horizon // block), 1), dtype=np.int32)
+    return (starts + np.arange(block, dtype=np.int32)).reshape(paths, -1)[:, :horizon]
+
+# FAN HISTOGRAMS
+def fan_edges(start_equity):
+    low, high = FAN_RANGE
+    return start_equity * np.geomspace(low, high, FAN_BINS - 1)
+
+def fan_bins(equity, start_equity):
+    # np.searchsorted(fan_edges(start_equity), equity) UP TO ROUNDING AT A BIN EDGE, ~5x FASTER
+    low, high = FAN_RANGE
+    step = (np.log(high) - np.log(low)) / (FAN_BINS - 2)
+    position = (np.log(np.maximum(equity, np.float32(1e-30))) - np.float32(np.log(start_equity * low))) / np.float32(step)
+    return np.clip(np.ceil(position), 0, FAN_BINS - 1).astype(np.int64)
+
+def fan_quantiles(counts, edges, quantiles=FAN_QUANTILES):
+    """Per-day quantiles from (days x bins) counts, interpolated on a log scale inside a bin."""
+    cumulative = np.cumsum(counts, axis=1)
+    total = cumulative[:, -1:]
+    log_edges = np.log(np.concatenate(([edges[0] / 2], edges, [edges[-1] * 2])))
+    out = np.empty((len(quantiles), counts.shape[0]))
+    for i, q in enumerate(quantiles):
+        target = q * total
+        bins = np.minimum((cumulative < target).sum(axis=1), counts.shape[1] - 1)
+        rows = np.arange(counts.shape[0])
+        below = np.where(bins > 0, cumulative[rows, bins - 1], 0)
+        fraction = (target[:, 0] - below) / np.maximum(counts[rows, bins], 1)
+        out[i] = np.exp(log_edges[bins] + (log_edges[bins + 1] - log_edges[bins]) * fraction)
+    return out
+
+# SIMULATION
+def simulate(returns, values, cash, horizon, paths=100_000, block=1, ruin_fraction=0.5, seed=0):
+    """Bootstrap forward equity paths for fixed share holdings plus cash.
+
+    returns is a (days x holdings) array of historical daily returns sampled a
+    whole day at a time, so holdings keep their co-movement. values are the
+    holdings' current market values. Paths are generated in chunks that fit
+    CELL_BUDGET; only final equity, each path's running minimum and per-day
+    fan histograms are kept, so memory does not grow with the path count.
+    """
+    returns = np.asarray(returns, dtype=np.float32).reshape(len(returns), -1)
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+    start_equity = float(cash + values.sum())
+    rng = np.random.default_rng(seed)
+    edges = fan_edges(start_equity)
+    counts = np.zeros((horizon, FAN_BINS), dtype=np.int64)
+    final = np.empty(paths)
+    lowest = np.empty(paths)
+    offsets = (np.arange(horizon) * FAN_BINS)[None, :]
+
+    chunk = max(CELL_BUDGET // (horizon * returns.shape[1]), 1)
+    for start in range(0, paths, chunk):
+        size = min(chunk, paths - start)
+        days = sample_days(rng, len(returns), size, horizon, block)
+        growth = np.cumprod(1 + returns[days], axis=1)
+        equity = cash + growth @ values.astype(np.float32)
+        final[start:start + size] = equity[:, -1]
+        lowest[start:start + size] = equity.min(axis=1)
+        bins = fan_bins(equity, start_equity) + offsets
+        counts += np.bincount(bins.ravel(), minlength=horizon * FAN_BINS).reshape(horizon, FAN_BINS)
+
+    return {
+        "start_equity": start_equity,
+        "final": final,
+        "ruined": lowest <= start_equity * ruin_fraction,
+        "fan": fan_quantiles(counts, edges),
+    }
+
+# RISK STATISTICS
+def risk_summary(result, confidence=0.95):
+    """VaR and CVaR are losses (positive numbers) at the given confidence over the whole horizon."""
+    start = result["start_equity"]
+    pnl = result["final"] - start
+    cutoff = np.quantile(pnl, 1 - confidence)
+    tail = pnl[pnl <= cutoff]
+    return {
+        "expected": float(result["final"].mean()),
+        "median": float(np.median(result["final"])),
+        "var": max(-float(cutoff), 0.0),
+        "cvar": max(-float(tail.mean()), 0.0) if len(tail) else 0.0,
+        "loss_probability": float((pnl < 0).mean()),
+        "ruin_probability": float(result["ruined"].mean()),
+        "paths": len(pnl),
+    }
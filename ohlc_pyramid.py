@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+MAX_CANDLES = 400
+BUCKET_SIZES = [1, 5, 21, 63, 252]
+MAX_PYRAMIDS = 64
+
+_pyramids = OrderedDict()
+_pyramid_lock = threading.Lock()
+
+# HELPER FUNCTIONS
+def bucket_sizes(rows):
+    # ROUGHLY DAY / WEEK / MONTH / QUARTER / YEAR FOR DAILY DATA, THEN x4 FOR LONG INTRADAY FILES
+    sizes = list(BUCKET_SIZES)
+    while -(-rows // sizes[-1]) > MAX_CANDLES:
+        sizes.append(sizes[-1] * 4)
+    return sizes
+
+def aggregate(bars, size):
+    if size == 1:
+        return bars
+    starts = np.arange(0, len(bars["Date"]), size)
+    ends = np.minimum(starts + size, len(bars["Date"])) - 1
+    return {
+        "Date": bars["Date"][starts],
+        "Open": bars["Open"][starts],
+        "High": np.fmax.reduceat(bars["High"], starts),
+        "Low": np.fmin.reduceat(bars["Low"], starts),
+        "Close": bars["Close"][ends],
+    }
+
+# OHLC PYRAMID
+class OHLCPyramid:
+    """Precomputed N-bar OHLC aggregation levels for one dataset.
+
+    A live dataset grows under one pyramid: extend() recomputes only the
+    buckets the new rows fall in, into level arrays that grow by doubling.
+    """
+
+    def __init__(self, data):
+        self.rows = 0
+        self.bars = {}
+        self.levels = {}
+        self.lock = threading.Lock()
+        self.extend(data)
+
+    def extend(self, data):
+        with self.lock:
+            bars = {col: data[col].to_numpy() for col in ("Date", "Open", "High", "Low", "Close")}
+            rows = len(data)
+            if not rows:
+                self.bars, self.levels = bars, {1: bars}
+                return
+            for size in bucket_sizes(rows):
+                level = self.levels.get(size) if size > 1 and self.rows else None
+                if level is None:
+                    self.levels[size] = aggregate(bars, size)
+                    continue
+                # THE OLD LAST BUCKET MAY HAVE BEEN PARTIAL, SO START FROM IT
+                first, count = self.rows // size, -(-rows // size)
+                tail = aggregate({col: values[first * size:] for col, values in bars.items()}, size)
+                if count > len(level["Date"]):
+                    level = {col: np.concatenate((values[:first], np.empty(2 * count - first, dtype=values.dtype))) for col, values in level.items()}
+                for col, values in level.items():
+                    values[first:count] = tail[col]
+                self.levels[size] = level
+            self.bars, self.rows = bars, rows
+
+    def bucket_size(self, start, end):
+        window = end - start + 1
+        for size in self.levels:
+            if -(-window // size) <= MAX_CANDLES:
+                return size
+        return max(self.levels)
+
+    def window(self, start, end):
+        """Candles covering rows start..end, never reading a bar after end."""
+        with self.lock:
+            return self._window(start, end)
+
+    def _window(self, start, end):
+        size = self.bucket_size(start, end)
+        level = self.levels[size]
+        first, last = start // size, end // size
+        candles = {col: values[first:last + 1] for col, values in level.items()}
+        if size > 1:
+            # THE LAST BUCKET IS ONLY PARTLY IN THE PAST, SO REBUILD IT UP TO end
+            rows = slice(last * size, end + 1)
+            candles = {col: values.copy() for col, values in candles.items()}
+            candles["High"][-1] = np.nanmax(self.bars["High"][rows])
+            candles["Low"][-1] = np.nanmin(self.bars["Low"][rows])
+            candles["Close"][-1] = self.bars["Close"][end]
+        return size, candles
+
+def get_pyramid(key, data):
+    with _pyramid_lock:
+        pyramid = _pyramids.get(key)
+        if pyramid is not None:
+            _pyramids.move_to_end(key)
+    if pyramid is None:
+        pyramid = OHLCPyramid(data)
+        with _pyramid_lock:
+            _pyramids[key] = pyramid
+            while len(_pyramids) > MAX_PYRAMIDS:
+                _pyramids.popitem(last=False)
+    elif len(data) > pyramid.rows:
+        # A LIVE DATASET GROWS UNDER ONE KEY
+        pyramid.extend(data)
+    return pyramid
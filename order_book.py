@@ -0,0 +1,198 @@
+import heapq
+import itertools
+
+ORDER_KINDS = ["Limit", "Stop"]
+TIME_IN_FORCE = ["GTC", "Day"]
+# PROCESS-WIDE, SO TWO BOOKS WITH THE SAME VERSION ALWAYS HOLD THE SAME ORDERS (A COPY KEEPS ITS SOURCE'S)
+_versions = itertools.count(1)
+
+# RESTING ORDER BOOK
+class OrderBook:
+    """Open limit/stop orders kept in price-ordered heaps.
+
+    Each heap is keyed so that its top is the order that triggers first:
+    buy limits by highest price, sell limits by lowest, buy stops by lowest
+    stop and sell stops by highest. "Market" orders are the unfilled rest of a
+    market order capped by the day's volume; they trigger on every bar, oldest
+    first, at the close. Cancelled and filled orders are removed lazily when
+    they reach the top of a heap. `version` changes on every change to the
+    open orders, so callers can tell whether a book moved without reading it.
+    """
+
+    def __init__(self):
+        self.orders = {}
+        self._heaps = {
+            ("BUY", "Market"): [],
+            ("SELL", "Market"): [],
+            ("BUY", "Limit"): [],
+            ("SELL", "Limit"): [],
+            ("BUY", "Stop"): [],
+            ("SELL", "Stop"): [],
+        }
+        self._expiries = []
+        self._next_id = 1
+        self._stale = 0
+        self.version = 0
+
+    def __len__(self):
+        return len(self.orders)
+
+    @property
+    def next_id(self):
+        return self._next_id
+
+    @classmethod
+    def from_orders(cls, orders, next_id):
+        """Book holding saved open orders, keeping their ids."""
+        book = cls()
+        for order in sorted(orders, key=lambda order: order["id"]):
+            book.restore_order(order)
+        book._next_id = next_id
+        return book
+
+    def restore_order(self, order):
+        """Put a copy of a recorded order back under its own id."""
+        order = dict(order)
+        self.orders[order["id"]] = order
+        heapq.heappush(self._heaps[(order["action"], order["kind"])], (self._heap_key(order["action"], order["kind"], order["price"]), order["id"]))
+        if order["expires_day"] is not None:
+            heapq.heappush(self._expiries, (order["expires_day"], order["id"]))
+        self._next_id = max(self._next_id, order["id"] + 1)
+        self.version = next(_versions)
+        return order
+
+    @staticmethod
+    def _heap_key(action, kind, price):
+        # BUY LIMITS AND SELL STOPS TRIGGER FROM THE TOP OF THE PRICE RANGE DOWN; MARKET ORDERS BY ID ALONE
+        if kind == "Market":
+            return 0.0
+        if (action, kind) in (("BUY", "Limit"), ("SELL", "Stop")):
+            return -price
+        return price
+
+    @staticmethod
+    def triggers(order, high, low):
+        action, kind, price = order["action"], order["kind"], order["price"]
+        if kind == "Market":
+            return True
+        if kind == "Limit":
+            return low <= price if action == "BUY" else high >= price
+        return high >= price if action == "BUY" else low <= price
+
+    @staticmethod
+    def fill_price(order, open_price):
+        # A BAR THAT GAPS THROUGH THE ORDER PRICE FILLS AT THE OPEN
+        action, kind, price = order["action"], order["kind"], order["price"]
+        if (action, kind) in (("BUY", "Limit"), ("SELL", "Stop")):
+            return min(price, open_price)
+        return max(price, open_price)
+
+    def place(self, action, kind, shares, price, day, tif="GTC"):
+        order = {
+            "id": self._next_id,
+            "action": action,
+            "kind": kind,
+            "shares": shares,
+            "price": price,
+            "tif": tif,
+            "placed_day": day,
+            # DAY ORDERS PLACED AT THE CLOSE LIVE THROUGH THE NEXT BAR ONLY
+            "expires_day": day + 1 if tif == "Day" else None,
+        }
+        self._next_id += 1
+        self.version = next(_versions)
+        self.orders[order["id"]] = order
+        heapq.heappush(self._heaps[(action, kind)], (self._heap_key(action, kind, price), order["id"]))
+        if order["expires_day"] is not None:
+            heapq.heappush(self._expiries, (order["expires_day"], order["id"]))
+        return order
+
+    def requeue(self, order, shares, day):
+        """Put a partly filled order back with its remaining shares; False if it expires today."""
+        if order["expires_day"] is not None and order["expires_day"] <= day:
+            return False
+        order = {key: value for key, value in order.items() if key != "fill_price"} | {"shares": shares}
+        self.version = next(_versions)
+        self.orders[order["id"]] = order
+        heapq.heappush(self._heaps[(order["action"], order["kind"])], (self._heap_key(order["action"], order["kind"], order["price"]), order["id"]))
+        if order["expires_day"] is not None:
+            heapq.heappush(self._expiries, (order["expires_day"], order["id"]))
+        return True
+
+    def copy(self):
+        """Independent copy (orders, heaps and id counter) for time-travel checkpoints.
+
+        Booked orders are never changed in place (a fill or requeue makes a new
+        dict), so the copy shares the order dicts and only copies the containers.
+        """
+        book = OrderBook.__new__(OrderBook)
+        book.orders = dict(self.orders)
+        book._heaps = {key: list(heap) for key, heap in self._heaps.items()}
+        book._expiries = list(self._expiries)
+        book._next_id = self._next_id
+        book._stale = self._stale
+        book.version = self.version
+        return book
+
+    def cancel(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is not None:
+            self.version = next(_versions)
+            self._stale += 1 if order["expires_day"] is None else 2
+            self._compact()
+        return order
+
+    def _compact(self):
+        # REBUILD ONCE DEAD ENTRIES OUTNUMBER LIVE ONES SO HEAPS STAY O(LIVE ORDERS)
+        if self._stale <= len(self.orders) + 64:
+            return
+        for heap in self._heaps.values():
+            heap[:] = [entry for entry in heap if entry[1] in self.orders]
+            heapq.heapify(heap)
+        self._expiries = [entry for entry in self._expiries if entry[1] in self.orders]
+        heapq.heapify(self._expiries)
+        self._stale = 0
+
+    def _pop_triggered(self, heap, high, low):
+        triggered = []
+        while heap:
+            order = self.orders.get(heap[0][1])
+            if order is None:
+                heapq.heappop(heap)
+                self._stale = max(0, self._stale - 1)
+                continue
+            if not self.triggers(order, high, low):
+                break
+            heapq.heappop(heap)
+            if order["expires_day"] is not None:
+                self._stale += 1
+            triggered.append(self.orders.pop(order["id"]))
+        return triggered
+
+    def match_day(self, day, open_price, high, low, close):
+        """Pop every order that the day's High/Low range triggers, then expire day orders.
+
+        Returns (triggered, expired); each triggered order carries its fill price.
+        Sells are returned before buys so freed cash is available to buys.
+        """
+        triggered = []
+        for key in (("SELL", "Market"), ("SELL", "Limit"), ("SELL", "Stop"), ("BUY", "Market"), ("BUY", "Limit"), ("BUY", "Stop")):
+            for order in self._pop_triggered(self._heaps[key], high, low):
+                triggered.append(dict(order, fill_price=close if order["kind"] == "Market" else self.fill_price(order, open_price)))
+
+        expired = []
+        while self._expiries and self._expiries[0][0] <= day:
+            _, order_id = heapq.heappop(self._expiries)
+            order = self.orders.pop(order_id, None)
+            if order is None:
+                self._stale = max(0, self._stale - 1)
+            else:
+                expired.append(order)
+                self._stale += 1
+        if triggered or expired:
+            self.version = next(_versions)
+        self._compact()
+        return triggered, expired
+
+    def open_orders(self):
+        return sorted(self.orders.values(), key=lambda order: order["id"])
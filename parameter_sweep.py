@@ -0,0 +1,181 @@
+import os
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import universe_store
+import backtest_engine
+import performance
+import execution_model
+
+PARAM_COLUMNS = ["fast", "slow", "stop_loss", "shares"]
+DEFAULT_GRID = {
+    "fast": list(range(5, 55, 5)),
+    "slow": list(range(20, 220, 20)),
+    "stop_loss": [0.0, 0.05, 0.10],
+    "shares": [10, 100],
+}
+RANK_METRICS = ["mean_sharpe", "mean_return_pct", "median_return_pct", "win_rate_pct", "mean_max_drawdown_pct"]
+# (COMBOS x DAYS) CELLS PER CHUNK; ~15 WORKING ARRAYS OF THIS SIZE ARE LIVE AT ONCE
+CELL_BUDGET = 1_000_000
+TICKERS_PER_TASK = 4
+
+# PARAMETER GRID
+def make_grid(fast, slow, stop_loss=(0.0,), shares=(10,)):
+    """Every combination of the given values as a DataFrame, keeping only fast < slow."""
+    combos = [combo for combo in itertools.product(sorted(set(fast)), sorted(set(slow)), sorted(set(stop_loss)), sorted(set(shares))) if combo[0] < combo[1]]
+    grid = pd.DataFrame(combos, columns=PARAM_COLUMNS)
+    return grid.astype({"fast": np.int64, "slow": np.int64, "stop_loss": np.float64, "shares": np.int64})
+
+def moving_averages(close, windows):
+    """Simple moving averages for every window at once from one cumulative sum, one row per window."""
+    sums = np.cumsum(np.concatenate(([0.0], close)))
+    ends = np.arange(1, len(close) + 1)
+    starts = ends[None, :] - windows[:, None]
+    means = (sums[ends][None, :] - sums[np.maximum(starts, 0)]) / windows[:, None]
+    means[starts < 0] = np.nan
+    return means
+
+# SWEEP ONE TICKER
+def sweep_close(close, grid, model=execution_model.DEFAULT_MODEL, **bars):
+    """Backtest every grid row against one close series; returns per-combo metric arrays.
+
+    Signals, fills and equity are (combos x days) arrays, processed in chunks of
+    rows. Fills go through the execution model and backtest_engine's ledger
+    pass; rows where a cash or position check bites are re-run through
+    run_backtest so the result matches a single backtest exactly. bars are the
+    High/Low/Volume arrays the model reads, if any.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    combos = len(grid["fast"])
+    windows, window_index = np.unique(np.concatenate((grid["fast"], grid["slow"])), return_inverse=True)
+    averages = moving_averages(close, windows)
+    fast_index, slow_index = window_index[:combos], window_index[combos:]
+
+    out = {name: np.zeros(combos) for name in ("return_pct", "max_drawdown_pct", "sharpe", "sortino", "trades", "rejected")}
+    chunk = max(CELL_BUDGET // max(len(close), 1), 1)
+    for start in range(0, combos, chunk):
+        rows = slice(start, min(start + chunk, combos))
+        target = backtest_engine.cross_targets(
+            averages[fast_index[rows]], averages[slow_index[rows]], close,
+            grid["shares"][rows, None], grid["stop_loss"][rows, None],
+        )
+        orders = np.diff(target, axis=1, prepend=0)
+        executed = model.participate(orders, bars.get("volume"))
+        _, _, _, cash, position, rejected = backtest_engine._ledger_pass(close, executed, backtest_engine.STARTING_CASH, 0, model, bars)
+        filled = executed != 0
+        for row in np.flatnonzero(rejected.any(axis=1)):
+            result = backtest_engine.run_backtest(close, orders[row], model=model, **bars)
+            cash[row], position[row], filled[row] = result["cash"], result["position"], result["filled"]
+        equity = cash + position * close
+        metrics = performance.compute_row_metrics(equity)
+        out["return_pct"][rows] = (equity[:, -1] - backtest_engine.STARTING_CASH) / backtest_engine.STARTING_CASH * 100
+        out["max_drawdown_pct"][rows] = metrics["max_drawdown"] * 100
+        out["sharpe"][rows] = metrics["sharpe"]
+        out["sortino"][rows] = metrics["sortino"]
+        out["trades"][rows] = filled.sum(axis=1)
+        out["rejected"][rows] = (executed != 0).sum(axis=1) - out["trades"][rows]
+    return out
+
+def sweep_tickers(tickers, grid, data_folder=universe_store.DATA_FOLDER, model=execution_model.DEFAULT_MODEL):
+    """Worker task: sweep a few tickers and return their per-combo metrics (float32 to keep the pickle small)."""
+    store = universe_store.open_store(data_folder)
+    results = {}
+    for ticker in tickers:
+        close = store.field(ticker, "Close")
+        if len(close) < 2:
+            continue
+        bars = backtest_engine.ticker_fields(store, ticker, model)
+        results[ticker] = {name: values.astype(np.float32) for name, values in sweep_close(close, grid, model, **bars).items()}
+    return results
+
+# SWEEP THE UNIVERSE
+def summarize(grid, per_ticker):
+    """Rank table: one row per combo with cross-ticker averages; best combo per ticker."""
+    tickers = sorted(per_ticker)
+    stacked = {name: np.stack([per_ticker[t][name] for t in tickers]).astype(np.float64) for name in per_ticker[tickers[0]]}
+    table = grid.copy()
+    table["tickers"] = len(tickers)
+    table["mean_return_pct"] = stacked["return_pct"].mean(axis=0)
+    table["median_return_pct"] = np.median(stacked["return_pct"], axis=0)
+    table["worst_return_pct"] = stacked["return_pct"].min(axis=0)
+    table["win_rate_pct"] = (stacked["return_pct"] > 0).mean(axis=0) * 100
+    table["mean_sharpe"] = stacked["sharpe"].mean(axis=0)
+    table["mean_sortino"] = stacked["sortino"].mean(axis=0)
+    table["mean_max_drawdown_pct"] = stacked["max_drawdown_pct"].mean(axis=0)
+    table["trades"] = stacked["trades"].sum(axis=0).astype(np.int64)
+    table["rejected"] = stacked["rejected"].sum(axis=0).astype(np.int64)
+
+    best = stacked["sharpe"].argmax(axis=1)
+    best_by_ticker = grid.iloc[best].reset_index(drop=True)
+    best_by_ticker.insert(0, "ticker", tickers)
+    best_by_ticker["return_pct"] = stacked["return_pct"][np.arange(len(tickers)), best]
+    best_by_ticker["sharpe"] = stacked["sharpe"][np.arange(len(tickers)), best]
+    return table, best_by_ticker
+
+def rank(table, metric="mean_sharpe"):
+    # DRAWDOWN RANKS ASCENDING; EVERYTHING ELSE HIGHER IS BETTER
+    ascending = metric == "mean_max_drawdown_pct"
+    return table.sort_values(metric, ascending=ascending, kind="stable").reset_index(drop=True)
+
+def sweep_universe(grid, tickers=None, data_folder=universe_store.DATA_FOLDER, workers=None, progress=None, model=execution_model.DEFAULT_MODEL):
+    """Sweep grid over tickers (default: every valid ticker) across a process pool.
+
+    progress, if given, is called with the fraction of tickers finished.
+    Returns (ranked table, best combo per ticker).
+    """
+    store = universe_store.open_store(data_folder)
+    if tickers is None:
+        catalog = store.catalog()
+        tickers = list(catalog.index[catalog["valid"]])
+    arrays = {col: grid[col].to_numpy() for col in PARAM_COLUMNS}
+    batches = [tickers[i:i + TICKERS_PER_TASK] for i in range(0, len(tickers), TICKERS_PER_TASK)]
+
+    per_ticker = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(sweep_tickers, batch, arrays, data_folder, model) for batch in batches]
+        for done, future in enumerate(as_completed(futures), 1):
+            per_ticker.update(future.result())
+            if progress is not None:
+                progress(done / len(futures))
+    if not per_ticker:
+        raise ValueError("none of the tickers has enough data to backtest")
+    table, best_by_ticker = summarize(grid, per_ticker)
+    return rank(table), best_by_ticker
+
+def parse_values(text, cast):
+    """'5:50:5' -> range(5, 50, 5) (end exclusive); '0,0.05,0.1' -> a list."""
+    if ":" in text:
+        start, stop, step = (cast(part) for part in text.split(":"))
+        return list(np.arange(start, stop, step).astype(type(start)))
+    return [cast(part) for part in text.split(",") if part.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Grid-search SMA-crossover parameters across every ticker in data/.")
+    parser.add_argument("--fast", default="5:55:5", help="fast windows, start:stop:step or a comma list")
+    parser.add_argument("--slow", default="20:220:20", help="slow windows, start:stop:step or a comma list")
+    parser.add_argument("--stop-loss", default="0,0.05,0.1", help="stop-loss fractions (0 = none)")
+    parser.add_argument("--shares", default="10,100", help="position sizes in shares")
+    parser.add_argument("--tickers", help="comma list of tickers (default: every valid ticker)")
+    parser.add_argument("--rank", choices=RANK_METRICS, default="mean_sharpe")
+    parser.add_argument("--data", default=universe_store.DATA_FOLDER)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--out", help="optional CSV path for the full ranked table")
+    execution_model.add_arguments(parser)
+    args = parser.parse_args()
+
+    grid = make_grid(parse_values(args.fast, int), parse_values(args.slow, int), parse_values(args.stop_loss, float), parse_values(args.shares, int))
+    tickers = args.tickers.upper().split(",") if args.tickers else None
+    start = time.perf_counter()
+    table, _ = sweep_universe(grid, tickers, args.data, args.workers, model=execution_model.from_arguments(args))
+    table = rank(table, args.rank)
+    print(f"{len(grid):,} combinations x {table['tickers'].iloc[0]} tickers in {time.perf_counter() - start:,.1f} s")
+    if args.out:
+        table.to_csv(args.out, index=False)
+    print(table.head(args.top).to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+
+if __name__ == "__main__":
+    main()
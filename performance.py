@@ -0,0 +1,249 @@
+import math
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+# METRICS FROM ARRAYS (BULK MODE)
+def compute_metrics(equity, exposure=None, traded=None):
+    """Every performance metric from a whole equity curve in one vectorized pass."""
+    equity = np.asarray(equity, dtype=float)
+    if len(equity) == 0:
+        return empty_metrics()
+    returns = equity[1:] / equity[:-1] - 1 if len(equity) > 1 else np.zeros(0)
+    peaks = np.maximum.accumulate(equity)
+    drawdowns = 1 - equity / peaks
+    exposure = np.zeros(len(equity)) if exposure is None else np.asarray(exposure, dtype=float)
+    traded = np.zeros(len(equity)) if traded is None else np.asarray(traded, dtype=float)
+    return finish_metrics(
+        days=len(equity),
+        start=equity[0],
+        end=equity[-1],
+        max_drawdown=float(drawdowns.max()),
+        drawdown=float(drawdowns[-1]),
+        n=len(returns),
+        mean=float(returns.mean()) if len(returns) else 0.0,
+        var=float(returns.var(ddof=1)) if len(returns) > 1 else 0.0,
+        downside_sq=float(np.square(np.minimum(returns, 0.0)).sum()),
+        exposure_sum=float(exposure.sum()),
+        traded_sum=float(traded.sum()),
+        equity_sum=float(equity.sum()),
+    )
+
+def compute_row_metrics(equity):
+    """Return, drawdown, Sharpe and Sortino for each row of a (curves x days) equity array."""
+    equity = np.asarray(equity, dtype=float)
+    rows, days = equity.shape
+    zeros = np.zeros(rows)
+    if days < 2:
+        return {"total_return": zeros, "max_drawdown": zeros, "sharpe": zeros, "sortino": zeros}
+    returns = equity[:, 1:] / equity[:, :-1] - 1
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1, ddof=1) if days > 2 else zeros
+    downside = np.sqrt(np.square(np.minimum(returns, 0.0)).sum(axis=1) / (days - 1))
+    return {
+        "total_return": equity[:, -1] / equity[:, 0] - 1,
+        "max_drawdown": (1 - equity / np.maximum.accumulate(equity, axis=1)).max(axis=1),
+        "sharpe": np.divide(mean, std, out=zeros.copy(), where=std > 0) * math.sqrt(TRADING_DAYS),
+        "sortino": np.divide(mean, downside, out=zeros.copy(), where=downside > 0) * math.sqrt(TRADING_DAYS),
+    }
+
+def empty_metrics():
+    return {"days": 0, "total_return": 0.0, "max_drawdown": 0.0, "drawdown": 0.0, "volatility": 0.0, "sharpe": 0.0, "sortino": 0.0, "exposure": 0.0, "turnover": 0.0}
+
+def finish_metrics(days, start, end, max_drawdown, drawdown, n, mean, var, downside_sq, exposure_sum, traded_sum, equity_sum):
+    std = math.sqrt(var) if var > 0 else 0.0
+    downside = math.sqrt(downside_sq / n) if n else 0.0
+    return {
+        "days": days,
+        "total_return": end / start - 1 if start else 0.0,
+        "max_drawdown": max_drawdown,
+        "drawdown": drawdown,
+        "volatility": std * math.sqrt(TRADING_DAYS),
+        "sharpe": mean / std * math.sqrt(TRADING_DAYS) if std else 0.0,
+        "sortino": mean / downside * math.sqrt(TRADING_DAYS) if downside else 0.0,
+        "exposure": exposure_sum / days,
+        # TRADED NOTIONAL OVER AVERAGE EQUITY, ANNUALIZED
+        "turnover": traded_sum / (equity_sum / days) * TRADING_DAYS / days if equity_sum else 0.0,
+    }
+
+# INCREMENTAL TRACKER
+class PerformanceTracker:
+    """Running equity curve whose metrics update in O(1) per replay day.
+
+    Returns use Welford's running mean/variance. mark() on a date that is
+    already the last point replaces it, so intraday trades on the current
+    day only ever count once.
+    """
+
+    def __init__(self, capacity=256):
+        self.dates = np.empty(capacity, dtype="datetime64[ns]")
+        self.equity = np.empty(capacity)
+        self.exposure = np.empty(capacity)
+        self.traded = np.empty(capacity)
+        self.size = 0
+        # FIRST POINT CHANGED SINCE THE SESSION WAS LAST PERSISTED
+        self.dirty_from = 0
+        self._state = self._initial_state()
+        self._previous_state = None
+
+    @staticmethod
+    def _initial_state():
+        return {"peak": 0.0, "max_drawdown": 0.0, "drawdown": 0.0, "n": 0, "mean": 0.0, "m2": 0.0, "downside_sq": 0.0, "exposure_sum": 0.0, "traded_sum": 0.0, "equity_sum": 0.0}
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        for name in ("dates", "equity", "exposure", "traded"):
+            values = getattr(self, name)
+            grown = np.empty(len(values) * 2, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            setattr(self, name, grown)
+
+    def _apply(self, state, equity, exposure, traded, previous_equity):
+        state = dict(state)
+        state["peak"] = max(state["peak"], equity)
+        state["drawdown"] = 1 - equity / state["peak"] if state["peak"] else 0.0
+        state["max_drawdown"] = max(state["max_drawdown"], state["drawdown"])
+        if previous_equity is not None:
+            r = equity / previous_equity - 1
+            state["n"] += 1
+            delta = r - state["mean"]
+            state["mean"] += delta / state["n"]
+            state["m2"] += delta * (r - state["mean"])
+            state["downside_sq"] += min(r, 0.0) ** 2
+        state["exposure_sum"] += exposure
+        state["traded_sum"] += traded
+        state["equity_sum"] += equity
+        return state
+
+    def mark(self, date, equity, exposure=0.0, traded=0.0):
+        date = np.datetime64(date, "ns")
+        if self.size and self.dates[self.size - 1] == date:
+            # SAME DAY: UNDO THE LAST POINT AND RE-APPLY IT WITH THE NEW VALUES
+            traded += self.traded[self.size - 1]
+            self.size -= 1
+            self.dirty_from = min(self.dirty_from, self.size)
+            self._state = self._previous_state
+        elif self.size and self.dates[self.size - 1] > date:
+            self.truncate(date)
+            return self.mark(date, equity, exposure, traded)
+        if self.size == len(self.dates):
+            self._grow()
+        previous_equity = self.equity[self.size - 1] if self.size else None
+        self._previous_state = self._state
+        self._state = self._apply(self._state, equity, exposure, traded, previous_equity)
+        self.dates[self.size] = date
+        self.equity[self.size] = equity
+        self.exposure[self.size] = exposure
+        self.traded[self.size] = traded
+        self.size += 1
+
+    def truncate(self, date):
+        """Drop points after date and rebuild the running state with one bulk pass."""
+        self.size = int(np.searchsorted(self.dates[:self.size], np.datetime64(date, "ns"), side="right"))
+        self.dirty_from = min(self.dirty_from, self.size)
+        self._state = self._initial_state()
+        self._previous_state = None
+        if self.size:
+            # BULK STATE UP TO THE LAST POINT, THEN APPLY IT SO mark() CAN STILL UNDO IT
+            last = self.size - 1
+            self._previous_state = self._bulk_state(last)
+            self._state = self._apply(self._previous_state, self.equity[last], self.exposure[last], self.traded[last], self.equity[last - 1] if last else None)
+
+    @classmethod
+    def from_points(cls, dates, equity, exposure, traded):
+        """Tracker over saved points, with the running state rebuilt in one bulk pass."""
+        tracker = cls(max(len(dates), 256))
+        size = len(dates)
+        tracker.dates[:size] = np.asarray(dates, dtype="datetime64[ns]")
+        tracker.equity[:size] = equity
+        tracker.exposure[:size] = exposure
+        tracker.traded[:size] = traded
+        tracker.size = size
+        if size:
+            tracker.truncate(tracker.dates[size - 1])
+        tracker.dirty_from = size
+        return tracker
+
+    def _bulk_state(self, size):
+        equity = self.equity[:size]
+        if size == 0:
+            return self._initial_state()
+        returns = equity[1:] / equity[:-1] - 1
+        peaks = np.maximum.accumulate(equity)
+        drawdowns = 1 - equity / peaks
+        mean = float(returns.mean()) if len(returns) else 0.0
+        return {
+            "peak": float(peaks[-1]),
+            "max_drawdown": float(drawdowns.max()),
+            "drawdown": float(drawdowns[-1]),
+            "n": len(returns),
+            "mean": mean,
+            "m2": float(np.square(returns - mean).sum()),
+            "downside_sq": float(np.square(np.minimum(returns, 0.0)).sum()),
+            "exposure_sum": float(self.exposure[:size].sum()),
+            "traded_sum": float(self.traded[:size].sum()),
+            "equity_sum": float(equity.sum()),
+        }
+
+    def metrics(self):
+        if not self.size:
+            return empty_metrics()
+        state = self._state
+        return finish_metrics(
+            days=self.size,
+            start=self.equity[0],
+            end=self.equity[self.size - 1],
+            max_drawdown=state["max_drawdown"],
+            drawdown=state["drawdown"],
+            n=state["n"],
+            mean=state["mean"],
+            var=state["m2"] / (state["n"] - 1) if state["n"] > 1 else 0.0,
+            downside_sq=state["downside_sq"],
+            exposure_sum=state["exposure_sum"],
+            traded_sum=state["traded_sum"],
+            equity_sum=state["equity_sum"],
+        )
+
+    def curve(self):
+        equity = self.equity[:self.size]
+        return pd.DataFrame({
+            "date": self.dates[:self.size],
+            "equity": equity,
+            "drawdown": 1 - equity / np.maximum.accumulate(equity) if self.size else equity,
+            "exposure": self.exposure[:self.size],
+            "traded": self.traded[:self.size],
+        })
+
+# LEDGER REPLAY (BULK MODE)
+def curve_from_ledger(ledger, market, start_cash, first_row, last_row):
+    """Rebuild the daily equity, exposure and traded notional from a trade ledger in one pass.
+
+    Holdings are valued with the market's valuation matrix, so trades in
+    uploaded datasets that are not part of the universe are left out.
+    """
+    rows = np.arange(first_row, last_row + 1)
+    days = len(rows)
+    trade_rows = np.searchsorted(market.calendar, ledger.column("date"), side="right") - 1 - first_row
+    ticker_cols = np.array([market.columns.get(ticker, -1) for ticker in ledger.tickers], dtype=np.int64)[ledger.column("ticker")] if len(ledger) else np.zeros(0, dtype=np.int64)
+    keep = (trade_rows >= 0) & (trade_rows < days) & (ticker_cols >= 0)
+    trade_rows, ticker_cols = trade_rows[keep], ticker_cols[keep]
+    side = ledger.column("side")[keep]
+    shares = ledger.column("shares")[keep]
+    totals = ledger.column("total")[keep]
+    notional = shares * ledger.column("price")[keep]
+
+    cash = start_cash + np.cumsum(np.bincount(trade_rows, weights=np.where(side > 0, -totals, totals), minlength=days))
+    holdings = np.zeros((days, len(market.tickers)))
+    np.add.at(holdings, (trade_rows, ticker_cols), side * shares)
+    np.cumsum(holdings, axis=0, out=holdings)
+    invested = np.einsum("ij,ij->i", holdings, market.valuation[rows])
+    equity = cash + invested
+    return pd.DataFrame({
+        "date": market.calendar[rows],
+        "equity": equity,
+        "exposure": np.abs(invested) / equity,
+        "traded": np.bincount(trade_rows, weights=notional, minlength=days),
+    })
@@ -0,0 +1,112 @@
+import threading
+import numpy as np
+import universe_store
+
+_matrices = {}
+_matrix_lock = threading.Lock()
+
+# PRICE MATRIX
+class PriceMatrix:
+    """Calendar x ticker price arrays for the whole universe store.
+
+    Raw fields hold NaN on days a ticker has no bar (before listing, after
+    delisting). The valuation matrix forward-fills closes and uses 0 before
+    listing, so a portfolio is valued with a single dot product per day.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.calendar = np.asarray(store.calendar)
+        self.tickers = sorted(store.tickers)
+        self.columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+
+        # ONE ROW -> (CALENDAR POSITION, TICKER COLUMN) MAP FOR THE WHOLE STORE
+        self._row_days = np.empty(max(store.index["total_rows"], 1), dtype=np.int64)
+        self._row_tickers = np.empty_like(self._row_days)
+        for ticker in self.tickers:
+            rows = store.row_slice(ticker)
+            self._row_days[rows] = np.searchsorted(self.calendar, store.row_dates(ticker))
+            self._row_tickers[rows] = self.columns[ticker]
+        self._fields = {}
+        self.valuation = self._forward_fill(self.field("Close"))
+
+    def field(self, name):
+        matrix = self._fields.get(name)
+        if matrix is None:
+            matrix = np.full((len(self.calendar), len(self.tickers)), np.nan)
+            rows = slice(0, self.store.index["total_rows"])
+            matrix[self._row_days[rows], self._row_tickers[rows]] = self.store.columns[universe_store.FIELDS.index(name), rows]
+            self._fields[name] = matrix
+        return matrix
+
+    @staticmethod
+    def _forward_fill(matrix):
+        last_seen = np.where(np.isnan(matrix), 0, np.arange(len(matrix))[:, None])
+        np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+        filled = matrix[last_seen, np.arange(matrix.shape[1])]
+        return np.nan_to_num(filled, nan=0.0)
+
+    def day_index(self, date):
+        # LAST CALENDAR DAY ON OR BEFORE date
+        return max(int(np.searchsorted(self.calendar, np.datetime64(date, "ns"), side="right")) - 1, 0)
+
+def get_price_matrix(data_folder=universe_store.DATA_FOLDER):
+    store = universe_store.open_store(data_folder)
+    with _matrix_lock:
+        matrix = _matrices.get(store.build_id)
+        if matrix is None:
+            _matrices.clear()
+            matrix = PriceMatrix(store)
+            _matrices[store.build_id] = matrix
+    return matrix
+
+def get_market(data_folder=universe_store.DATA_FOLDER):
+    """The price matrix for data_folder, or None if the store can't be opened or built."""
+    try:
+        return get_price_matrix(data_folder)
+    except (OSError, ValueError):
+        return None
+
+# PORTFOLIO
+class Portfolio:
+    """Share holdings across many tickers, aligned to a PriceMatrix's columns.
+
+    Uploaded datasets are not in the universe, so they are tracked separately
+    and valued at the last price seen for them.
+    """
+
+    def __init__(self, tickers):
+        self.columns = {ticker: i for i, ticker in enumerate(tickers)}
+        self.tickers = list(tickers)
+        self.holdings = np.zeros(len(tickers), dtype=np.int64)
+        self.custom = {}
+
+    def position(self, ticker):
+        column = self.columns.get(ticker)
+        if column is not None:
+            return int(self.holdings[column])
+        return self.custom.get(ticker, (0, 0.0))[0]
+
+    def set_position(self, ticker, shares, price):
+        column = self.columns.get(ticker)
+        if column is not None:
+            self.holdings[column] = shares
+        else:
+            self.custom[ticker] = (shares, float(price))
+
+    def mark_custom(self, ticker, price):
+        if ticker in self.custom:
+            # FLOAT64 EVEN FOR FLOAT32 UPLOADS, SO VALUATION SUMS DON'T LOSE CENTS
+            self.custom[ticker] = (self.custom[ticker][0], float(price))
+
+    def market_value(self, prices):
+        value = float(self.holdings @ prices)
+        for shares, price in self.custom.values():
+            value += shares * price
+        return value
+
+    def positions(self, prices):
+        held = np.flatnonzero(self.holdings)
+        rows = [(self.tickers[i], int(self.holdings[i]), float(prices[i])) for i in held]
+        rows += [(ticker, shares, price) for ticker, (shares, price) in self.custom.items() if shares]
+        return rows
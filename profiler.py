@@ -0,0 +1,192 @@
+import os
+import time
+import functools
+import threading
+import numpy as np
+
+# BUCKET UPPER BOUNDS IN SECONDS: 50 MICROSECONDS TO ~30 SECONDS, FOUR PER DOUBLING
+BUCKETS = 0.00005 * 2 ** (np.arange(77) / 4)
+EXPORT_INTERVAL = 15.0
+
+# PROCESS-WIDE SWITCH, ENVIRONMENT ONLY; ?profile=1 TURNS PROFILING ON FOR ONE SESSION (enable_session)
+enabled = os.environ.get("SIMULATOR_PROFILE", "") not in ("", "0")
+# STREAMLIT SESSION IDS PROFILED THROUGH ?profile=1; A SET LOOKUP KEEPS THE OFF PATH UNDER A MICROSECOND
+_sessions = set()
+
+# HISTOGRAM
+class Histogram:
+    """Fixed log-spaced bucket counts; percentiles are interpolated within a bucket."""
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = np.zeros(len(BUCKETS) + 1, dtype=np.int64)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[np.searchsorted(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        cumulative = np.cumsum(self.counts)
+        target = q / 100 * self.count
+        bucket = int(np.searchsorted(cumulative, target))
+        if bucket >= len(BUCKETS):
+            return float(BUCKETS[-1])
+        lower = BUCKETS[bucket - 1] if bucket else 0.0
+        below = cumulative[bucket - 1] if bucket else 0
+        fraction = (target - below) / max(self.counts[bucket], 1)
+        return float(lower + (BUCKETS[bucket] - lower) * fraction)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+        }
+
+_process = {}
+_process_lock = threading.Lock()
+
+# SPANS
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def active():
+    """True if profiling is on for the whole process or for the current session."""
+    return enabled or (bool(_sessions) and session_id() in _sessions)
+
+def span(name):
+    """Time a block as `with profiler.span("chart"):`; a shared no-op when profiling is off."""
+    return _Span(name) if active() else _NO_SPAN
+
+def timed(name):
+    """Decorator form of span(); checks whether profiling is on at every call."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not active():
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def record(name, seconds):
+    # PROCESS-WIDE HISTOGRAMS ONLY FILL WHILE THE PROCESS SWITCH IS ON; ONE PROFILED SESSION KEEPS ITS TIMINGS TO ITSELF
+    if enabled:
+        with _process_lock:
+            histogram = _process.get(name)
+            if histogram is None:
+                histogram = _process[name] = Histogram()
+            histogram.observe(seconds)
+    session = session_histograms()
+    if session is not None:
+        histogram = session.get(name)
+        if histogram is None:
+            histogram = session[name] = Histogram()
+        histogram.observe(seconds)
+
+def session_histograms():
+    # NONE OUTSIDE A STREAMLIT SCRIPT RUN (E.G. BATCH BACKTESTS, BACKGROUND THREADS)
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.setdefault("profiler_spans", {})
+
+def session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+def enable_session():
+    """Profile the current Streamlit session only."""
+    session = session_id()
+    if session is not None:
+        _sessions.add(session)
+
+def reset_session():
+    import streamlit as st
+    st.session_state.profiler_spans = {}
+
+def summaries(histograms):
+    return {name: histogram.summary() for name, histogram in sorted(histograms.items())}
+
+def process_summaries():
+    with _process_lock:
+        return summaries(_process)
+
+def reset():
+    with _process_lock:
+        _process.clear()
+
+# PROMETHEUS EXPORT
+def prometheus_text(prefix="simulator_span_seconds"):
+    lines = [f"# HELP {prefix} Time spent in Trading Simulator rerun stages.", f"# TYPE {prefix} histogram"]
+    with _process_lock:
+        snapshot = {name: (histogram.counts.copy(), histogram.total, histogram.count) for name, histogram in sorted(_process.items())}
+    for name, (counts, total, count) in snapshot.items():
+        cumulative = np.cumsum(counts)
+        for bound, value in zip(BUCKETS, cumulative):
+            lines.append(f'{prefix}_bucket{{span="{name}",le="{bound:.6g}"}} {value}')
+        lines.append(f'{prefix}_bucket{{span="{name}",le="+Inf"}} {count}')
+        lines.append(f'{prefix}_sum{{span="{name}"}} {total:.9f}')
+        lines.append(f'{prefix}_count{{span="{name}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    # WRITE-THEN-RENAME SO A SCRAPER NEVER READS A HALF-WRITTEN FILE
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as fh:
+        fh.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def start_exporter(path=None, interval=EXPORT_INTERVAL):
+    """Rewrite path (default $SIMULATOR_PROFILE_FILE) every interval seconds for a textfile collector."""
+    global _exporter
+    path = path or os.environ.get("SIMULATOR_PROFILE_FILE")
+    with _exporter_lock:
+        if not path or _exporter is not None:
+            return
+        _exporter = True
+    def work():
+        while True:
+            time.sleep(interval)
+            try:
+                write_prometheus(path)
+            except OSError:
+                pass
+    _exporter = threading.Thread(target=work, name="profiler-export", daemon=True)
+    _exporter.start()
@@ -0,0 +1,141 @@
+import time
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+import portfolio
+import monte_carlo
+
+HORIZONS = {"1 week": 5, "1 month": 21, "3 months": 63, "6 months": 126, "1 year": 252}
+LOOKBACKS = {"All history": None, "Last 5 years": 1260, "Last 2 years": 504, "Last year": 252}
+
+# HELPER FUNCTIONS
+def price_history(ticker, market, date):
+    """Closes up to date for a held ticker, or None if its history isn't available."""
+    if ticker == st.session_state.stock_name:
+        data = st.session_state.data.iloc[:st.session_state.current_day + 1]
+        return pd.Series(data["Close"].to_numpy(dtype=float), index=data["Date"].to_numpy())
+    if market is not None and ticker in market.columns:
+        rows = slice(0, market.day_index(date) + 1)
+        closes = pd.Series(market.field("Close")[rows, market.columns[ticker]], index=market.calendar[rows])
+        return closes.dropna()
+    return None
+
+def scenario_inputs(scenario, lookback):
+    """(returns matrix, holding values, cash, tickers, tickers without history) for the chosen scenario."""
+    data = st.session_state.data
+    date = data["Date"].iloc[st.session_state.current_day]
+    market = portfolio.get_market()
+    prices = market.valuation[market.day_index(date)] if market is not None else np.zeros(0)
+    cash = float(st.session_state.cash)
+    positions = [(ticker, shares * price) for ticker, shares, price in st.session_state.portfolio.positions(prices)]
+    if scenario != "Current portfolio":
+        # HYPOTHETICAL: THE WHOLE ACCOUNT IN THE LOADED STOCK
+        positions, cash = [(st.session_state.stock_name, cash + sum(value for _, value in positions))], 0.0
+
+    histories, missing = {}, []
+    for ticker, value in positions:
+        history = price_history(ticker, market, date)
+        if history is None or len(history) < 2:
+            # NO HISTORY (E.G. AN UPLOAD THAT ISN'T LOADED): HOLD IT AT ITS CURRENT VALUE
+            missing.append(ticker)
+            cash += value
+        else:
+            histories[ticker] = history
+    values = np.array([value for ticker, value in positions if ticker in histories])
+    if not histories:
+        return np.zeros((0, 0)), values, cash, [], missing
+    closes = pd.DataFrame(histories).dropna()
+    if lookback:
+        closes = closes.iloc[-(lookback + 1):]
+    returns = closes.pct_change().iloc[1:]
+    return returns.to_numpy(), values, cash, list(histories), missing
+
+def new_fan_chart(result, ruin_level):
+    fan = np.concatenate((np.full((len(result["fan"]), 1), result["start_equity"]), result["fan"]), axis=1)
+    days = np.arange(fan.shape[1])
+    fig = go.Figure()
+    for low, high, opacity, label in ((0, 4, 0.15, "5–95%"), (1, 3, 0.3, "25–75%")):
+        fig.add_trace(go.Scatter(x=days, y=fan[high], mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=days, y=fan[low], mode="lines", line=dict(width=0), fill="tonexty", fillcolor=f"rgba(0, 0, 255, {opacity})", name=label, hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=days, y=fan[2], mode="lines", line=dict(color="blue"), name="Median"))
+    fig.add_hline(y=ruin_level, line_dash="dash", line_color="red", annotation_text="Ruin level")
+    fig.update_xaxes(title_text="Trading days ahead")
+    fig.update_yaxes(title_text="Equity ($)")
+    fig.update_layout(hovermode="x unified", height=400, margin=dict(l=20, r=20, t=20, b=20))
+    return fig
+
+def new_outcome_histogram(result, summary, confidence):
+    # BIN SERVER-SIDE SO THE BROWSER GETS 100 BARS, NOT EVERY PATH
+    counts, edges = np.histogram(result["final"], bins=100)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts / counts.sum(), marker_color="steelblue", hovertemplate="$%{x:,.0f}: %{y:.2%}<extra></extra>"))
+    fig.add_vline(x=result["start_equity"] - summary["var"], line_dash="dash", line_color="red", annotation_text=f"VaR {confidence:.0%}")
+    fig.update_xaxes(title_text="Equity at horizon ($)")
+    fig.update_yaxes(title_text="Share of paths", tickformat=".0%")
+    fig.update_layout(bargap=0, height=300, showlegend=False, margin=dict(l=20, r=20, t=20, b=20))
+    return fig
+
+def render_results(result, settings):
+    summary = monte_carlo.risk_summary(result, settings["confidence"])
+    start = result["start_equity"]
+    col1, col2, col3, col4, col5, col6 = st.columns(6)
+    col1.metric("Starting Equity", f"${start:,.2f}")
+    col2.metric("Expected Equity", f"${summary['expected']:,.2f}", f"{summary['expected'] / start - 1:+.2%}")
+    col3.metric(f"VaR {settings['confidence']:.0%}", f"${summary['var']:,.2f}", help="Loss at the horizon that only the worst tail of paths exceeds.")
+    col4.metric(f"CVaR {settings['confidence']:.0%}", f"${summary['cvar']:,.2f}", help="Average loss across the paths beyond the VaR.")
+    col5.metric("Chance of Loss", f"{summary['loss_probability']:.1%}")
+    col6.metric("Chance of Ruin", f"{summary['ruin_probability']:.2%}", help=f"Paths that touch {settings['ruin']:.0%} of the starting equity at any point.")
+    st.plotly_chart(new_fan_chart(result, start * settings["ruin"]), use_container_width=True)
+    st.plotly_chart(new_outcome_histogram(result, summary, settings["confidence"]), use_container_width=True)
+    st.caption(
+        f"{', '.join(settings['tickers'])} as of {settings['date']:%Y-%m-%d}: {summary['paths']:,} paths × {settings['horizon']} days "
+        f"from {settings['history']:,} days of history in {result['elapsed']:.2f} s."
+    )
+
+# RISK SIMULATOR
+def run():
+    st.title("🎲 Risk Simulator")
+    st.markdown("""
+    See how your Trading Simulator portfolio could move from here. Daily returns up to the current replay day are
+    resampled (bootstrapped) into many possible futures, with your shares held and your cash unchanged.
+    """)
+
+    if st.session_state.get("data") is None:
+        st.info("Load a stock in the Trading Simulator first; this page uses its portfolio and replay date.")
+        return
+
+    date = pd.Timestamp(st.session_state.data["Date"].iloc[st.session_state.current_day])
+    st.caption(f"As of {date:%Y-%m-%d}, replaying {st.session_state.stock_name}")
+
+    with st.form("risk_form"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            scenario = st.radio("Portfolio", ["Current portfolio", f"All in {st.session_state.stock_name}"], key="risk_scenario")
+            horizon = st.select_slider("Horizon", list(HORIZONS), value="3 months", key="risk_horizon")
+        with col2:
+            method = st.radio("Resampling", ["Bootstrap", "Block bootstrap"], key="risk_method", help="Block bootstrap draws runs of consecutive days, keeping calm and volatile stretches together.")
+            block = st.number_input("Block length (days)", min_value=2, max_value=63, value=5, key="risk_block")
+            lookback = st.selectbox("History", list(LOOKBACKS), key="risk_lookback")
+        with col3:
+            paths = st.select_slider("Paths", monte_carlo.PATH_CHOICES, value=100_000, format_func=lambda n: f"{n:,}", key="risk_paths")
+            confidence = st.select_slider("Confidence", [0.9, 0.95, 0.99], value=0.95, format_func=lambda c: f"{c:.0%}", key="risk_confidence")
+            ruin = st.slider("Ruin level (% of equity)", 10, 90, 50, step=5, key="risk_ruin") / 100
+            seed = st.number_input("Random seed", min_value=0, value=0, key="risk_seed")
+        submitted = st.form_submit_button("🎲 Simulate", use_container_width=True)
+
+    if submitted:
+        returns, values, cash, tickers, missing = scenario_inputs(scenario, LOOKBACKS[lookback])
+        if missing:
+            st.warning(f"No price history for {', '.join(missing)}; held at its current value.")
+        if len(values) == 0 or len(returns) < 2:
+            st.session_state.pop("risk_result", None)
+            st.info("Nothing to simulate: the portfolio is all cash. Try the \"All in\" scenario.")
+        else:
+            start = time.perf_counter()
+            result = monte_carlo.simulate(returns, values, cash, HORIZONS[horizon], paths, block if method == "Block bootstrap" else 1, ruin, seed)
+            result["elapsed"] = time.perf_counter() - start
+            settings = {"confidence": confidence, "ruin": ruin, "horizon": HORIZONS[horizon], "history": len(returns), "tickers": tickers, "date": date}
+            st.session_state.risk_result = (result, settings)
+
+    if "risk_result" in st.session_state:
+        render_results(*st.session_state.risk_result)
@@ -0,0 +1,173 @@
+import math
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import portfolio
+
+LOOKBACKS = [21, 63, 126, 252]
+BENCHMARKS = ["SPY", "^GSPC"]
+SURGE_DAYS = 5
+# A TICKER NEEDS RETURNS ON THIS SHARE OF THE WINDOW'S DAYS TO BE SCREENED
+MIN_COVERAGE = 0.8
+# INCREMENTAL UPDATES ADD AND SUBTRACT THE SAME ROWS; REBUILD AFTER THIS MANY WINDOWS' WORTH TO SHED DRIFT
+REBUILD_AFTER = 20
+MAX_CACHED_SCREENS = 32
+
+# ALIGNED RETURNS
+class ReturnMatrix:
+    """Calendar x ticker daily returns for the whole universe, built once per store build.
+
+    Row r is the return from calendar day r - 1 to r; NaN where either close is
+    missing. Zero-filled copies and validity masks feed the window sums.
+    """
+
+    def __init__(self, market):
+        self.market = market
+        self.tickers = market.tickers
+        close = market.field("Close")
+        returns = np.full(close.shape, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns[1:] = close[1:] / close[:-1] - 1
+        returns[~np.isfinite(returns)] = np.nan
+        self.valid = ~np.isnan(returns)
+        self.filled = np.where(self.valid, returns, 0.0)
+        volume = market.field("Volume")
+        self.volume_valid = ~np.isnan(volume)
+        self.volume = np.where(self.volume_valid, volume, 0.0)
+
+# ROLLING WINDOW SUMS
+class RollingWindow:
+    """Pairwise-complete sums over a window of return rows, moved by adding and removing rows.
+
+    For tickers i, j over the days where both have a return: n[i, j] counts them,
+    sx[i, j] sums i's returns, sxx[i, j] sums i's squared returns and sxy[i, j]
+    sums the products. Moving the window by k days is a rank-k update of each,
+    instead of recomputing over the whole lookback.
+    """
+
+    def __init__(self, matrix, lookback):
+        self.matrix = matrix
+        self.lookback = lookback
+        self.start = self.end = 0
+        self.since_rebuild = 0
+        width = len(matrix.tickers)
+        self.n, self.sx, self.sxx, self.sxy = (np.zeros((width, width)) for _ in range(4))
+        self.volume_sum = np.zeros(width)
+        self.volume_count = np.zeros(width)
+
+    def _apply(self, start, end, sign):
+        if end <= start:
+            return
+        mask = self.matrix.valid[start:end].astype(np.float64)
+        values = self.matrix.filled[start:end]
+        self.n += sign * (mask.T @ mask)
+        self.sx += sign * (values.T @ mask)
+        self.sxx += sign * (np.square(values).T @ mask)
+        self.sxy += sign * (values.T @ values)
+        self.volume_sum += sign * self.matrix.volume[start:end].sum(axis=0)
+        self.volume_count += sign * self.matrix.volume_valid[start:end].sum(axis=0)
+        self.since_rebuild += end - start
+
+    def move_to(self, end):
+        """Cover return rows [end - lookback, end)."""
+        start = max(end - self.lookback, 0)
+        if (start, end) == (self.start, self.end):
+            return
+        if end - self.end >= self.lookback or self.end - end >= self.lookback or self.since_rebuild > REBUILD_AFTER * self.lookback:
+            for total in (self.n, self.sx, self.sxx, self.sxy, self.volume_sum, self.volume_count):
+                total[...] = 0.0
+            self.since_rebuild = 0
+            self._apply(start, end, 1)
+        else:
+            # ROWS THAT LEFT THE WINDOW ON EITHER SIDE COME OFF, ROWS THAT ENTERED GO ON
+            self._apply(self.start, min(start, self.end), -1)
+            self._apply(max(end, self.start), self.end, -1)
+            self._apply(start, min(self.start, end), 1)
+            self._apply(max(self.end, start), end, 1)
+        self.start, self.end = start, end
+
+    def covariance(self):
+        """Pairwise covariance plus each side's variance over the same shared days."""
+        n = self.n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean_i = self.sx / n
+            mean_j = self.sx.T / n
+            covariance = (self.sxy - n * mean_i * mean_j) / (n - 1)
+            var_i = (self.sxx - n * np.square(mean_i)) / (n - 1)
+            var_j = var_i.T
+        return covariance, var_i, var_j
+
+_matrices = {}
+_windows = {}
+_screens = OrderedDict()
+_lock = threading.Lock()
+
+def get_return_matrix(data_folder="data"):
+    market = portfolio.get_price_matrix(data_folder)
+    matrix = _matrices.get(id(market))
+    if matrix is None or matrix.market is not market:
+        _matrices.clear()
+        _windows.clear()
+        _screens.clear()
+        matrix = _matrices[id(market)] = ReturnMatrix(market)
+    return matrix
+
+# SCREEN
+def screen(day, lookback, data_folder="data"):
+    """Screen every ticker over the lookback trading days ending at calendar row day.
+
+    Returns (stats DataFrame indexed by ticker, correlation DataFrame). Both
+    are cached per (day, lookback); the window sums behind them are shared
+    and moved incrementally between requested days.
+    """
+    with _lock:
+        matrix = get_return_matrix(data_folder)
+        key = (day, lookback)
+        cached = _screens.get(key)
+        if cached is not None:
+            _screens.move_to_end(key)
+            return cached
+        window = _windows.get(lookback)
+        if window is None:
+            window = _windows[lookback] = RollingWindow(matrix, lookback)
+        window.move_to(day + 1)
+        result = _build_screen(matrix, window)
+        _screens[key] = result
+        while len(_screens) > MAX_CACHED_SCREENS:
+            _screens.popitem(last=False)
+        return result
+
+def _build_screen(matrix, window):
+    covariance, var_i, var_j = window.covariance()
+    days = window.end - window.start
+    count = np.diag(window.n)
+    covered = count >= MIN_COVERAGE * days
+    variance = np.diag(covariance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.sqrt(var_i * var_j)
+
+    # PRICE-BASED STATS READ THE FORWARD-FILLED CLOSES ACROSS THE WINDOW DIRECTLY
+    prices = matrix.market.valuation[max(window.start - 1, 0):window.end]
+    prices = np.where(prices > 0, prices, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        peaks = np.fmax.accumulate(prices, axis=0)
+        recent = slice(max(window.end - SURGE_DAYS, window.start), window.end)
+        recent_volume = matrix.volume[recent].sum(axis=0) / matrix.volume_valid[recent].sum(axis=0)
+        stats = pd.DataFrame({
+            "close": prices[-1],
+            "momentum_pct": (prices[-1] / prices[0] - 1) * 100,
+            "volatility_pct": np.sqrt(variance) * math.sqrt(252) * 100,
+            "drawdown_pct": (1 - prices[-1] / peaks[-1]) * 100,
+            "max_drawdown_pct": np.fmax.reduce(1 - prices / peaks, axis=0) * 100,
+            "volume_surge": recent_volume / (window.volume_sum / window.volume_count),
+        }, index=matrix.tickers)
+        for benchmark in BENCHMARKS:
+            column = matrix.market.columns.get(benchmark)
+            if column is not None:
+                stats[f"beta_{benchmark}"] = covariance[:, column] / var_j[:, column]
+    stats = stats[covered].replace([np.inf, -np.inf], np.nan)
+    tickers = stats.index
+    rows = [matrix.market.columns[ticker] for ticker in tickers]
+    correlation = pd.DataFrame(correlation[np.ix_(rows, rows)].astype(np.float32), index=tickers, columns=tickers)
+    return stats, correlation
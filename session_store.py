@@ -0,0 +1,301 @@
+import os
+import json
+import time
+import atexit
+import secrets
+import sqlite3
+import threading
+import numpy as np
+from streamlit.logger import get_logger
+from trade_ledger import TradeLedger, ACTIONS
+from performance import PerformanceTracker
+from order_book import OrderBook
+import portfolio
+
+logger = get_logger(__name__)
+STORE_PATH = os.environ.get("SIMULATOR_SESSIONS", os.path.join("data", ".sessions.db"))
+# CHANGES ARE GATHERED FOR THIS LONG AFTER THE FIRST ONE, THEN WRITTEN IN ONE TRANSACTION
+FLUSH_INTERVAL = 0.5
+SESSION_TTL_DAYS = 90
+ORDER_FIELDS = ["id", "action", "kind", "shares", "price", "tif", "placed_day", "expires_day", "placed"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    stock_name TEXT,
+    date INTEGER NOT NULL,
+    cash REAL NOT NULL,
+    holdings TEXT NOT NULL,
+    custom TEXT NOT NULL,
+    trades_seen INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    token TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    ticker TEXT NOT NULL,
+    side INTEGER NOT NULL,
+    shares INTEGER NOT NULL,
+    price REAL NOT NULL,
+    commission REAL NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (token, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS marks (
+    token TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    equity REAL NOT NULL,
+    exposure REAL NOT NULL,
+    traded REAL NOT NULL,
+    PRIMARY KEY (token, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS books (
+    token TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    next_id INTEGER NOT NULL,
+    orders TEXT NOT NULL,
+    PRIMARY KEY (token, ticker)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated);
+"""
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+# HELPER FUNCTIONS
+def new_token():
+    return secrets.token_urlsafe(16)
+
+def _ns(date):
+    return int(np.datetime64(date, "ns").astype(np.int64))
+
+def _merge(old, new):
+    # SESSION ROW AND BOOKS: LAST WRITE WINS; TRADES AND MARKS: KEEP OLD ROWS BEFORE WHERE THE NEW CHANGE STARTS
+    merged = dict(old) | {key: new[key] for key in ("session", "books") if key in new}
+    for key in ("trades", "marks"):
+        if key not in new:
+            continue
+        start, rows = new[key]
+        if key in old and start >= old[key][0]:
+            old_start, old_rows = old[key]
+            start, rows = old_start, old_rows[:start - old_start] + rows
+        merged[key] = (start, rows)
+    return merged
+
+# CHANGE TRACKING (SCRIPT THREAD)
+def changes(state, date, saved):
+    """What changed in state since the last call, as a change set for SessionStore.save, or None.
+
+    saved holds what was last sent and is updated in place. Trades and marks
+    only send rows from the first one changed; the session row is compared
+    whole. Only order books whose version moved are serialized again, so an
+    unchanged book costs one integer comparison however many orders it holds.
+    """
+    change = {}
+    held = np.flatnonzero(state.portfolio.holdings)
+    session = (
+        state.stock_name, _ns(date), float(state.cash),
+        json.dumps({state.portfolio.tickers[i]: int(state.portfolio.holdings[i]) for i in held}),
+        json.dumps(state.portfolio.custom), int(state.performance_trades_seen),
+    )
+    if session != saved.get("session"):
+        change["session"] = saved["session"] = session
+
+    trades = state.trades
+    if trades is not saved.get("ledger"):
+        saved["ledger"], trades.dirty_from = trades, 0
+    if trades.dirty_from < len(trades) or trades.dirty_from < saved.get("trades", 0):
+        rows = slice(trades.dirty_from, len(trades))
+        names = np.array(trades.tickers + [""], dtype=object)
+        change["trades"] = (trades.dirty_from, list(zip(
+            range(rows.start, rows.stop), trades.column("date")[rows].astype(np.int64).tolist(), names[trades.column("ticker")[rows]].tolist(),
+            trades.column("side")[rows].tolist(), trades.column("shares")[rows].tolist(), trades.column("price")[rows].tolist(),
+            trades.column("commission")[rows].tolist(), trades.column("total")[rows].tolist(),
+        )))
+    trades.dirty_from = saved["trades"] = len(trades)
+
+    tracker = state.performance
+    if tracker is not saved.get("tracker"):
+        saved["tracker"], tracker.dirty_from = tracker, 0
+    if tracker.dirty_from < len(tracker) or tracker.dirty_from < saved.get("marks", 0):
+        rows = slice(tracker.dirty_from, len(tracker))
+        points = list(zip(
+            range(rows.start, rows.stop), tracker.dates[rows].astype(np.int64).tolist(),
+            tracker.equity[rows].tolist(), tracker.exposure[rows].tolist(), tracker.traded[rows].tolist(),
+        ))
+        # A RERUN RE-MARKS THE CURRENT DAY WITH THE SAME VALUES; ONLY SEND IT IF IT MOVED
+        if points != saved.get("last_mark", [])[-len(points):] or len(points) != 1:
+            change["marks"] = (rows.start, points)
+        saved["last_mark"] = points[-1:]
+    tracker.dirty_from = saved["marks"] = len(tracker)
+
+    # THE STORE REWRITES ALL OF A SESSION'S BOOKS TOGETHER, SO A CHANGE SENDS EVERY ROW, REUSING THE UNCHANGED ONES
+    rows = saved.setdefault("book_rows", {})
+    moved = rows.keys() != state.order_books.keys()
+    for ticker, book in state.order_books.items():
+        row = rows.get(ticker)
+        if row is None or row[0] != book.version:
+            rows[ticker] = (book.version, (ticker, book.next_id, json.dumps([[order.get(field) for field in ORDER_FIELDS] for order in book.open_orders()])))
+            moved = True
+    if moved:
+        for ticker in rows.keys() - state.order_books.keys():
+            del rows[ticker]
+        change["books"] = tuple(rows[ticker][1] for ticker in sorted(rows))
+    return change or None
+
+def restore(state, saved, tickers):
+    """Rebuild the portfolio, ledger, equity curve and order books from SessionStore.load."""
+    session = saved["session"]
+    state.cash = session["cash"]
+    state.portfolio = portfolio.Portfolio(tickers)
+    for ticker, shares in json.loads(session["holdings"]).items():
+        state.portfolio.set_position(ticker, shares, 0.0)
+    for ticker, (shares, price) in json.loads(session["custom"]).items():
+        state.portfolio.set_position(ticker, shares, price)
+    state.performance_trades_seen = session["trades_seen"]
+
+    state.trades = TradeLedger(max(len(saved["trades"]), 64))
+    for _, date, ticker, side, shares, price, commission, total in saved["trades"]:
+        state.trades.append(np.datetime64(date, "ns"), ticker, ACTIONS[side], shares, price, commission, total)
+    dates = np.array([row[1] for row in saved["marks"]], dtype=np.int64).astype("datetime64[ns]")
+    values = np.array([row[2:] for row in saved["marks"]], dtype=np.float64).reshape(-1, 3)
+    state.performance = PerformanceTracker.from_points(dates, values[:, 0], values[:, 1], values[:, 2])
+    state.order_books = {
+        ticker: OrderBook.from_orders([dict(zip(ORDER_FIELDS, order)) for order in json.loads(orders)], next_id)
+        for ticker, next_id, orders in saved["books"]
+    }
+    return np.datetime64(session["date"], "ns")
+
+# SESSION STORE
+class SessionStore:
+    """SQLite (WAL) store of simulator sessions, written by one background thread per process.
+
+    save() only merges a change set into an in-memory dict keyed by session
+    token, so the script thread never waits on disk. Changes to the same
+    session coalesce until the writer wakes; it then writes every pending
+    session in one transaction. load() flushes first, so it always sees the
+    latest save.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: A CRASH LOSES AT MOST THE LAST FLUSH, NEVER CORRUPTS
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.prune()
+        self._worker = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self._worker.start()
+        atexit.register(self.stop)
+
+    def save(self, token, change):
+        with self._pending_lock:
+            pending = self._pending.get(token)
+            self._pending[token] = change if pending is None else _merge(pending, change)
+        self._wake.set()
+
+    def load(self, token):
+        """Everything saved for token, or None if it's unknown."""
+        self.flush()
+        with self._db_lock:
+            row = self._db.execute("SELECT stock_name, date, cash, holdings, custom, trades_seen FROM sessions WHERE token = ?", (token,)).fetchone()
+            if row is None:
+                return None
+            trades = self._db.execute("SELECT seq, date, ticker, side, shares, price, commission, total FROM trades WHERE token = ? ORDER BY seq", (token,)).fetchall()
+            marks = self._db.execute("SELECT seq, date, equity, exposure, traded FROM marks WHERE token = ? ORDER BY seq", (token,)).fetchall()
+            books = self._db.execute("SELECT ticker, next_id, orders FROM books WHERE token = ?", (token,)).fetchall()
+        session = dict(zip(["stock_name", "date", "cash", "holdings", "custom", "trades_seen"], row))
+        return {"session": session, "trades": trades, "marks": marks, "books": books}
+
+    def flush(self):
+        # THE DB LOCK IS TAKEN FIRST, SO A load() NEVER READS BEHIND A FLUSH IN PROGRESS
+        with self._db_lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for token, change in pending.items():
+                    self._write(token, change)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                with self._pending_lock:
+                    # KEEP THE CHANGES FOR THE NEXT FLUSH, UNDER ANY NEWER ONES
+                    for token, change in pending.items():
+                        newer = self._pending.get(token)
+                        self._pending[token] = change if newer is None else _merge(change, newer)
+                raise
+        return len(pending)
+
+    def _write(self, token, change):
+        if "session" in change:
+            self._db.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (token, *change["session"], time.time()))
+        else:
+            self._db.execute("UPDATE sessions SET updated = ? WHERE token = ?", (time.time(), token))
+        for table, width in (("trades", 8), ("marks", 5)):
+            if table in change:
+                start, rows = change[table]
+                self._db.execute(f"DELETE FROM {table} WHERE token = ? AND seq >= ?", (token, start))
+                self._db.executemany(f"INSERT INTO {table} VALUES (?{', ?' * width})", [(token, *row) for row in rows])
+        if "books" in change:
+            self._db.execute("DELETE FROM books WHERE token = ?", (token,))
+            self._db.executemany("INSERT INTO books VALUES (?, ?, ?, ?)", [(token, *book) for book in change["books"]])
+
+    def prune(self, days=SESSION_TTL_DAYS):
+        """Delete sessions untouched for more than days."""
+        cutoff = time.time() - days * 86400
+        with self._db_lock:
+            tokens = [(token,) for (token,) in self._db.execute("SELECT token FROM sessions WHERE updated < ?", (cutoff,))]
+            if tokens:
+                self._db.execute("BEGIN IMMEDIATE")
+                for table in ("sessions", "trades", "marks", "books"):
+                    self._db.executemany(f"DELETE FROM {table} WHERE token = ?", tokens)
+                self._db.execute("COMMIT")
+        return len(tokens)
+
+    def stats(self):
+        with self._pending_lock:
+            pending = len(self._pending)
+        with self._db_lock:
+            (sessions,) = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return {"sessions": sessions, "pending": pending}
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self._wake.set()
+        self._worker.join(timeout)
+        self.flush()
+
+    # WORKER
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            # LET MORE CHANGES PILE UP (AND COALESCE) BEFORE WRITING
+            self._stop.wait(FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                logger.warning("Session store flush failed, will retry: %s", e)
+                self._wake.set()
+
+def get_store(path=STORE_PATH):
+    """Process-wide session store for path, started on first use."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = SessionStore(path)
+            _stores[path] = store
+        return store
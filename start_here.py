@@ -25,6 +25,18 @@ def run():
     **Trading Simulator**
     > Practice buying and selling using real historical data.
     > Track your portfolio, profit/loss, performance metrics, and trade history.
+
+    **Market Screener**
+    > Rank every stock by momentum, volatility, drawdown, volume and beta, and see how they move together.
+
+    **Risk Simulator**
+    > See thousands of possible futures for your simulator portfolio, with value-at-risk and the chance of ruin.
+
+    **Strategy Optimizer**
+    > Grid-search moving-average strategy settings across every stock and compare them on a heatmap.
+
+    **Trading Competition**
+    > Host or join a room where everyone trades the same stock on one shared replay clock, with a live leaderboard.
     
     **Support Center**
     > Get help, report issues, and provide feedback.
@@ -0,0 +1,62 @@
+import sys
+import time
+import threading
+import importlib
+import subprocess
+from streamlit.logger import get_logger
+
+PROCESS_START = time.perf_counter()
+logger = get_logger(__name__)
+PAGE_MODULES = ["start_here", "beginners_guide", "trading_simulator", "market_screener", "risk_simulator", "strategy_optimizer", "trading_competition", "support_center"]
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+# RECORDING
+def record(page, stage, seconds):
+    # FIRST MEASUREMENT WINS: LATER IMPORTS ARE CACHED AND LATER RENDERS ARE WARM
+    with _timings_lock:
+        if (page, stage) in _timings:
+            return
+        _timings[(page, stage)] = seconds
+    logger.info("%s %s: %.1f ms (%.2fs after process start)", page, stage, seconds * 1000, time.perf_counter() - PROCESS_START)
+
+def import_page(module_name):
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    record(module_name, "import", time.perf_counter() - start)
+    return module
+
+def report():
+    """Rows of (page, import ms, first render ms) for every page loaded so far in this process."""
+    with _timings_lock:
+        timings = dict(_timings)
+    pages = [page for page in PAGE_MODULES + ["session"] if any(key[0] == page for key in timings)]
+    return [(page, timings.get((page, "import"), 0.0) * 1000, timings.get((page, "render"), 0.0) * 1000) for page in pages]
+
+# WARM-UP
+_prefetched = threading.Event()
+
+def prefetch_pages():
+    """Import the remaining pages in the background, once per process."""
+    if _prefetched.is_set():
+        return
+    _prefetched.set()
+    def work():
+        for module_name in PAGE_MODULES:
+            import_page(module_name)
+    threading.Thread(target=work, name="page-prefetch", daemon=True).start()
+
+# COLD IMPORT REPORT
+def cold_import_ms(module_name):
+    # FRESH INTERPRETER PER PAGE, STREAMLIT ALREADY IMPORTED (AS IT IS WHEN dashboard.py STARTS)
+    code = f"import time, streamlit; t = time.perf_counter(); import {module_name}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1]) * 1000
+
+if __name__ == "__main__":
+    print(f"{'page':<20}{'cold import (ms)':>18}")
+    for module_name in PAGE_MODULES:
+        print(f"{module_name:<20}{cold_import_ms(module_name):>18,.1f}")
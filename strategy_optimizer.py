@@ -0,0 +1,134 @@
+import os
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+import universe_store
+import parameter_sweep
+import execution_model
+
+STOP_LOSS_CHOICES = [0, 2, 5, 10, 15, 20]
+SHARE_CHOICES = [1, 10, 50, 100, 500, 1000]
+METRIC_LABELS = {
+    "mean_sharpe": "Mean Sharpe",
+    "mean_return_pct": "Mean Return (%)",
+    "median_return_pct": "Median Return (%)",
+    "win_rate_pct": "Win Rate (%)",
+    "mean_max_drawdown_pct": "Mean Max Drawdown (%)",
+}
+
+# HELPER FUNCTIONS
+def window_values(label, key, bounds, default, default_step):
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        start, stop = st.slider(label, *bounds, default, key=f"{key}_range")
+    with col2:
+        step = st.number_input("Step", min_value=1, value=default_step, key=f"{key}_step")
+    return list(range(start, stop + 1, step))
+
+def run_sweep(grid, tickers, workers, model):
+    progress = st.progress(0.0, text=f"Backtesting {len(grid):,} combinations on {len(tickers):,} tickers...")
+    table, best = parameter_sweep.sweep_universe(grid, tickers, workers=workers, progress=lambda done: progress.progress(done, text=f"{done:.0%} of tickers done"), model=model)
+    progress.empty()
+    return table, best
+
+def new_heatmap(table, metric, stop_loss, shares):
+    # "Best" COLLAPSES THAT PARAMETER TO ITS BEST VALUE PER (fast, slow) CELL
+    rows = table
+    if stop_loss != "Best":
+        rows = rows[rows["stop_loss"] == stop_loss]
+    if shares != "Best":
+        rows = rows[rows["shares"] == shares]
+    lower_is_better = metric == "mean_max_drawdown_pct"
+    grid = rows.pivot_table(index="fast", columns="slow", values=metric, aggfunc="min" if lower_is_better else "max")
+    fig = go.Figure(go.Heatmap(
+        z=grid.to_numpy(),
+        x=grid.columns,
+        y=grid.index,
+        colorscale="RdYlGn_r" if lower_is_better else "RdYlGn",
+        colorbar=dict(title=METRIC_LABELS[metric]),
+        hovertemplate="fast %{y} / slow %{x}<br>%{z:.2f}<extra></extra>",
+    ))
+    fig.update_xaxes(title_text="Slow SMA (days)")
+    fig.update_yaxes(title_text="Fast SMA (days)")
+    fig.update_layout(height=500, margin=dict(l=20, r=20, t=20, b=20))
+    return fig
+
+def render_results(table, best):
+    st.subheader("🏆 Ranked Combinations")
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        metric = st.selectbox("Rank by", list(METRIC_LABELS), format_func=METRIC_LABELS.get, key="sweep_rank")
+    with col2:
+        top = st.number_input("Rows", min_value=5, max_value=max(len(table), 5), value=min(25, max(len(table), 5)), step=5, key="sweep_top")
+    ranked = parameter_sweep.rank(table, metric)
+    st.dataframe(ranked.head(top).round(3), use_container_width=True, hide_index=True)
+    st.download_button("Download Results", ranked.to_csv(index=False).encode("utf-8"), file_name="sweep_results.csv", mime="text/csv", on_click="ignore")
+
+    st.subheader("🗺️ Heatmap")
+    col1, col2 = st.columns(2)
+    with col1:
+        stop_loss = st.selectbox("Stop-loss", ["Best"] + sorted(table["stop_loss"].unique()), format_func=lambda v: v if v == "Best" else f"{v:.0%}", key="heatmap_stop_loss")
+    with col2:
+        shares = st.selectbox("Shares", ["Best"] + sorted(table["shares"].unique()), key="heatmap_shares")
+    st.plotly_chart(new_heatmap(table, metric, stop_loss, shares), use_container_width=True)
+
+    if best is not None:
+        with st.expander("Best combination per ticker (by Sharpe)"):
+            st.dataframe(best.round(3), use_container_width=True, hide_index=True)
+
+# STRATEGY OPTIMIZER
+def run():
+    st.title("🧮 Strategy Optimizer")
+    # THE SAME EXECUTION COSTS AS THE TRADING SIMULATOR'S SETTINGS, IF IT HAS BEEN OPENED
+    model = st.session_state.get("execution_model", execution_model.DEFAULT_MODEL)
+    st.markdown(f"""
+    Grid-search the SMA-crossover strategy across every stock in the database. Each combination of fast/slow
+    windows, stop-loss and position size is backtested on every ticker with the simulator's own fills
+    ({model.describe()}, cash and position checks), starting from $100,000.
+    """)
+
+    data_folder = universe_store.DATA_FOLDER
+    tickers = universe_store.valid_tickers(data_folder)
+
+    with st.form("sweep_form"):
+        fast = window_values("Fast SMA windows", "fast", (2, 200), (5, 50), 5)
+        slow = window_values("Slow SMA windows", "slow", (10, 400), (20, 200), 20)
+        col1, col2 = st.columns(2)
+        with col1:
+            stop_losses = st.multiselect("Stop-loss (%)", STOP_LOSS_CHOICES, default=[0, 5, 10], key="sweep_stop_loss", help="0 means no stop-loss.")
+        with col2:
+            shares = st.multiselect("Position size (shares)", SHARE_CHOICES, default=[10, 100], key="sweep_shares")
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            selected = st.multiselect("Tickers (leave empty for all)", tickers, key="sweep_tickers")
+        with col2:
+            workers = st.number_input("Workers", min_value=1, max_value=64, value=os.cpu_count() or 1, key="sweep_workers")
+        submitted = st.form_submit_button("▶️ Run Sweep", use_container_width=True)
+
+    grid = parameter_sweep.make_grid(fast, slow, [pct / 100 for pct in stop_losses or [0]], shares or [10])
+    universe = selected or tickers
+    st.caption(f"{len(grid):,} combinations × {len(universe):,} tickers = {len(grid) * len(universe):,} backtests")
+
+    if submitted:
+        if grid.empty:
+            st.error("❌ Every fast window must be shorter than some slow window.")
+        else:
+            st.session_state.sweep = run_sweep(grid, universe, int(workers), model)
+
+    uploaded = st.file_uploader("Or open results saved with `python parameter_sweep.py --out results.csv`", type=["csv"], key="sweep_upload")
+    if uploaded is not None and uploaded.file_id != st.session_state.get("sweep_upload_id"):
+        # ONLY ON A NEW FILE, SO A LATER SWEEP ISN'T REPLACED ON EVERY RERUN
+        st.session_state.sweep_upload_id = uploaded.file_id
+        try:
+            table = pd.read_csv(uploaded)
+            missing = [col for col in parameter_sweep.PARAM_COLUMNS + list(METRIC_LABELS) if col not in table.columns]
+            if missing:
+                raise ValueError(f"missing column(s): {', '.join(missing)}")
+            st.session_state.sweep = (table, None)
+        except ValueError as e:
+            st.error(f"Failed to load: {e}")
+
+    if "sweep" in st.session_state:
+        render_results(*st.session_state.sweep)
+    else:
+        st.info("Set up a grid and run a sweep to see results.")
@@ -1,29 +1,13 @@
 import streamlit as st
-import smtplib
-from email.mime.text import MIMEText
+import email_outbox
 
 # SEND EMAIL FUNCTION
 def send_email(user_name, user_email, subject, message_text):
-    """Send the support message to the configured email account."""
-    gmail_user = st.secrets["email"]["address"]
-    gmail_pass = st.secrets["email"]["password"]
-
-    msg = MIMEText(
-        f"New Support Request Received!\n\n"
-        f"From: {user_name}\n"
-        f"Email: {user_email}\n\n"
-        f"Subject: {subject}\n\n"
-        f"Message:\n{message_text}"
-    )
-    msg["Subject"] = f"Interactive Trading Simulator Support Request: {subject}"
-    msg["From"] = gmail_user
-    msg["To"] = gmail_user
-
+    """Queue the support message for the configured email account; the outbox worker sends it."""
     try:
-        server = smtplib.SMTP_SSL("smtp.gmail.com", 465)
-        server.login(gmail_user, gmail_pass)
-        server.sendmail(gmail_user, gmail_user, msg.as_string())
-        server.quit()
+        config = st.secrets["email"]
+        msg = email_outbox.build_message(config, user_name, user_email, subject, message_text)
+        email_outbox.get_outbox(config).enqueue(msg)
         return True
     except Exception as e:
         st.error(f"Failed to send email: {e}")
@@ -51,7 +35,7 @@ def run():
         """)
     with st.expander("How do I save or export my trade history from the Trading Simulator?"):
         st.markdown("""
-        You can export your trade history as a CSV file by hovering over the top right corner of the 'Trading History' table and clicking the download button.
+        You can export your full trade history as a CSV file with the 'Download CSV' button above the 'Trade History' table. Long histories are split into pages; the table's own download button (top right corner) exports the page you are viewing.
         """)
     with st.expander("Is this real trading?"):
         st.markdown("""
@@ -82,9 +66,8 @@ def run():
             if not user_name.strip() or not user_email.strip() or not user_message.strip():
                 st.error("Please fill in your name, email, and message before sending.")
             else:
-                with st.spinner("Sending your message..."):
-                    success = send_email(user_name, user_email, subject, user_message)
-                    if success:
-                        st.success("Your message has been sent successfully! We'll get back to you as soon as possible.")
-                    else:
-                        st.error("There was an error sending your message. Please try again later.")
\ No newline at end of file
+                success = send_email(user_name, user_email, subject, user_message)
+                if success:
+                    st.success("Your message has been sent successfully! We'll get back to you as soon as possible.")
+                else:
+                    st.error("There was an error sending your message. Please try again later.")
\ No newline at end of file
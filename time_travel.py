@@ -0,0 +1,142 @@
+import bisect
+import numpy as np
+from order_book import OrderBook
+
+CHECKPOINT_EVERY = 64
+
+def _ns(date):
+    return int(np.datetime64(date, "ns").astype(np.int64))
+
+# TIMELINE
+class Timeline:
+    """Checkpoints of the simulator state plus a compact event log between them.
+
+    Events are recorded in replay-date order: "fill" (a trade and the cash and
+    position after it), one event per order-book change ("place", "cancel",
+    "trigger", "requeue", "expire") and "mark" (one day's equity point).
+    Every CHECKPOINT_EVERY events a snapshot of the mutable state is kept, so
+    restoring any date is a binary search, one snapshot and at most
+    CHECKPOINT_EVERY - 1 events. Only snapshots copy order books; an event
+    costs the same however many orders are open.
+
+    Rewinding keeps the later events, so stepping forward again redoes them.
+    Recording a new event behind the head discards them (the timeline branches).
+    A timeline started mid-replay (a restored session) can't go back before start.
+    """
+
+    def __init__(self, state, start=None):
+        self.start = None if start is None else np.datetime64(start, "ns")
+        self.dates = []
+        self.kinds = []
+        self.payloads = []
+        self.position = 0
+        self.checkpoint_seqs = [0]
+        self.checkpoints = [self._snapshot(state)]
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def head(self):
+        """Date of the last recorded event, or None."""
+        return np.datetime64(self.dates[-1], "ns") if self.dates else None
+
+    @staticmethod
+    def _snapshot(state):
+        return {
+            "cash": state.cash,
+            "holdings": state.portfolio.holdings.copy(),
+            "custom": dict(state.portfolio.custom),
+            "order_books": {ticker: book.copy() for ticker, book in state.order_books.items()},
+            "trades_seen": state.performance_trades_seen,
+        }
+
+    # RECORDING
+    def record(self, state, date, kind, payload):
+        if self.position < len(self.dates):
+            self._branch()
+        self.dates.append(_ns(date))
+        self.kinds.append(kind)
+        self.payloads.append(payload)
+        self.position = len(self.dates)
+        if self.position - self.checkpoint_seqs[-1] >= CHECKPOINT_EVERY:
+            self.checkpoint_seqs.append(self.position)
+            self.checkpoints.append(self._snapshot(state))
+
+    def _branch(self):
+        del self.dates[self.position:], self.kinds[self.position:], self.payloads[self.position:]
+        keep = bisect.bisect_right(self.checkpoint_seqs, self.position)
+        del self.checkpoint_seqs[keep:], self.checkpoints[keep:]
+
+    def record_fill(self, state, date, ticker, action, shares, price, commission, total, mark_price):
+        position = state.portfolio.position(ticker)
+        self.record(state, date, "fill", (ticker, action, shares, price, commission, total, state.cash, position, mark_price))
+
+    def record_order(self, state, date, kind, ticker, order):
+        """One order-book change: "place" or "requeue" with the order as it now rests, "cancel", "trigger" or "expire" with the order taken out."""
+        self.record(state, date, kind, (ticker, dict(order) if kind in ("place", "requeue") else order["id"]))
+
+    def record_mark(self, state, date, equity, exposure, traded):
+        custom = state.portfolio.custom
+        custom = dict(custom) if custom else None
+        self.record(state, date, "mark", (equity, exposure, traded, state.performance_trades_seen, custom))
+
+    # RESTORING
+    def _apply(self, state, i):
+        kind, payload = self.kinds[i], self.payloads[i]
+        if kind == "fill":
+            ticker, _, _, _, _, _, cash, position, mark_price = payload
+            state.cash = cash
+            state.portfolio.set_position(ticker, position, mark_price)
+        elif kind in ("place", "requeue"):
+            ticker, order = payload
+            state.order_books.setdefault(ticker, OrderBook()).restore_order(order)
+        elif kind in ("cancel", "trigger", "expire"):
+            # A SNAPSHOT TAKEN MID-DAY MAY ALREADY LACK THE ORDER; CANCELLING A MISSING ID IS A NO-OP
+            ticker, order_id = payload
+            state.order_books[ticker].cancel(order_id)
+        else:
+            _, _, _, trades_seen, custom = payload
+            state.performance_trades_seen = trades_seen
+            if custom is not None:
+                state.portfolio.custom = dict(custom)
+
+    def _redo_history(self, state, i):
+        # APPEND-ONLY HISTORIES ONLY GROW ON A FORWARD RESTORE
+        kind, payload = self.kinds[i], self.payloads[i]
+        date = np.datetime64(self.dates[i], "ns")
+        if kind == "fill":
+            ticker, action, shares, price, commission, total = payload[:6]
+            state.trades.append(date, ticker, action, shares, price, commission, total)
+        elif kind == "mark":
+            equity, exposure, traded = payload[:3]
+            state.performance.mark(date, equity, exposure, traded)
+
+    def restore(self, state, date):
+        """Put state back exactly as it was after everything recorded on or before date."""
+        end = bisect.bisect_right(self.dates, _ns(date))
+        if end == self.position:
+            return
+        if end > self.position:
+            for i in range(self.position, end):
+                self._redo_history(state, i)
+        else:
+            trades = state.trades
+            trades.truncate(int(np.searchsorted(trades.column("date"), np.datetime64(date, "ns"), side="right")))
+            state.performance.truncate(date)
+
+        # NEAREST SNAPSHOT AT OR BEFORE end; GOING FORWARD, THE LIVE STATE IS ALREADY A CLOSER ONE
+        k = bisect.bisect_right(self.checkpoint_seqs, end) - 1
+        start = self.checkpoint_seqs[k]
+        if self.position <= end and self.position >= start:
+            start = self.position
+        else:
+            snapshot = self.checkpoints[k]
+            state.cash = snapshot["cash"]
+            state.portfolio.holdings = snapshot["holdings"].copy()
+            state.portfolio.custom = dict(snapshot["custom"])
+            state.order_books = {ticker: book.copy() for ticker, book in snapshot["order_books"].items()}
+            state.performance_trades_seen = snapshot["trades_seen"]
+        for i in range(start, end):
+            self._apply(state, i)
+        self.position = end
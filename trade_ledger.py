@@ -0,0 +1,145 @@
+import numpy as np
+import pandas as pd
+
+COLUMNS = {
+    "date": "datetime64[ns]",
+    "ticker": np.int32,
+    "side": np.int8,
+    "shares": np.int64,
+    "price": np.float64,
+    "commission": np.float64,
+    "total": np.float64,
+}
+SIDES = {"BUY": 1, "SELL": -1}
+ACTIONS = {1: "BUY", -1: "SELL"}
+
+# TRADE LEDGER
+class TradeLedger:
+    """Append-only trade history stored as growable typed NumPy columns.
+
+    Appends are amortized O(1) (capacity doubles when full). Every change bumps
+    version, which the cached table and marker views use to know when to rebuild.
+    """
+
+    def __init__(self, capacity=64):
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self._size = 0
+        self.tickers = []
+        self._ticker_codes = {}
+        self.version = 0
+        # FIRST ROW CHANGED SINCE THE SESSION WAS LAST PERSISTED (APPENDS ONLY EVER ADD ROWS AFTER IT)
+        self.dirty_from = 0
+        self._views = {}
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def _grow(self):
+        for name, values in self._columns.items():
+            grown = np.empty(len(values) * 2, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._columns[name] = grown
+
+    def ticker_code(self, ticker):
+        code = self._ticker_codes.get(ticker)
+        if code is None:
+            code = len(self.tickers)
+            self.tickers.append(ticker)
+            self._ticker_codes[ticker] = code
+        return code
+
+    def append(self, date, ticker, action, shares, price, commission, total):
+        if self._size == len(self._columns["date"]):
+            self._grow()
+        i = self._size
+        self._columns["date"][i] = np.datetime64(date, "ns")
+        self._columns["ticker"][i] = self.ticker_code(ticker)
+        self._columns["side"][i] = SIDES[action]
+        self._columns["shares"][i] = shares
+        self._columns["price"][i] = price
+        self._columns["commission"][i] = commission
+        self._columns["total"][i] = total
+        self._size += 1
+        self.version += 1
+
+    def truncate(self, size):
+        if size < self._size:
+            self._size = size
+            self.dirty_from = min(self.dirty_from, size)
+            self.version += 1
+
+    def column(self, name):
+        return self._columns[name][:self._size]
+
+    def shares_traded(self, ticker, date):
+        """Shares of ticker bought or sold on date; rows are in date order, so only that day's rows are read."""
+        code = self._ticker_codes.get(ticker)
+        if code is None:
+            return 0
+        dates = self.column("date")
+        day = np.datetime64(date, "ns")
+        rows = slice(int(dates.searchsorted(day, side="left")), int(dates.searchsorted(day, side="right")))
+        return int(self.column("shares")[rows][self.column("ticker")[rows] == code].sum())
+
+    def record(self, i):
+        return {
+            "date": pd.Timestamp(self._columns["date"][i]),
+            "ticker": self.tickers[self._columns["ticker"][i]],
+            "action": ACTIONS[int(self._columns["side"][i])],
+            "shares": int(self._columns["shares"][i]),
+            "price": float(self._columns["price"][i]),
+            "commission": float(self._columns["commission"][i]),
+            "total": float(self._columns["total"][i]),
+        }
+
+    def __iter__(self):
+        return (self.record(i) for i in range(self._size))
+
+    def _cached(self, key, build, stamp=None):
+        # A VIEW IS REBUILT WHEN ITS STAMP (THE LEDGER VERSION UNLESS GIVEN) CHANGES
+        stamp = self.version if stamp is None else stamp
+        cached = self._views.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, build())
+            self._views[key] = cached
+        return cached[1]
+
+    def markers(self, ticker, action):
+        """(dates, prices, shares) of one ticker's buys or sells, rebuilt only when the ledger changes."""
+        def build():
+            code = self._ticker_codes.get(ticker, -1)
+            mask = (self.column("ticker") == code) & (self.column("side") == SIDES[action])
+            return self.column("date")[mask], self.column("price")[mask], self.column("shares")[mask]
+        return self._cached(("markers", ticker, action), build)
+
+    def table(self):
+        """Full trade table, rebuilt only when the ledger changes."""
+        def build():
+            ticker_names = np.array(self.tickers, dtype=object)
+            return pd.DataFrame({
+                "date": self.column("date"),
+                "ticker": ticker_names[self.column("ticker")] if self._size else np.array([], dtype=object),
+                "action": np.where(self.column("side") > 0, "BUY", "SELL"),
+                "shares": self.column("shares"),
+                "price": self.column("price"),
+                "commission": self.column("commission"),
+                "total": self.column("total"),
+            })
+        return self._cached("table", build)
+
+    def page(self, start, stop):
+        """Display rows start..stop with formatted dates; only the visible page is formatted."""
+        def build():
+            rows = self.table().iloc[start:stop].copy()
+            rows["date"] = rows["date"].dt.strftime("%m-%d-%Y")
+            return rows
+        # ONE SLOT FOR THE LAST PAGE SHOWN, SO PAGING THROUGH A LONG LEDGER DOESN'T KEEP EVERY PAGE VISITED
+        return self._cached("page", build, (start, stop, self.version))
+
+    def to_csv(self):
+        rows = self.table().copy()
+        rows["date"] = rows["date"].dt.strftime("%m-%d-%Y")
+        return rows.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,145 @@
+import datetime
+import pandas as pd
+import streamlit as st
+import universe_store
+import competition
+
+REFRESH_SECONDS = 0.5
+SPEEDS = [0.5, 1, 2, 5, 10, 20]
+
+# HELPER FUNCTIONS
+def current_competition():
+    code = st.session_state.get("competition_code")
+    return competition.get_competition(code) if code else None
+
+def enter(game, name, host):
+    st.session_state.competition_code = game.code
+    st.session_state.competition_player = game.join(name.strip() or f"Player {len(game) + 1}")
+    st.session_state.competition_host = host
+    st.session_state.competition_message = None
+    st.query_params["room"] = game.code
+
+def leave():
+    for key in ("competition_code", "competition_player", "competition_host", "competition_message"):
+        st.session_state.pop(key, None)
+    st.query_params.pop("room", None)
+
+def place_trade(game, action):
+    shares = st.session_state.competition_shares
+    fill = game.trade(st.session_state.competition_player, action, shares)
+    if fill is None:
+        st.session_state.competition_message = ("error", f"❌ {action} of {shares:,} shares rejected: not enough {'cash' if action == 'BUY' else 'shares'}, or the competition is over.")
+    else:
+        st.session_state.competition_message = ("success", f"✅ {'Bought' if action == 'BUY' else 'Sold'} {fill['shares']:,} shares at ${fill['price']:,.2f} (${fill['commission']:,.2f} commission)")
+
+def leaderboard(game, standings):
+    rows = pd.DataFrame(standings.top, columns=["participant", "Name", "Value ($)"])
+    rows.index = pd.RangeIndex(1, len(rows) + 1, name="Rank")
+    rows["Return (%)"] = (rows["Value ($)"] / game.starting_cash - 1) * 100
+    rows["Name"] = [f"{name} (you)" if participant == st.session_state.competition_player else name for participant, name in zip(rows["participant"], rows["Name"])]
+    return rows.drop(columns="participant").round(2)
+
+# SETUP FORMS
+def render_lobby(data_folder):
+    st.markdown("Trade one stock against everyone in the room. The host starts a shared replay clock; every participant sees the same day and price, and the leaderboard ranks portfolio values as the days go by.")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🎙️ Host")
+        tickers = universe_store.valid_tickers(data_folder)
+        ticker = st.selectbox("Stock", tickers, index=tickers.index("AAPL") if "AAPL" in tickers else 0, key="competition_ticker")
+        start = st.date_input("Start date", datetime.date(2020, 1, 2), key="competition_start")
+        days = st.number_input("Trading days", min_value=5, max_value=2500, value=120, step=5, key="competition_days")
+        speed = st.select_slider("Speed (days/sec)", SPEEDS, value=1, key="competition_speed")
+        host_name = st.text_input("Your name", key="competition_host_name")
+        if st.button("Create Competition", key="competition_create_btn", use_container_width=True):
+            game = competition.create(ticker, start, days, speed, data_folder=data_folder)
+            enter(game, host_name, True)
+            st.rerun()
+    with col2:
+        st.subheader("🎟️ Join")
+        code = st.text_input("Room code", st.query_params.get("room", ""), key="competition_join_code")
+        name = st.text_input("Your name", key="competition_join_name")
+        if st.button("Join Competition", key="competition_join_btn", use_container_width=True):
+            game = competition.get_competition(code)
+            if game is None:
+                st.error(f"❌ No competition with code {code.strip().upper()!r}.")
+            else:
+                enter(game, name, False)
+                st.rerun()
+
+def render_host_controls(game):
+    tick = game.tick
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        if tick.running:
+            st.button("⏸️ Pause", use_container_width=True, on_click=game.pause, key="competition_pause_btn")
+        else:
+            st.button("▶️ Start", use_container_width=True, on_click=game.start, disabled=tick.finished, key="competition_start_btn")
+    with col2:
+        speed = st.select_slider("Speed (days/sec)", SPEEDS, value=game.speed if game.speed in SPEEDS else 1, key="competition_live_speed", label_visibility="collapsed")
+        if speed != game.speed:
+            game.set_speed(speed)
+    with col3:
+        st.button("End", use_container_width=True, on_click=game.finish, disabled=tick.finished, key="competition_end_btn")
+
+# LIVE VIEW
+def live_view(game):
+    # READS THE TICK AND STANDINGS THE CLOCK THREAD ALREADY PUBLISHED; NOTHING HERE IS PER-TICK WORK
+    tick, standings = game.published
+    player = st.session_state.competition_player
+    cash, shares, trades = game.account(player)
+    value = cash + shares * tick.price
+    rank, _ = game.rank(player)
+
+    status = "🏆 Finished" if tick.finished else "🟢 Live" if tick.running else "⏸️ Waiting for the host" if tick.day == game.start_day else "⏸️ Paused"
+    st.markdown(f"**{status}** · {game.ticker} · {pd.Timestamp(tick.date):%Y-%m-%d} · day {tick.day - game.start_day} of {game.end_day - game.start_day}")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Price", f"${tick.price:,.2f}")
+    col2.metric("Cash", f"${cash:,.2f}")
+    col3.metric("Shares", f"{shares:,}")
+    col4.metric("Portfolio Value", f"${value:,.2f}", f"{(value / game.starting_cash - 1) * 100:+.2f}%")
+    col5.metric("Rank", f"{rank:,} of {standings.participants:,}" if rank else "—")
+
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        st.number_input("Shares", min_value=1, value=10, step=1, key="competition_shares", label_visibility="collapsed")
+    with col2:
+        st.button("Buy", use_container_width=True, on_click=place_trade, args=(game, "BUY"), disabled=tick.finished, key="competition_buy_btn")
+    with col3:
+        st.button("Sell", use_container_width=True, on_click=place_trade, args=(game, "SELL"), disabled=tick.finished, key="competition_sell_btn")
+    message = st.session_state.get("competition_message")
+    if message:
+        getattr(st, message[0])(message[1])
+
+    st.subheader("🏅 Leaderboard")
+    st.dataframe(leaderboard(game, standings), use_container_width=True)
+    st.caption(f"{standings.participants:,} participants · average value ${standings.mean_value:,.2f} · {trades:,} trades by you · standings computed in {tick.compute_seconds * 1000:,.2f} ms")
+
+    if tick.finished and st.session_state.get("competition_polling"):
+        # STOP THE TIMER: run_every IS ONLY RE-REGISTERED ON A FULL RERUN
+        st.rerun()
+
+# TRADING COMPETITION
+def run():
+    st.title("🏁 Trading Competition")
+    data_folder = "data"
+
+    game = current_competition()
+    if game is None:
+        if "competition_code" in st.session_state:
+            st.warning("⚠️ That competition has closed.")
+            leave()
+        render_lobby(data_folder)
+        return
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.markdown(f"Room code **{game.code}** · share it, or the link to this page, so others can join.")
+    with col2:
+        st.button("Leave", use_container_width=True, on_click=leave, key="competition_leave_btn")
+    if st.session_state.competition_host:
+        render_host_controls(game)
+
+    # THE CLOCK RUNS IN THE SERVER PROCESS; EACH SESSION JUST POLLS THE PUBLISHED TICK UNTIL THE END
+    st.session_state.competition_polling = not game.tick.finished
+    st.fragment(live_view, run_every=REFRESH_SECONDS if st.session_state.competition_polling else None, key="competition_live")(game)
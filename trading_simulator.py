@@ -1,73 +1,529 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import io
 import os
+import math
+import time
+import sqlite3
 from datetime import datetime
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import universe_store
+import dataset_cache
+import csv_ingest
+import backtest_engine
+import execution_model
+import portfolio
+import ohlc_pyramid
+import indicators
+import profiler
+import startup_timing
+import session_store
+import live_feed
+from trade_ledger import TradeLedger
+from performance import PerformanceTracker
+from order_book import OrderBook, TIME_IN_FORCE
+from time_travel import Timeline
+
+TRADES_PER_PAGE = 100
+PLAY_SPEEDS = [1, 2, 5, 10, 20]
+MIN_TICK = 0.1
+LIVE_POLL = 0.5
 
 # HELPER FUNCTIONS
+def load_csv(source):
+    df = pd.read_csv(source)
+    df['Date'] = pd.to_datetime(df['Date'])
+    return df.sort_values("Date").reset_index(drop=True)
+
+def load_default_stock(data_folder, filename):
+    # ZERO-COPY SLICE OF THE MEMORY-MAPPED STORE, FALLING BACK TO THE CSV
+    try:
+        store = universe_store.open_store(data_folder)
+        ticker = universe_store.ticker_name(filename)
+        if ticker in store:
+            return store.load(ticker)
+    except (OSError, ValueError):
+        # NO STORE, OR A MALFORMED CSV BROKE THE BUILD: READ THIS ONE FILE DIRECTLY
+        pass
+    return load_csv(os.path.join(data_folder, filename))
+
+@profiler.timed("load")
+def get_default_stock(data_folder, filename):
+    key = dataset_cache.ticker_key(data_folder, filename)
+    return key, dataset_cache.shared_cache.get(key, lambda: load_default_stock(data_folder, filename))
+
+def load_uploaded_stock(content):
+    # STREAMED IN CHUNKS WITH A PROGRESS BAR; BAD HEADERS FAIL BEFORE THE BODY IS PARSED
+    bar = st.sidebar.progress(0.0, text="Reading CSV...")
+    try:
+        return csv_ingest.read_prices(io.BytesIO(content), progress=lambda done: bar.progress(done, text=f"Reading CSV... {done:.0%}"))
+    finally:
+        bar.empty()
+
+@profiler.timed("load")
+def get_uploaded_stock(uploaded_file):
+    content = uploaded_file.getvalue()
+    key = dataset_cache.upload_key(content)
+    return key, dataset_cache.shared_cache.get(key, lambda: load_uploaded_stock(content))
+
+def get_catalog(data_folder="data"):
+    try:
+        return universe_store.open_store(data_folder).catalog()
+    except (OSError, ValueError):
+        # NO STORE (E.G. A READ-ONLY data/ FOLDER): LIST THE FILES WITHOUT STATS
+        files = universe_store.list_csv_files(data_folder)
+        tickers = [universe_store.ticker_name(f) for f in files]
+        return pd.DataFrame({"file": files, "valid": True, "label": tickers}, index=tickers)
+
 def get_current_price(data, current_day):
-    return data.loc[current_day, 'Close']
+    return float(data.loc[current_day, 'Close'])
+
+def get_portfolio_value(cash, holdings, prices):
+    return cash + holdings.market_value(prices)
+
+def current_position():
+    return st.session_state.portfolio.position(st.session_state.stock_name)
+
+def day_for_date(data, date):
+    # FIRST ROW ON OR AFTER date, SO SWITCHING STOCKS KEEPS THE REPLAY CLOCK
+    day = int(data['Date'].searchsorted(date))
+    return min(day, len(data) - 1)
 
-def get_portfolio_value(cash, position, current_price):
-    return cash + position * current_price
+def reset_portfolio(current_day):
+    market = portfolio.get_market()
+    st.session_state.trades = TradeLedger()
+    st.session_state.cash = 100_000
+    st.session_state.portfolio = portfolio.Portfolio(market.tickers if market else [])
+    st.session_state.order_books = {}
+    st.session_state.performance = PerformanceTracker()
+    st.session_state.performance_trades_seen = 0
+    st.session_state.current_day = current_day
+    st.session_state.timeline = Timeline(st.session_state)
+
+def record_fill(ticker, fill, date, market_price):
+    st.session_state.cash = fill["cash"]
+    st.session_state.portfolio.set_position(ticker, fill["position"], market_price)
+    st.session_state.trades.append(date, ticker, fill["action"], fill["shares"], fill["price"], fill["commission"], fill["total"])
+    st.session_state.timeline.record_fill(st.session_state, date, ticker, fill["action"], fill["shares"], fill["price"], fill["commission"], fill["total"], market_price)
+
+def fill_market_order(action, shares, current_price):
+    # FILL WHAT THE DAY'S VOLUME ALLOWS NOW; THE REST KEEPS WORKING AS A MARKET ORDER ON THE NEXT DAYS
+    ticker = st.session_state.stock_name
+    data = st.session_state.data
+    day = st.session_state.current_day
+    date = data.loc[day, "Date"]
+    bar = {col.lower(): float(data.loc[day, col]) for col in ("High", "Low", "Volume") if col in data}
+    fill = backtest_engine.fill_order(
+        st.session_state.cash, current_position(), action, shares, current_price,
+        st.session_state.execution_model, traded=st.session_state.trades.shares_traded(ticker, date), **bar,
+    )
+    if fill is None:
+        return None
+    if fill["shares"]:
+        record_fill(ticker, fill, date, current_price)
+    if fill["shares"] < shares:
+        place_resting_order(action, "Market", shares - fill["shares"], None, "GTC")
+    return fill
 
 def execute_buy(shares, current_price):
-    slippage = 0.001
-    execution_price = current_price * (1 + slippage)
-    total_cost = shares * execution_price + 1 
-    if total_cost > st.session_state.cash:
+    fill = fill_market_order("BUY", shares, current_price)
+    if fill is None:
         st.error(f"❌ Not enough cash to buy {shares} shares!")
         return
-    st.session_state.cash -= total_cost
-    st.session_state.position += shares
-    st.session_state.trades.append({
-        "date": st.session_state.data.loc[st.session_state.current_day, "Date"],
-        "action": "BUY",
-        "shares": shares,
-        "price": execution_price,
-        "commission": 1,
-        "total": total_cost
-    })
-    st.success(f"Bought {shares} shares at \${execution_price:.2f} (market: \${current_price:.2f})")
+    if fill["shares"]:
+        st.success(f"Bought {fill['shares']} shares at \${fill['price']:.2f} (market: \${current_price:.2f})")
 
 def execute_sell(shares, current_price):
-    slippage = 0.001
-    execution_price = current_price * (1 - slippage)
-    if shares > st.session_state.position:
-        st.error(f"❌ You only have {st.session_state.position} shares!")
+    fill = fill_market_order("SELL", shares, current_price)
+    if fill is None:
+        st.error(f"❌ You only have {current_position()} shares!")
+        return
+    if fill["shares"]:
+        st.success(f"Sold {fill['shares']} shares at \${fill['price']:.2f} (market: \${current_price:.2f})")
+
+def ticker_bars(ticker):
+    if ticker == st.session_state.stock_name:
+        data = st.session_state.data
+        volume = data["Volume"].to_numpy() if "Volume" in data else np.full(len(data), np.nan)
+        return tuple(data[col].to_numpy() for col in ("Date", "Open", "High", "Low", "Close")) + (volume,)
+    market = portfolio.get_market()
+    if market is None or ticker not in market.store:
+        return None
+    return (market.store.row_dates(ticker),) + tuple(market.store.field(ticker, col) for col in ("Open", "High", "Low", "Close", "Volume"))
+
+def market_prices(market, date):
+    if market is None:
+        return np.zeros(0)
+    return market.valuation[market.day_index(date)]
+
+def mark_performance(date, prices, record=True):
+    # ONE POINT PER REPLAY DAY; TRADED NOTIONAL COMES FROM LEDGER ROWS NOT YET COUNTED
+    # advance_to CALLS THIS FOR EVERY DAY IT PASSES AND EACH SESSION STATE READ COSTS SEVERAL US, SO EACH KEY IS READ ONCE
+    state = st.session_state
+    trades, seen = state.trades, state.performance_trades_seen
+    traded = 0.0
+    if seen != len(trades):
+        # A RE-MARK ON RERUN ONLY GOES ON THE TIMELINE IF A TRADE CHANGED THE DAY, SO VIEWING A REWOUND DAY DOESN'T BRANCH IT
+        record = record or seen < len(trades)
+        traded = float(np.abs(trades.column("shares")[seen:] * trades.column("price")[seen:]).sum())
+        state.performance_trades_seen = len(trades)
+    invested = state.portfolio.market_value(prices)
+    equity = state.cash + invested
+    exposure = abs(invested) / equity if equity else 0.0
+    state.performance.mark(date, equity, exposure, traded)
+    if record:
+        state.timeline.record_mark(state, date, equity, exposure, traded)
+
+@profiler.timed("advance")
+def advance_to(target_day):
+    # STEP ONE DAY AT A TIME: MATCH RESTING ORDERS ON EVERY BAR WE PASS, THEN RECORD THAT DAY'S EQUITY
+    data = st.session_state.data
+    dates = data["Date"].to_numpy()
+    closes = data["Close"].to_numpy()
+    market = portfolio.get_market()
+
+    # DAYS ALREADY PLAYED BEFORE A REWIND ARE RESTORED FROM THE TIMELINE (MANUAL TRADES INCLUDED), NOT RE-SIMULATED
+    timeline = st.session_state.timeline
+    if timeline.position < len(timeline):
+        redo_day = min(target_day, int(data["Date"].searchsorted(timeline.head, side="right")) - 1)
+        if redo_day > st.session_state.current_day:
+            timeline.restore(st.session_state, dates[redo_day])
+            st.session_state.current_day = redo_day
+
+    books = []
+    for ticker, book in st.session_state.order_books.items():
+        bars = ticker_bars(ticker) if len(book) else None
+        if bars is not None:
+            books.append((ticker, book, bars))
+
+    model = st.session_state.execution_model
+    holdings, ticker_name = st.session_state.portfolio, st.session_state.stock_name
+    for day in range(st.session_state.current_day + 1, target_day + 1):
+        date = pd.Timestamp(dates[day])
+        for ticker, book, (bar_dates, opens, highs, lows, bar_closes, volumes) in books:
+            row = int(bar_dates.searchsorted(dates[day]))
+            if row == len(bar_dates) or bar_dates[row] != dates[day]:
+                continue
+            triggered, expired = book.match_day(row, opens[row], highs[row], lows[row], bar_closes[row])
+            for order in triggered:
+                timeline.record_order(st.session_state, date, "trigger", ticker, order)
+            for order in expired:
+                timeline.record_order(st.session_state, date, "expire", ticker, order)
+            for order in triggered:
+                fill = backtest_engine.fill_order(
+                    st.session_state.cash, st.session_state.portfolio.position(ticker), order["action"], order["shares"], order["fill_price"],
+                    model, highs[row], lows[row], volumes[row], st.session_state.trades.shares_traded(ticker, date),
+                )
+                name = f"{ticker} {order['action']} {order['kind'].lower()} #{order['id']}"
+                if fill is None:
+                    st.session_state.order_notices.append(("error", f"❌ {name} triggered on {date:%m-%d-%Y} but could not be filled and was cancelled."))
+                    continue
+                if fill["shares"]:
+                    record_fill(ticker, fill, date, bar_closes[row])
+                    st.session_state.order_notices.append(("success", f"{name} filled {fill['shares']} shares at ${fill['price']:.2f} on {date:%m-%d-%Y}"))
+                if fill["shares"] < order["shares"]:
+                    # VOLUME CAP: THE REST STAYS IN THE BOOK FOR THE NEXT BARS
+                    remaining = order["shares"] - fill["shares"]
+                    if book.requeue(order, remaining, row):
+                        timeline.record_order(st.session_state, date, "requeue", ticker, book.orders[order["id"]])
+                        st.session_state.order_notices.append(("info", f"{name} has {remaining} shares still working."))
+                    else:
+                        st.session_state.order_notices.append(("info", f"{name} expired with {remaining} shares unfilled."))
+            for order in expired:
+                st.session_state.order_notices.append(("info", f"{ticker} {order['action']} {order['kind'].lower()} #{order['id']} expired unfilled."))
+        holdings.mark_custom(ticker_name, closes[day])
+        mark_performance(date, market_prices(market, date))
+    st.session_state.current_day = target_day
+
+def rewind_to(target_day):
+    # CASH, POSITIONS, ORDERS, TRADES AND THE EQUITY CURVE GO BACK TO HOW THEY WERE ON THAT DAY
+    timeline = st.session_state.timeline
+    if timeline.start is not None:
+        # A RESTORED SESSION ONLY REMEMBERS FROM ITS RESTORE DATE ON
+        target_day = max(target_day, day_for_date(st.session_state.data, timeline.start))
+    timeline.restore(st.session_state, st.session_state.data.loc[target_day, "Date"])
+    st.session_state.current_day = target_day
+
+def travel_to(target_day):
+    if target_day < st.session_state.current_day:
+        rewind_to(target_day)
+    elif target_day > st.session_state.current_day:
+        advance_to(target_day)
+
+def step_days(days):
+    # NAVIGATION CALLBACK: RUNS BEFORE THE FRAGMENT RERUNS, SO THE NEW DAY IS DRAWN IN ONE PASS
+    travel_to(min(max(st.session_state.current_day + days, 0), len(st.session_state.data) - 1))
+
+def jump_to_date():
+    # BINARY SEARCH ON THE DATE COLUMN: FIRST TRADING DAY ON OR AFTER THE PICKED DATE
+    travel_to(day_for_date(st.session_state.data, pd.Timestamp(st.session_state.jump_date)))
+
+def get_session_store():
+    try:
+        return session_store.get_store()
+    except (OSError, sqlite3.Error):
+        # E.G. A READ-ONLY data/ FOLDER: THE SIMULATOR STILL WORKS, SESSIONS JUST AREN'T SAVED
+        return None
+
+def restore_session(catalog, data_folder):
+    # LAZY: ONLY THE FIRST SIMULATOR RUN OF A BROWSER SESSION READS THE STORE
+    token = st.session_state.get("session_token") or session_store.new_token()
+    st.session_state.session_token = token
+    st.query_params["session"] = token
+    store = get_session_store()
+    saved = store.load(token) if store is not None else None
+    if saved is None:
+        return
+    market = portfolio.get_market()
+    date = session_store.restore(st.session_state, saved, market.tickers if market else [])
+    stock_name = saved["session"]["stock_name"]
+    if stock_name not in catalog.index or not catalog.loc[stock_name, "valid"]:
+        # UPLOADS AREN'T SAVED; THEIR POSITIONS ARE, AT THE LAST PRICE SEEN
+        stock_name = catalog.index[catalog["valid"]][0]
+    data_key, df = get_default_stock(data_folder, catalog.loc[stock_name, "file"])
+    st.session_state.data = df
+    st.session_state.data_key = data_key
+    st.session_state.stock_name = stock_name
+    st.session_state.current_day = day_for_date(df, date)
+    st.session_state.timeline = Timeline(st.session_state, start=date)
+    # THE STORE ALREADY HOLDS THIS STATE: START THE CHANGE TRACKING FROM IT
+    st.session_state.persisted = {}
+    session_store.changes(st.session_state, date, st.session_state.persisted)
+
+def persist_session():
+    # ONLY THE DIFF IS BUILT HERE; THE WRITE HAPPENS ON THE STORE'S BACKGROUND THREAD
+    store = get_session_store()
+    if store is None:
+        return
+    date = st.session_state.data.loc[st.session_state.current_day, "Date"]
+    change = session_store.changes(st.session_state, date, st.session_state.setdefault("persisted", {}))
+    if change is not None:
+        store.save(st.session_state.session_token, change)
+
+def confirm_reset(answer=None):
+    if answer:
+        # LIVE: THE FRESH ACCOUNT STARTS AT THE NEWEST BAR
+        reset_portfolio(len(st.session_state.data) - 1 if st.session_state.live else 50)
+    st.session_state.confirm_reset = answer is None
+
+def tick_interval(speed):
+    return max(1 / speed, MIN_TICK)
+
+def toggle_play():
+    st.session_state.playing = not st.session_state.playing
+    st.session_state.play_anchor = time.monotonic()
+
+def autoplay_step(max_day):
+    # DAYS ARE DUE BY WALL CLOCK; A SLOW TICK SLOWS PLAYBACK DOWN INSTEAD OF JUMPING AHEAD
+    speed = st.session_state.play_speed
+    now = time.monotonic()
+    due = int((now - st.session_state.play_anchor) * speed)
+    if due == 0:
+        return
+    step = min(due, math.ceil(speed * tick_interval(speed)))
+    st.session_state.play_anchor = now if step < due else st.session_state.play_anchor + step / speed
+    advance_to(min(max_day, st.session_state.current_day + step))
+
+def go_live():
+    # CALLBACK: SUBSCRIBE, WAIT FOR THE FEED'S BACKFILL, THEN OPEN A FRESH PAPER ACCOUNT ON ITS NEWEST BAR
+    address = st.session_state.live_address.strip()
+    symbol = st.session_state.live_symbol.strip().upper()
+    try:
+        feed = live_feed.get_feed(address)
+    except ValueError as e:
+        st.session_state.order_notices.append(("error", f"❌ {e}"))
+        return
+    if not feed.wait_for_bars(symbol):
+        reason = f" ({feed.error})" if feed.error else ""
+        st.session_state.order_notices.append(("error", f"❌ No bars for {symbol} from {address}{reason}. Is the feed running? Start the bundled one with `python feed_server.py`."))
         return
-    total_revenue = shares * execution_price - 1 
-    st.session_state.cash += total_revenue
-    st.session_state.position -= shares
-    st.session_state.trades.append({
-        "date": st.session_state.data.loc[st.session_state.current_day, "Date"],
-        "action": "SELL",
-        "shares": shares,
-        "price": execution_price,
-        "commission": 1,
-        "total": total_revenue
-    })
-    st.success(f"Sold {shares} shares at \${execution_price:.2f} (market: \${current_price:.2f})")
-
-def plot_price_chart(data, trades):
+    bars, seq, _ = feed.ring(symbol).since(0)
+    buffer = live_feed.LiveBars(bars)
+    st.session_state.data = buffer.frame()
+    # ONE KEY FOR THE WHOLE LIVE RUN: INDICATORS AND CANDLES EXTEND AS IT GROWS
+    st.session_state.data_key = ("live", address, symbol, st.session_state.session_token, seq)
+    st.session_state.stock_name = f"{symbol} (LIVE)"
+    st.session_state.live = {"address": address, "symbol": symbol, "seq": seq, "bars": buffer}
+    st.session_state.playing = False
+    reset_portfolio(len(bars) - 1)
+
+def stop_live():
+    # THE BARS RECEIVED SO FAR STAY LOADED AND CAN BE STEPPED THROUGH LIKE ANY DATASET
+    st.session_state.live = None
+
+@profiler.timed("live")
+def live_step():
+    # BARS THE FEED THREAD BUFFERED SINCE THE LAST POLL GO THROUGH THE SAME ORDER MATCHING AND MARKING AS A REPLAY STEP
+    live = st.session_state.live
+    bars, live["seq"], lost = live_feed.get_feed(live["address"]).ring(live["symbol"]).since(live["seq"])
+    if lost:
+        st.session_state.order_notices.append(("warning", f"{lost} {live['symbol']} bars went by faster than this page read them and were skipped."))
+    if len(bars):
+        # APPENDED IN PLACE; THE NEW FRAME IS A VIEW, SO A POLL NEVER COPIES THE BARS ALREADY HELD
+        live["bars"].append(bars)
+        st.session_state.data = live["bars"].frame()
+        advance_to(len(st.session_state.data) - 1)
+
+def render_live_settings():
+    live = st.session_state.live
+    with st.sidebar.expander("📡 Live Paper Trading", expanded=live is not None):
+        st.text_input("Feed (host:port)", live_feed.FEED_ADDRESS, key="live_address", disabled=live is not None)
+        st.text_input("Symbol", "AAPL", key="live_symbol", disabled=live is not None)
+        if live is None:
+            st.button("📡 Go Live", use_container_width=True, on_click=go_live, key="go_live_btn", help="Starts a fresh $100,000 paper account that trades on the feed's bars as they arrive.")
+        else:
+            st.button("⏹️ Stop Live", use_container_width=True, on_click=stop_live, key="stop_live_btn")
+
+def render_live_status():
+    live = st.session_state.live
+    stats = live_feed.get_feed(live["address"]).stats()
+    state = "🟢 Connected" if stats["connected"] else f"🔴 Reconnecting ({stats['error']})"
+    lag = f" · lag p50 {stats['lag_p50_ms']:,.1f} ms" if stats["lag_p50_ms"] is not None else ""
+    st.caption(f"📡 Live {live['symbol']} from {live['address']} · {state} · {stats['bars']:,} bars received{lag}")
+
+def place_resting_order(action, kind, shares, price, tif):
+    ticker = st.session_state.stock_name
+    book = st.session_state.order_books.setdefault(ticker, OrderBook())
+    order = book.place(action, kind, shares, price, st.session_state.current_day, tif)
+    date = st.session_state.data.loc[st.session_state.current_day, "Date"]
+    order["placed"] = date.strftime("%m-%d-%Y")
+    st.session_state.timeline.record_order(st.session_state, date, "place", ticker, order)
+    if kind == "Market":
+        st.info(f"{ticker} {action} market #{order['id']}: {shares} shares are over today's volume cap and keep working on the next days.")
+    else:
+        st.info(f"{ticker} {action} {kind.lower()} #{order['id']} for {shares} shares at ${price:.2f} is resting ({tif}).")
+
+@profiler.timed("orders")
+def render_open_orders():
+    books = {ticker: book for ticker, book in st.session_state.order_books.items() if len(book)}
+    if not books:
+        return
+    st.subheader("📌 Open Orders")
+    orders = pd.DataFrame([dict(order, ticker=ticker) for ticker, book in books.items() for order in book.open_orders()])
+    st.dataframe(orders[["ticker","id","action","kind","shares","price","tif","placed"]], use_container_width=True, hide_index=True)
+    labels = [f"{ticker} #{order_id}" for ticker, order_id in zip(orders["ticker"], orders["id"])]
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        cancel_label = st.selectbox("Order to cancel", labels, key="cancel_order_id")
+    with col2:
+        st.write("\n")
+        st.button("Cancel Order", use_container_width=True, on_click=cancel_order, args=(cancel_label,))
+
+def cancel_order(label):
+    ticker, order_id = label.rsplit(" #", 1)
+    order = st.session_state.order_books[ticker].cancel(int(order_id))
+    if order is not None:
+        st.session_state.timeline.record_order(st.session_state, st.session_state.data.loc[st.session_state.current_day, "Date"], "cancel", ticker, order)
+
+def switch_stock(df, stock_name, data_key):
+    # KEEP THE PORTFOLIO AND MOVE THE NEW STOCK TO THE CURRENT REPLAY DATE
+    day = min(50, len(df)-1)
+    late_start = False
+    if st.session_state.data is not None:
+        current_date = st.session_state.data.loc[st.session_state.current_day, "Date"]
+        day = day_for_date(df, current_date)
+        first_date = df.loc[day, "Date"]
+        late_start = first_date > current_date
+        if late_start:
+            # PLAY THE SKIPPED DAYS ON THE OLD STOCK'S CALENDAR SO OTHER TICKERS' ORDERS MATCH AND EQUITY IS MARKED
+            advance_to(int(st.session_state.data["Date"].searchsorted(first_date)) - 1)
+            st.session_state.order_notices.append(("warning", f"{stock_name} has no data before {first_date:%m-%d-%Y}, so the replay moved forward to that date."))
+    st.session_state.data = df
+    st.session_state.data_key = data_key
+    st.session_state.stock_name = stock_name
+    st.session_state.live = None
+    # A LATE START THEN TAKES ONE STEP ONTO THE NEW STOCK'S FIRST BAR, THE WAY NEXT DAY WOULD
+    st.session_state.current_day = day - late_start
+    if late_start:
+        advance_to(day)
+
+def render_dataset_picker(data_folder):
+    # SIDEBAR FRAGMENT: TYPING A SEARCH RERUNS ONLY THE PICKER, LOADING A STOCK RERUNS THE APP
+    st.subheader("📂 Stock Dataset")
+    catalog = get_catalog(data_folder)
+    query = st.text_input("Search Tickers", placeholder="e.g. AAPL", key="ticker_search")
+    matches = universe_store.search_catalog(catalog, query)
+    selected = st.selectbox("Select Default Stock", matches.index, format_func=catalog["label"].get, key="ticker_select")
+    st.caption(f"{len(matches):,} of {int(catalog['valid'].sum()):,} datasets")
+    if st.button("Load Stock", use_container_width=True, key="load_default_btn", disabled=selected is None):
+        try:
+            data_key, df = get_default_stock(data_folder, catalog.loc[selected, "file"])
+            switch_stock(df, selected, data_key)
+            st.success(f"Loaded {selected}")
+            st.rerun()
+        except Exception as e:
+            st.error(f"Failed to load: {e}")
+
+def render_execution_settings():
+    # REBUILT ON EVERY RUN FROM THE WIDGETS; RATE INPUTS ARE KEYED PER MODEL SO EACH KEEPS ITS OWN DEFAULT
+    rates = execution_model.DEFAULT_RATES
+    labels = execution_model.LABELS
+    with st.sidebar.expander("⚙️ Execution Costs"):
+        spread = st.selectbox("Spread", list(execution_model.SPREAD_MODELS), format_func=labels.get, key="exec_spread")
+        spread_rate = st.number_input(
+            "Slippage (%)" if spread == "fixed" else "Share of the day's range (%)",
+            min_value=0.0, value=rates[spread] * 100, step=0.05, format="%.2f", key=f"exec_spread_rate_{spread}",
+        ) / 100
+        impact = st.selectbox("Market Impact", list(execution_model.IMPACT_MODELS), format_func=labels.get, key="exec_impact", help="Extra slippage that grows with the order's share of the day's volume.")
+        impact_rate = st.number_input("Impact coefficient", min_value=0.0, value=rates[impact], step=0.1, disabled=impact == "none", key=f"exec_impact_rate_{impact}")
+        commission = st.selectbox("Commission", list(execution_model.COMMISSION_SCHEDULES), format_func=labels.get, key="exec_commission")
+        if commission == "percent":
+            commission_rate = st.number_input("Commission (% of notional)", min_value=0.0, value=rates[commission] * 100, step=0.01, format="%.2f", key="exec_commission_rate_percent") / 100
+        else:
+            commission_rate = st.number_input(
+                "Commission ($ per trade)" if commission == "flat" else "Commission ($ per share)",
+                min_value=0.0, value=rates[commission], step=0.001 if commission == "per_share" else 0.5, format="%.3f" if commission == "per_share" else "%.2f", key=f"exec_commission_rate_{commission}",
+            )
+        minimum = st.number_input("Minimum commission ($)", min_value=0.0, value=0.0, step=0.5, disabled=commission == "flat", key="exec_commission_minimum")
+        capped = st.checkbox("Cap fills by daily volume", key="exec_capped", help="Orders bigger than the cap fill partly; the rest keeps working on the next days.")
+        participation = st.slider("Max share of daily volume (%)", 1, 100, 10, disabled=not capped, key="exec_participation") / 100
+    st.session_state.execution_model = execution_model.ExecutionModel(
+        spread, spread_rate, impact, impact_rate, commission, commission_rate,
+        0.0 if commission == "flat" else minimum, participation if capped else None,
+    )
+
+@profiler.timed("holdings")
+def render_holdings(prices):
+    positions = st.session_state.portfolio.positions(prices)
+    if not positions:
+        return
+    st.subheader("💼 Holdings")
+    holdings = pd.DataFrame(positions, columns=["ticker", "shares", "price"])
+    holdings["value"] = holdings["shares"] * holdings["price"]
+    st.dataframe(holdings, use_container_width=True, hide_index=True)
+
+def visible_markers(window_dates, dates, prices, shares):
+    # BINARY SEARCH INTO THE SORTED WINDOW INSTEAD OF A LINEAR `in` SCAN PER TRADE
+    idx = np.searchsorted(window_dates, dates)
+    visible = idx < len(window_dates)
+    visible[visible] = window_dates[idx[visible]] == dates[visible]
+    return dates[visible], prices[visible], shares[visible]
+
+def new_price_figure(price_trace=None, overlay_names=()):
     fig = go.Figure()
 
-    # PRICE LINE
-    fig.add_trace(go.Scatter(x=data['Date'], y=data['Close'], mode='lines', name='Close Price', line=dict(color='blue')))
-
-    # TRADE MARKERS
-    for trade in trades:
-        if trade['date'] in data['Date'].values:
-            color = "green" if trade['action']=="BUY" else "red"
-            symbol = "triangle-up" if trade['action']=="BUY" else "triangle-down"
-            fig.add_trace(go.Scatter(
-                x=[trade['date']], y=[trade['price']],
-                mode='markers+text',
-                marker=dict(size=12, color=color, symbol=symbol),
-                text=[trade['action']],
-                textposition='top center',
-                name=f"{trade['action']} ({trade['shares']})"
-            ))
+    # PRICE LINE (OR CANDLES)
+    if price_trace is None:
+        price_trace = go.Scatter(x=[], y=[], mode='lines', name='Close Price', line=dict(color='blue'))
+    fig.add_trace(price_trace)
+
+    # TRADE MARKERS (ONE TRACE PER SIDE)
+    for action, color, symbol in (("BUY", "green", "triangle-up"), ("SELL", "red", "triangle-down")):
+        fig.add_trace(go.Scatter(
+            x=[], y=[],
+            mode='markers+text',
+            marker=dict(size=12, color=color, symbol=symbol),
+            text=[],
+            textposition='top center',
+            name=action,
+            hovertemplate=f"{action} %{{customdata}} @ $%{{y:.2f}}<extra></extra>"
+        ))
+
+    # INDICATOR OVERLAYS
+    for name in overlay_names:
+        fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name=name, line=dict(width=1)))
     fig.update_layout(
         xaxis_title="Date",
         yaxis_title="Price ($)",
@@ -75,18 +531,169 @@ def plot_price_chart(data, trades):
         height=600,
         margin=dict(l=20, r=20, t=50, b=20)
     )
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+def cached_figure(state_key, overlay_names, build):
+    # REUSE THE SESSION'S FIGURE AND SWAP TRACE DATA IN PLACE RATHER THAN REBUILDING IT
+    cached = st.session_state.get(state_key)
+    if cached is None or cached[0] != overlay_names:
+        cached = (overlay_names, build())
+        st.session_state[state_key] = cached
+    return cached[1]
+
+def update_markers_and_overlays(fig, window_dates, trades, ticker, overlays):
+    for trace, action in zip(fig.data[1:3], ("BUY", "SELL")):
+        dates, prices, shares = visible_markers(window_dates, *trades.markers(ticker, action))
+        trace.x = dates
+        trace.y = prices
+        trace.customdata = shares
+        # ONE STRING LABELS EVERY POINT; A PER-POINT LIST IS VALIDATED ELEMENT BY ELEMENT ON EVERY RERUN
+        trace.text = action
+    for trace, (name, values) in zip(fig.data[3:], overlays):
+        trace.x = window_dates
+        trace.y = values
+
+def plot_price_chart(data, trades, ticker=None, overlays=()):
+    overlay_names = tuple(name for name, _ in overlays)
+    fig = cached_figure("price_chart", overlay_names, lambda: new_price_figure(overlay_names=overlay_names))
+    window_dates = data['Date'].to_numpy()
+    with fig.batch_update():
+        fig.data[0].x = window_dates
+        fig.data[0].y = data['Close'].to_numpy()
+        update_markers_and_overlays(fig, window_dates, trades, ticker, overlays)
+    show_chart(fig)
+
+def show_chart(fig):
+    # FIGURE-TO-JSON SERIALIZATION IS OFTEN THE SLOWEST PART OF A CHART RERUN
+    with profiler.span("chart.serialize"):
+        st.plotly_chart(fig, use_container_width=True)
+
+def new_candlestick_figure(overlay_names):
+    fig = new_price_figure(go.Candlestick(x=[], open=[], high=[], low=[], close=[], name='OHLC'), overlay_names)
+    fig.update_layout(xaxis_rangeslider_visible=False)
+    return fig
+
+def plot_candlestick_chart(data, trades, ticker, start, end, overlays=()):
+    # PICK THE COARSEST PYRAMID LEVEL THAT KEEPS THE WINDOW UNDER MAX_CANDLES
+    pyramid = ohlc_pyramid.get_pyramid(st.session_state.data_key, data)
+    size, candles = pyramid.window(start, end)
+    overlay_names = tuple(name for name, _ in overlays)
+    fig = cached_figure("candle_chart", overlay_names, lambda: new_candlestick_figure(overlay_names))
+    window_dates = data['Date'].to_numpy()[start:end + 1]
+    with fig.batch_update():
+        fig.data[0].update(x=candles["Date"], open=candles["Open"], high=candles["High"], low=candles["Low"], close=candles["Close"])
+        fig.data[0].name = "OHLC" if size == 1 else f"OHLC ({size}-bar)"
+        update_markers_and_overlays(fig, window_dates, trades, ticker, overlays)
+    show_chart(fig)
+    if size > 1:
+        st.caption(f"Each candle covers {size} bars so the chart stays under {ohlc_pyramid.MAX_CANDLES} candles.")
 
-def render_trade_table(trades):
+def new_indicator_figure(panels):
+    fig = make_subplots(rows=len(panels), cols=1, shared_xaxes=True, vertical_spacing=0.08, subplot_titles=[name for name, _ in panels])
+    for row, (_, outputs) in enumerate(panels, start=1):
+        for output in outputs:
+            fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name=output, line=dict(width=1)), row=row, col=1)
+    fig.update_layout(
+        hovermode="x unified",
+        height=180 * len(panels),
+        margin=dict(l=20, r=20, t=30, b=20)
+    )
+    return fig
+
+def plot_indicator_panel(window_dates, panels):
+    # RSI / MACD / ATR HAVE THEIR OWN SCALES, SO THEY GET STACKED SUBPLOTS UNDER THE PRICE CHART
+    layout = tuple((name, tuple(outputs)) for name, outputs in panels)
+    fig = cached_figure("indicator_chart", layout, lambda: new_indicator_figure(layout))
+    with fig.batch_update():
+        traces = iter(fig.data)
+        for _, outputs in panels:
+            for values in outputs.values():
+                trace = next(traces)
+                trace.x = window_dates
+                trace.y = values
+    show_chart(fig)
+
+@profiler.timed("performance")
+def render_performance(tracker):
+    st.subheader("📊 Performance")
+    metrics = tracker.metrics()
+    cols = st.columns(6)
+    cols[0].metric("Max Drawdown", f"{metrics['max_drawdown']:.2%}", f"now {metrics['drawdown']:.2%}", delta_color="off")
+    cols[1].metric("Volatility (ann.)", f"{metrics['volatility']:.2%}")
+    cols[2].metric("Sharpe", f"{metrics['sharpe']:.2f}")
+    cols[3].metric("Sortino", f"{metrics['sortino']:.2f}")
+    cols[4].metric("Avg Exposure", f"{metrics['exposure']:.2%}")
+    cols[5].metric("Turnover (ann.)", f"{metrics['turnover']:.2f}x")
+    if len(tracker) > 1:
+        curve = tracker.curve()
+        fig = cached_figure("equity_chart", (), new_equity_figure)
+        with fig.batch_update():
+            fig.data[0].x = curve["date"].to_numpy()
+            fig.data[0].y = curve["equity"].to_numpy()
+            fig.data[1].x = curve["date"].to_numpy()
+            fig.data[1].y = -curve["drawdown"].to_numpy()
+        show_chart(fig)
+        st.download_button("Download Equity Curve", lambda: tracker.curve().to_csv(index=False).encode("utf-8"), file_name="equity_curve.csv", mime="text/csv", on_click="ignore")
+
+def new_equity_figure():
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3], vertical_spacing=0.05)
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Equity', line=dict(color='blue')), row=1, col=1)
+    fig.add_trace(go.Scatter(x=[], y=[], mode='lines', name='Drawdown', fill='tozeroy', line=dict(color='red', width=1)), row=2, col=1)
+    fig.update_yaxes(title_text="Equity ($)", row=1, col=1)
+    fig.update_yaxes(title_text="Drawdown", tickformat=".0%", row=2, col=1)
+    fig.update_layout(
+        hovermode="x unified",
+        height=350,
+        showlegend=False,
+        margin=dict(l=20, r=20, t=20, b=20)
+    )
+    return fig
+
+@profiler.timed("trade_table")
+def render_trade_table(trades, page_size=TRADES_PER_PAGE):
     st.subheader("📝 Trade History")
     if trades:
-        df = pd.DataFrame(trades)
-        df['date'] = df['date'].dt.strftime("%m-%d-%Y")
-        st.dataframe(df[['date','action','shares','price','commission','total']], use_container_width=True)
+        # TABLE VIEWS ARE CACHED ON THE LEDGER AND ONLY THE VISIBLE PAGE IS FORMATTED
+        pages = max(1, -(-len(trades) // page_size))
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col1:
+            page = st.number_input("Page", min_value=1, max_value=pages, value=pages, step=1, key="trade_page") if pages > 1 else 1
+        with col2:
+            st.write("\n")
+            st.caption(f"{len(trades):,} trades, page {page} of {pages}")
+        with col3:
+            st.write("\n")
+            st.download_button("Download CSV", trades.to_csv, file_name="trade_history.csv", mime="text/csv", use_container_width=True, on_click="ignore")
+        start = (page - 1) * page_size
+        st.dataframe(trades.page(start, start + page_size), use_container_width=True)
     else:
         st.info("No trades yet.")
 
+def render_profiler_panel():
+    with st.expander("🐞 Profiler"):
+        # PROCESS-WIDE NUMBERS ONLY EXIST WHEN THE SERVER WAS STARTED WITH SIMULATOR_PROFILE=1
+        scopes = ["Session", "Process", "Startup"] if profiler.enabled else ["Session", "Startup"]
+        scope = st.radio("Scope", scopes, horizontal=True, key="profiler_scope")
+        if scope == "Startup":
+            # FIRST IMPORT AND FIRST RENDER OF EACH PAGE IN THIS SERVER PROCESS (startup_timing.report())
+            stats = {page: {"import_ms": import_ms, "render_ms": render_ms} for page, import_ms, render_ms in startup_timing.report()}
+        else:
+            stats = profiler.summaries(st.session_state.get("profiler_spans", {})) if scope == "Session" else profiler.process_summaries()
+        if stats:
+            st.dataframe(pd.DataFrame.from_dict(stats, orient="index").round(2), use_container_width=True)
+        else:
+            st.caption("No spans recorded yet.")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.button("Refresh", use_container_width=True, key="profiler_refresh")
+        with col2:
+            # CLEARS THIS SESSION'S SPANS ONLY; THE PROCESS-WIDE HISTOGRAMS BELONG TO EVERY SESSION
+            st.button("Reset", use_container_width=True, key="profiler_reset", on_click=profiler.reset_session)
+        if profiler.enabled:
+            st.download_button("Prometheus Metrics", profiler.prometheus_text, file_name="simulator_metrics.prom", mime="text/plain", use_container_width=True, on_click="ignore")
+
 # TRADING SIMULATOR
+@profiler.timed("run")
 def run():
     st.title("📈 Trading Simulator")
     st.markdown("Use this tool to practice trading with historical stock data in a risk-free environment.")
@@ -96,9 +703,9 @@ def run():
         st.markdown("""
         ### 👉 How To Use
         1. Select a stock from the sidebar and load its historical data.
-        2. Use the day slider to navigate through historical market days.
+        2. Step through historical market days with the day buttons or jump to a date, or press Play to replay them automatically. Going back in time rewinds your portfolio to that day.
         3. Place buy/sell orders using market or limit orders.
-        4. Track your cash, position, portfolio value, and profit/loss in real-time.
+        4. Track your cash, positions, portfolio value, and profit/loss in real-time. Load another stock at any time to hold several at once.
         5. Review your trade history and analyze your performance.
         """)
         
@@ -112,126 +719,144 @@ def run():
     st.markdown("----")
 
     # INITIALIZE SESSION STATE
+    if 'order_notices' not in st.session_state:
+        st.session_state.order_notices = []
+        st.session_state.live = None
+    data_folder = "data" 
+    catalog = get_catalog(data_folder)
     if 'trades' not in st.session_state:
-        st.session_state.trades = []
-        st.session_state.current_day = 50
-        st.session_state.cash = 100_000
-        st.session_state.position = 0
+        reset_portfolio(50)
         st.session_state.data = None
         st.session_state.stock_name = None
+        restore_session(catalog, data_folder)
 
     # LOAD DATA
-    data_folder = "data" 
-    csv_files = [f for f in os.listdir(data_folder) if f.endswith(".csv")]
-    
-    st.sidebar.subheader("📂 Stock Dataset")
-    selected_file = st.sidebar.selectbox("Select Default Stock", csv_files)
-    
-    if st.sidebar.button("Load Stock", use_container_width=True, key="load_default_btn"):
-        new_stock_name = selected_file.replace(".csv","").upper()
-        default_path = os.path.join(data_folder, selected_file)
-        try:
-            df = pd.read_csv(default_path)
-            df['Date'] = pd.to_datetime(df['Date'])
-            df = df.sort_values("Date").reset_index(drop=True)
-            
-            # RESET PORTFOLIO FOR NEW STOCK
-            st.session_state.data = df
-            st.session_state.stock_name = new_stock_name
-            st.session_state.trades = []
-            st.session_state.cash = 100_000
-            st.session_state.position = 0
-            st.session_state.current_day = min(50, len(df)-1)
-            st.success(f"Loaded {new_stock_name}")
-            st.rerun()
-        except Exception as e:
-            st.error(f"Failed to load: {e}")
+    with st.sidebar:
+        st.fragment(render_dataset_picker, key="dataset_picker")(data_folder)
         
     uploaded_file = st.sidebar.file_uploader("Upload Your Own CSV", type=["csv"])
     
     if uploaded_file is not None:
         if st.sidebar.button("Load Stock", use_container_width=True, key="load_uploaded_btn"):
             new_stock_name = uploaded_file.name.replace(".csv","").upper()
+            market = portfolio.get_market()
+            if market is not None and new_stock_name in market.columns:
+                # KEEP UPLOADED PRICES SEPARATE FROM THE BUILT-IN DATASET OF THE SAME NAME
+                new_stock_name = f"{new_stock_name} (UPLOAD)"
             try:
-                df = pd.read_csv(uploaded_file)
-                df['Date'] = pd.to_datetime(df['Date'])
-                df = df.sort_values("Date").reset_index(drop=True)
-                
-                # RESET PORTFOLIO FOR NEW UPLOADED STOCK
-                st.session_state.data = df
-                st.session_state.stock_name = new_stock_name
-                st.session_state.trades = []
-                st.session_state.cash = 100_000
-                st.session_state.position = 0
-                st.session_state.current_day = min(50, len(df)-1)
+                data_key, df = get_uploaded_stock(uploaded_file)
+                switch_stock(df, new_stock_name, data_key)
                 st.success(f"Loaded {new_stock_name}")
                 st.rerun()
             except Exception as e:
                 st.error(f"Failed to load: {e}")
+
+    render_execution_settings()
+    render_live_settings()
     
+    # PROFILER (SIMULATOR_PROFILE=1 FOR THE WHOLE PROCESS, ?profile=1 FOR THIS SESSION ONLY)
+    if st.query_params.get("profile") == "1":
+        profiler.enable_session()
+    if profiler.enabled:
+        profiler.start_exporter()
+    if profiler.active():
+        with st.sidebar:
+            st.fragment(render_profiler_panel, key="profiler_panel")()
+
     # LOAD DEFAULT STOCK ON FIRST RUN
     if st.session_state.data is None:
-        default_path = os.path.join(data_folder, csv_files[0])
-        df = pd.read_csv(default_path)
-        df['Date'] = pd.to_datetime(df['Date'])
-        df = df.sort_values("Date").reset_index(drop=True)
+        default = catalog.index[catalog["valid"]][0]
+        data_key, df = get_default_stock(data_folder, catalog.loc[default, "file"])
         st.session_state.data = df
-        st.session_state.stock_name = csv_files[0].replace(".csv","").upper()
+        st.session_state.data_key = data_key
+        st.session_state.stock_name = default
         st.session_state.current_day = min(50, len(df)-1)
 
-    # METRICS
+    # AUTO-PLAY
+    if 'playing' not in st.session_state:
+        st.session_state.playing = False
+        st.session_state.play_anchor = time.monotonic()
+    if st.session_state.live:
+        st.subheader("📡 Live Market")
+        run_every = LIVE_POLL
+    else:
+        st.subheader("📅 Navigate Trading Days")
+        col1, col2 = st.columns([1, 4])
+        with col1:
+            st.button("⏸️ Pause" if st.session_state.playing else "▶️ Play", use_container_width=True, on_click=toggle_play, key="play_btn")
+        with col2:
+            st.select_slider("Speed (days/sec)", PLAY_SPEEDS, value=5, key="play_speed", label_visibility="collapsed")
+        run_every = tick_interval(st.session_state.play_speed) if st.session_state.playing else None
+
+    # EVERYTHING BELOW DEPENDS ON THE REPLAY DAY AND RERUNS AS ONE FRAGMENT, ON A TIMER WHILE PLAYING OR LIVE
+    st.fragment(replay_view, run_every=run_every, key="replay")()
+
+@profiler.timed("replay")
+def replay_view():
+    if st.session_state.live:
+        live_step()
     data = st.session_state.data
-    min_day = 0
     max_day = len(data) - 1
-    if st.session_state.current_day > max_day:
-        st.session_state.current_day = max_day
-    if st.session_state.current_day < min_day:
-        st.session_state.current_day = min_day
-    current_price = get_current_price(data, st.session_state.current_day)
-    portfolio_value = get_portfolio_value(st.session_state.cash, st.session_state.position, current_price)
-    total_pnl = portfolio_value - 100_000
-    total_pnl_pct = total_pnl / 100_000 * 100
-
-    # DAY NAVIGATION
-    st.subheader("📅 Navigate Trading Days")
-    col1, col2, col3, col4, col5 = st.columns(5)
-    with col1:
-        if st.button("⏮️ 10 Days", use_container_width=True):
-            st.session_state.current_day = max(min_day, st.session_state.current_day - 10)
-            st.rerun()
-    with col2:
-        if st.button("◀️ Previous", use_container_width=True):
-            st.session_state.current_day = max(min_day, st.session_state.current_day - 1)
-            st.rerun()
-    with col3:
-        if st.button("🔄 RESET", use_container_width=True):
-            st.session_state.confirm_reset = True
-            st.rerun()
-    with col4:
-        if st.button("Next ▶️", use_container_width=True):
-            st.session_state.current_day = min(max_day, st.session_state.current_day + 1)
-            st.rerun()
-    with col5:
-        if st.button("10 Days ⏭️", use_container_width=True):
-            st.session_state.current_day = min(max_day, st.session_state.current_day + 10)
+    st.session_state.current_day = min(max(st.session_state.current_day, 0), max_day)
+    if st.session_state.playing:
+        autoplay_step(max_day)
+        if st.session_state.current_day == max_day:
+            # STOP THE TIMER: run_every IS ONLY RE-REGISTERED ON A FULL RERUN
+            st.session_state.playing = False
             st.rerun()
 
+    # METRICS
+    with profiler.span("metrics"):
+        current_price = get_current_price(data, st.session_state.current_day)
+        market = portfolio.get_market()
+        prices = market_prices(market, data.loc[st.session_state.current_day, "Date"])
+        st.session_state.portfolio.mark_custom(st.session_state.stock_name, current_price)
+        portfolio_value = get_portfolio_value(st.session_state.cash, st.session_state.portfolio, prices)
+        total_pnl = portfolio_value - 100_000
+        total_pnl_pct = total_pnl / 100_000 * 100
+
+    # DAY NAVIGATION (LIVE: THE FEED MOVES THE DAY)
+    if st.session_state.live:
+        render_live_status()
+        col1, col2, col3 = st.columns(3)
+        with col2:
+            st.button("🔄 RESET", use_container_width=True, on_click=confirm_reset)
+    else:
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.button("⏮️ 10 Days", use_container_width=True, on_click=step_days, args=(-10,))
+        with col2:
+            st.button("◀️ Previous", use_container_width=True, on_click=step_days, args=(-1,))
+        with col3:
+            st.button("🔄 RESET", use_container_width=True, on_click=confirm_reset)
+        with col4:
+            st.button("Next ▶️", use_container_width=True, on_click=step_days, args=(1,))
+        with col5:
+            st.button("10 Days ⏭️", use_container_width=True, on_click=step_days, args=(10,))
+        # KEEP THE PICKER ON THE REPLAY DATE; IT'S ONLY READ IN ITS OWN CALLBACK
+        st.session_state.jump_date = data.loc[st.session_state.current_day, "Date"].date()
+        st.date_input(
+            "Jump to date",
+            min_value=data["Date"].iloc[0].date(),
+            max_value=data["Date"].iloc[-1].date(),
+            key="jump_date",
+            on_change=jump_to_date,
+            help="Going back restores your cash, positions, orders and trades as of that day; going forward again replays them.",
+        )
+
+    # RESTING ORDER FILLS FROM THE LAST STEP
+    for level, notice in st.session_state.order_notices:
+        getattr(st, level)(notice)
+    st.session_state.order_notices = []
+
     # CONFIRMATION DIALOG FOR RESET
     if st.session_state.get('confirm_reset', False):
         st.warning("⚠️ Are you sure you want to reset? This will clear all trades and reset your portfolio.")
         col1, col2 = st.columns(2)
         with col1:
-            if st.button("🙂‍↕️ YES", use_container_width=True):
-                st.session_state.trades = []
-                st.session_state.cash = 100_000
-                st.session_state.position = 0
-                st.session_state.current_day = 50
-                st.session_state.confirm_reset = False
-                st.rerun()
+            st.button("🙂‍↕️ YES", use_container_width=True, on_click=confirm_reset, args=(True,))
         with col2:
-            if st.button("🙂‍↔️ NO", use_container_width=True):
-                st.session_state.confirm_reset = False
-                st.rerun()
+            st.button("🙂‍↔️ NO", use_container_width=True, on_click=confirm_reset, args=(False,))
     
     # TRADING PANEL
     col1, col2, col3, col4 = st.columns(4)
@@ -247,7 +872,7 @@ def run():
     with col4:
         order_type = st.radio(
             "**Order Type**", 
-            ["Market", "Limit"], 
+            ["Market", "Limit", "Stop"], 
             horizontal=True, 
             key="order_type_radio"
         )
@@ -256,7 +881,7 @@ def run():
 
     # PLACE ORDER
     st.subheader("🛒 Place Order")
-    col1, col2 = st.columns(2)
+    col1, col2, col3 = st.columns(3)
     with col1:
         if order_type == "Market":
             st.text_input(
@@ -268,7 +893,7 @@ def run():
             limit_price = None
         else:
             limit_price = st.number_input(
-                "Limit Price", 
+                f"{order_type} Price", 
                 min_value=0.01, 
                 value=float(current_price),
                 step=0.01, 
@@ -276,36 +901,89 @@ def run():
             )
     with col2: 
         shares = st.number_input("Shares", min_value=1, value=10, step=1)
+    with col3:
+        time_in_force = st.radio(
+            "Time in Force",
+            TIME_IN_FORCE,
+            horizontal=True,
+            disabled=order_type == "Market",
+            help="Orders that can't fill now rest in the order book. Day orders expire if they don't fill on the next trading day.",
+            key="time_in_force_radio"
+        )
 
     # BUY/SELL
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🟢 BUY", use_container_width=True):
-            if order_type == "Market" or (limit_price and current_price <= limit_price):
+            if order_type == "Market" or (order_type == "Limit" and current_price <= limit_price) or (order_type == "Stop" and current_price >= limit_price):
                 execute_buy(shares, current_price)
             else:
-                st.error(f"Price ${current_price:.2f} above limit ${limit_price:.2f}")
+                place_resting_order("BUY", order_type, shares, limit_price, time_in_force)
     with col2:
         if st.button("🔴 SELL", use_container_width=True):
-            if order_type == "Market" or (limit_price and current_price >= limit_price):
+            if order_type == "Market" or (order_type == "Limit" and current_price >= limit_price) or (order_type == "Stop" and current_price <= limit_price):
                 execute_sell(shares, current_price)
             else:
-                st.error(f"Price ${current_price:.2f} below limit ${limit_price:.2f}")
+                place_resting_order("SELL", order_type, shares, limit_price, time_in_force)
+
+    render_open_orders()
     
     st.markdown("----")
 
     # PRICE CHART
+    st.fragment(render_chart, key="chart")(data, current_price, total_pnl, total_pnl_pct, portfolio_value)
+
+    st.markdown("----")
+
+    # HOLDINGS
+    render_holdings(prices)
+
+    # PERFORMANCE
+    with profiler.span("performance.mark"):
+        mark_performance(data.loc[st.session_state.current_day, "Date"], prices, record=False)
+    render_performance(st.session_state.performance)
+
+    # TRADE HISTORY
+    st.fragment(render_trade_table, key="trades")(st.session_state.trades)
+
+    with profiler.span("persist"):
+        persist_session()
+
+@profiler.timed("chart")
+def render_chart(data, current_price, total_pnl, total_pnl_pct, portfolio_value):
+    # NESTED FRAGMENT: CHART SETTINGS RERUN ONLY THE CHART
     st.subheader("🪙 Price Chart")
     max_days = st.session_state.get("chart_days", min(50, len(data)))
-    st.write("ℹ️ There is a $1 commission per trade and a slippage of 0.1%.")
+    chart_type = st.session_state.get("chart_type", "Line")
+    st.write(f"ℹ️ Fills pay {st.session_state.execution_model.describe()}.")
+    selected_indicators = st.session_state.get("indicators", [])
     col1, col2 = st.columns([4, 1])
     with col1:
         start_idx = max(0, st.session_state.current_day - max_days)
-        visible_data = data.iloc[start_idx : st.session_state.current_day + 1]
-        plot_price_chart(visible_data, st.session_state.trades)
+
+        # INDICATORS ARE EXTENDED ONLY UP TO current_day, SO THE CHART NEVER SEES AHEAD
+        overlays, panels = [], []
+        with profiler.span("chart.indicators"):
+            for name in selected_indicators:
+                values = indicators.get_series(st.session_state.data_key, data, name).upto(st.session_state.current_day)
+                window = {output: series[start_idx:] for output, series in values.items()}
+                if name in indicators.OVERLAYS:
+                    overlays.extend(window.items())
+                else:
+                    panels.append((name, window))
+
+        if chart_type == "Candlestick":
+            plot_candlestick_chart(data, st.session_state.trades, st.session_state.stock_name, start_idx, st.session_state.current_day, overlays)
+        else:
+            visible_data = data.iloc[start_idx : st.session_state.current_day + 1]
+            plot_price_chart(visible_data, st.session_state.trades, st.session_state.stock_name, overlays)
+        if panels:
+            plot_indicator_panel(data['Date'].to_numpy()[start_idx:st.session_state.current_day + 1], panels)
     with col2:
         st.write("\n")
         st.write("\n")
+        st.radio("Chart Type", ["Line", "Candlestick"], horizontal=True, key="chart_type")
+        st.multiselect("Indicators", list(indicators.INDICATORS), key="indicators", help="SMA/EMA use 20 days, Bollinger Bands 20 days ± 2σ, RSI and ATR 14 days, MACD 12/26/9.")
         max_days = st.number_input(
             "Days to Display", 
             min_value=10, 
@@ -315,12 +993,7 @@ def run():
             key="chart_days"
         )
         st.metric("Current Price", f"${current_price:,.2f}")
-        st.metric("Position (Shares)", f"{st.session_state.position}")
+        st.metric("Position (Shares)", f"{current_position()}")
         st.metric("Total Profit/Loss", f"${total_pnl:,.2f}", f"{total_pnl_pct:+.2f}%")
         st.metric("Cash", f"${st.session_state.cash:,.2f}")
         st.metric("Portfolio Value", f"${portfolio_value:,.2f}")
-
-    st.markdown("----")
-
-    # TRADE HISTORY
-    render_trade_table(st.session_state.trades)
@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+
+DATA_FOLDER = "data"
+FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+STORE_VERSION = 2
+CHECK_INTERVAL = 2.0
+
+_open_stores = {}
+_last_checked = {}
+_build_lock = threading.Lock()
+
+# HELPER FUNCTIONS
+def ticker_name(filename):
+    return filename.replace(".csv", "").upper()
+
+def list_csv_files(data_folder=DATA_FOLDER):
+    return sorted(f for f in os.listdir(data_folder) if f.endswith(".csv"))
+
+def store_folder_for(data_folder=DATA_FOLDER):
+    # EACH DATA FOLDER GETS ITS OWN STORE, SO --data other/ NEVER OVERWRITES data/'s
+    return os.path.join(data_folder, ".universe")
+
+def scan_mtimes(data_folder=DATA_FOLDER):
+    return {f: os.stat(os.path.join(data_folder, f)).st_mtime_ns for f in list_csv_files(data_folder)}
+
+def read_index(store_folder):
+    try:
+        with open(os.path.join(store_folder, "index.json")) as fh:
+            index = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != STORE_VERSION:
+        return None
+    return index
+
+def is_stale(index, data_folder=DATA_FOLDER):
+    if index is None:
+        return True
+    return index["mtimes"] != scan_mtimes(data_folder)
+
+def catalog_entry(df):
+    # HEADER-ONLY FILES (RUT, SPX, VMW, BRK.B, ...) AND FILES WITHOUT A USABLE CLOSE ARE FLAGGED INVALID
+    closes = df["Close"].dropna()
+    return {
+        "first_date": df["Date"].iloc[0].strftime("%Y-%m-%d") if len(df) else None,
+        "last_date": df["Date"].iloc[-1].strftime("%Y-%m-%d") if len(df) else None,
+        "last_close": float(closes.iloc[-1]) if len(closes) else None,
+        "avg_volume": float(df["Volume"].mean()) if df["Volume"].notna().any() else None,
+        "valid": bool(len(closes)),
+    }
+
+# BUILD STEP
+def build_store(data_folder=DATA_FOLDER, store_folder=None):
+    """Convert every CSV in data_folder into one columnar binary store (data_folder/.universe by default)."""
+    store_folder = store_folder or store_folder_for(data_folder)
+    os.makedirs(store_folder, exist_ok=True)
+    mtimes = scan_mtimes(data_folder)
+
+    frames = {}
+    for filename in mtimes:
+        df = pd.read_csv(os.path.join(data_folder, filename), usecols=["Date"] + FIELDS)
+        df["Date"] = pd.to_datetime(df["Date"])
+        frames[filename] = df.sort_values("Date").reset_index(drop=True)
+
+    total_rows = sum(len(df) for df in frames.values())
+    build_id = f"{time.time_ns():x}"
+    columns_file = f"columns-{build_id}.f64"
+    dates_file = f"dates-{build_id}.i8"
+    calendar_file = f"calendar-{build_id}.npy"
+
+    columns = np.memmap(os.path.join(store_folder, columns_file), dtype=np.float64, mode="w+", shape=(len(FIELDS), max(total_rows, 1)))
+    dates = np.memmap(os.path.join(store_folder, dates_file), dtype=np.int64, mode="w+", shape=(max(total_rows, 1),))
+
+    tickers = {}
+    offset = 0
+    for filename, df in frames.items():
+        length = len(df)
+        columns[:, offset:offset + length] = df[FIELDS].to_numpy(dtype=np.float64).T
+        dates[offset:offset + length] = df["Date"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        tickers[ticker_name(filename)] = dict(catalog_entry(df), file=filename, offset=offset, length=length)
+        offset += length
+    columns.flush()
+    dates.flush()
+    del columns, dates
+
+    # DATE CALENDAR (UNION OF EVERY TICKER'S TRADING DAYS)
+    all_dates = [df["Date"].to_numpy(dtype="datetime64[ns]") for df in frames.values() if len(df)]
+    calendar = np.unique(np.concatenate(all_dates)) if all_dates else np.array([], dtype="datetime64[ns]")
+    np.save(os.path.join(store_folder, calendar_file), calendar)
+
+    index = {
+        "version": STORE_VERSION,
+        "build_id": build_id,
+        "fields": FIELDS,
+        "total_rows": total_rows,
+        "columns_file": columns_file,
+        "dates_file": dates_file,
+        "calendar_file": calendar_file,
+        "mtimes": mtimes,
+        "tickers": tickers,
+    }
+    tmp_path = os.path.join(store_folder, f"index.json.{build_id}.tmp")
+    with open(tmp_path, "w") as fh:
+        json.dump(index, fh)
+    os.replace(tmp_path, os.path.join(store_folder, "index.json"))
+
+    # REMOVE FILES FROM PREVIOUS BUILDS (OPEN MEMMAPS KEEP THEIR OWN HANDLE)
+    keep = {columns_file, dates_file, calendar_file, "index.json"}
+    for name in os.listdir(store_folder):
+        if name not in keep and not name.endswith(".tmp"):
+            try:
+                os.remove(os.path.join(store_folder, name))
+            except OSError:
+                pass
+    return index
+
+# OPEN STORE
+class UniverseStore:
+    def __init__(self, index, store_folder):
+        self.index = index
+        self.build_id = index["build_id"]
+        self.tickers = index["tickers"]
+        rows = max(index["total_rows"], 1)
+        self.columns = np.memmap(os.path.join(store_folder, index["columns_file"]), dtype=np.float64, mode="r", shape=(len(FIELDS), rows))
+        self.dates = np.memmap(os.path.join(store_folder, index["dates_file"]), dtype=np.int64, mode="r", shape=(rows,))
+        self.calendar = np.load(os.path.join(store_folder, index["calendar_file"]), mmap_mode="r")
+        self._catalog = None
+
+    def __contains__(self, ticker):
+        return ticker in self.tickers
+
+    def row_slice(self, ticker):
+        entry = self.tickers[ticker]
+        return slice(entry["offset"], entry["offset"] + entry["length"])
+
+    def row_dates(self, ticker):
+        return np.asarray(self.dates[self.row_slice(ticker)]).view("datetime64[ns]")
+
+    def field(self, ticker, field):
+        return np.asarray(self.columns[FIELDS.index(field), self.row_slice(ticker)])
+
+    def catalog(self):
+        """One row per ticker (rows, first/last date, last close, avg volume, valid), built once per store."""
+        if self._catalog is None:
+            catalog = pd.DataFrame.from_dict(self.tickers, orient="index").sort_index()
+            catalog = catalog.rename(columns={"length": "rows"})[["file", "rows", "first_date", "last_date", "last_close", "avg_volume", "valid"]]
+            catalog["label"] = [
+                f"{ticker}  ·  {rows:,} days to {last_date}, ${last_close:,.2f}" if valid else f"{ticker}  ·  empty"
+                for ticker, rows, last_date, last_close, valid in zip(catalog.index, catalog["rows"], catalog["last_date"], catalog["last_close"], catalog["valid"])
+            ]
+            self._catalog = catalog
+        return self._catalog
+
+    def load(self, ticker):
+        """Return the ticker's history as a DataFrame backed by the memory-mapped store."""
+        rows = self.row_slice(ticker)
+        data = {"Date": self.row_dates(ticker)}
+        for i, field in enumerate(FIELDS):
+            data[field] = np.asarray(self.columns[i, rows])
+        return pd.DataFrame(data, copy=False)
+
+def open_store(data_folder=DATA_FOLDER, store_folder=None):
+    """Open data_folder's universe store, rebuilding it first if any CSV changed."""
+    store_folder = store_folder or store_folder_for(data_folder)
+    store = _open_stores.get(store_folder)
+    now = time.monotonic()
+    if store is not None and now - _last_checked.get(store_folder, 0) < CHECK_INTERVAL:
+        return store
+
+    # MTIME SCAN IS THROTTLED SO BACK-TO-BACK LOADS SKIP THE 500+ STAT CALLS
+    with _build_lock:
+        index = read_index(store_folder)
+        if is_stale(index, data_folder):
+            index = build_store(data_folder, store_folder)
+        _last_checked[store_folder] = now
+        store = _open_stores.get(store_folder)
+        if store is None or store.build_id != index["build_id"]:
+            store = UniverseStore(index, store_folder)
+            _open_stores[store_folder] = store
+        return store
+
+def search_catalog(catalog, query="", include_invalid=False):
+    """Catalog rows whose ticker contains query, prefix matches first."""
+    rows = catalog if include_invalid else catalog[catalog["valid"]]
+    query = query.strip().upper()
+    if not query:
+        return rows
+    tickers = rows.index.str
+    prefix = tickers.startswith(query)
+    return pd.concat([rows[prefix], rows[~prefix & tickers.contains(query, regex=False)]])
+
+def valid_tickers(data_folder=DATA_FOLDER):
+    """Tickers in data_folder that have data, from the current store's catalog."""
+    catalog = open_store(data_folder).catalog()
+    return list(catalog.index[catalog["valid"]])
+
+def load_ticker(ticker, data_folder=DATA_FOLDER, store_folder=None):
+    return open_store(data_folder, store_folder).load(ticker)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the universe store for a folder of CSVs.")
+    parser.add_argument("--data", default=DATA_FOLDER)
+    args = parser.parse_args()
+    store_folder = store_folder_for(args.data)
+    start = time.perf_counter()
+    index = build_store(args.data, store_folder)
+    print(f"Built {len(index['tickers'])} tickers ({index['total_rows']:,} rows) into {store_folder} in {time.perf_counter() - start:.2f}s")